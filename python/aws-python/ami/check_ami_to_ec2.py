@@ -1,9 +1,22 @@
-import boto3
 import csv
+import os
 import sys
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError
 
-def find_ec2_instances_with_ami(profile_name, ami_id, output_file):
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.aws_session import get_client
+from common.ec2_inventory import find_instances_by_image, parse_image_ids
+from common.report_history import ReportHistory, target_query
+
+# 보고서 이력 컬럼 (다중 계정 버전과 같은 컬럼, 프로필 기본 리전만 검색하므로 Region은 None, snapshot/diff_reports.py로 비교)
+HISTORY_COLUMNS = ['Profile', 'Region', 'InstanceName', 'InstanceID', 'State', 'AMI_ID']
+HISTORY_KEY_COLUMNS = ['Profile', 'Region', 'InstanceID']
+
+# CSV 컬럼 (다중 계정 버전과 같은 컬럼)
+CSV_COLUMNS = ['Profile', 'InstanceName', 'InstanceID', 'State', 'AMI_ID']
+
+def find_ec2_instances_with_ami(profile_name, ami_id, output_file, history="ami-usage"):
     """
     특정 AMI ID를 사용하는 EC2 인스턴스를 단일 AWS 계정에서 검색합니다.
     
@@ -11,48 +24,94 @@ def find_ec2_instances_with_ami(profile_name, ami_id, output_file):
         profile_name (str): AWS 프로필명
         ami_id (str): 검색할 AMI ID
         output_file (str): 결과를 저장할 CSV 파일명
+        history (str): 결과를 저장할 보고서 이력 이름 (None이면 저장하지 않음, CSV에 없는 인스턴스 ID/상태도 저장)
     """
     try:
-        # AWS 세션 초기화
-        session = boto3.Session(profile_name=profile_name)
-        ec2_client = session.client('ec2')
+        # 공유 클라이언트 풀에서 EC2 클라이언트 획득
+        ec2_client = get_client('ec2', profile_name)
 
         print(f"[INFO] AWS 프로필 '{profile_name}' 로드 성공")
         print("[INFO] EC2 인스턴스를 검색하는 중...")
 
-        # 모든 EC2 인스턴스 검색 (모든 상태 포함)
-        instances = ec2_client.describe_instances()
+        # image-id 필터로 지정된 AMI ID를 사용하는 인스턴스만 조회 (모든 상태 포함)
+        # (검색 중 오류가 나면 일부 인스턴스만 있는 이력이 남지 않도록 with 블록을 벗어날 때 저장하지 않고 정리)
+        matching_instances = []
+        with ReportHistory(history, HISTORY_COLUMNS, HISTORY_KEY_COLUMNS,
+                           query={**target_query([profile_name]), "ami_ids": [ami_id]}) as report_history:
+            for instance in find_instances_by_image(ec2_client, [ami_id])[ami_id]:
+                # 매칭된 인스턴스 정보 저장
+                matching_instances.append({
+                    'InstanceName': instance['Name'] or 'N/A',
+                    'AMI_ID': instance['ImageId']
+                })
+                report_history.add([profile_name, None, instance['Name'] or 'N/A', instance['InstanceId'],
+                                    instance['State'], instance['ImageId']])
+
+            # 결과 출력
+            if matching_instances:
+                print(f"[INFO] 총 {len(matching_instances)}개의 인스턴스가 발견되었습니다.")
+            else:
+                print("[INFO] 해당 AMI ID를 사용하는 인스턴스를 찾을 수 없습니다.")
+
+            # 결과를 CSV 파일로 저장
+            with open(output_file, mode='w', newline='', encoding='utf-8') as file:
+                writer = csv.DictWriter(file, fieldnames=['InstanceName', 'AMI_ID'])
+                writer.writeheader()
+                writer.writerows(matching_instances)
+
+        print(f"[INFO] 결과가 '{output_file}' 파일에 저장되었습니다.")
+
+    except (NoCredentialsError, PartialCredentialsError):
+        print("[ERROR] AWS 인증 정보를 찾을 수 없습니다.")
+    except Exception as e:
+        print(f"[ERROR] 오류 발생: {str(e)}")
 
-        # 지정된 AMI ID를 사용하는 인스턴스 필터링
+def find_ec2_instances_with_amis(profile_name, ami_ids, output_file, history="ami-usage"):
+    """
+    여러 AMI ID를 사용하는 EC2 인스턴스를 단일 AWS 계정에서 한 번의 조회로 검색합니다.
+    결과는 다중 계정 버전과 같은 컬럼의 CSV 하나로 저장합니다.
+    
+    Args:
+        profile_name (str): AWS 프로필명
+        ami_ids (list): 검색할 AMI ID 리스트
+        output_file (str): 결과를 저장할 CSV 파일명
+        history (str): 결과를 저장할 보고서 이력 이름 (None이면 저장하지 않음, snapshot/diff_reports.py로 비교)
+    """
+    try:
+        # 공유 클라이언트 풀에서 EC2 클라이언트 획득
+        ec2_client = get_client('ec2', profile_name)
+
+        print(f"[INFO] AWS 프로필 '{profile_name}' 로드 성공")
+        print(f"[INFO] {len(ami_ids)}개 AMI를 사용하는 EC2 인스턴스를 검색하는 중...")
+
+        # AMI 개수와 관계없이 계정당 한 번의 페이지네이션 조회로 AMI별 인스턴스 검색 (모든 상태 포함)
         matching_instances = []
-        for reservation in instances['Reservations']:
-            for instance in reservation['Instances']:
-                if instance.get('ImageId') == ami_id:
-                    instance_name = None
-                    # 태그에서 Name 태그 추출
-                    if 'Tags' in instance:
-                        for tag in instance['Tags']:
-                            if tag['Key'] == 'Name':
-                                instance_name = tag['Value']
-                                break
-                    # 매칭된 인스턴스 정보 저장
-                    matching_instances.append({
-                        'InstanceName': instance_name or 'N/A',
-                        'AMI_ID': instance['ImageId']
-                    })
-        
-        # 결과 출력
-        if matching_instances:
-            print(f"[INFO] 총 {len(matching_instances)}개의 인스턴스가 발견되었습니다.")
-        else:
-            print("[INFO] 해당 AMI ID를 사용하는 인스턴스를 찾을 수 없습니다.")
+        for ami_id, instances in find_instances_by_image(ec2_client, ami_ids).items():
+            print(f"[INFO] {ami_id}: {len(instances)}개")
+            for instance in instances:
+                matching_instances.append({
+                    'Profile': profile_name,
+                    'InstanceName': instance['Name'] or 'N/A',
+                    'InstanceID': instance['InstanceId'],
+                    'State': instance['State'],
+                    'AMI_ID': instance['ImageId']
+                })
+
+        print(f"[INFO] 총 {len(matching_instances)}개의 인스턴스가 발견되었습니다.")
 
         # 결과를 CSV 파일로 저장
         with open(output_file, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=['InstanceName', 'AMI_ID'])
+            writer = csv.DictWriter(file, fieldnames=CSV_COLUMNS)
             writer.writeheader()
             writer.writerows(matching_instances)
 
+        # 보고서 이력 저장 (키 순서로 정렬하여 저장, 검색 대상 프로필과 AMI 목록이 같은 이력끼리 비교)
+        report_history = ReportHistory(history, HISTORY_COLUMNS, HISTORY_KEY_COLUMNS,
+                                       query={**target_query([profile_name]), "ami_ids": sorted(set(ami_ids))})
+        for instance in matching_instances:
+            report_history.add(instance)
+        report_history.close()
+
         print(f"[INFO] 결과가 '{output_file}' 파일에 저장되었습니다.")
 
     except (NoCredentialsError, PartialCredentialsError):
@@ -63,8 +122,13 @@ def find_ec2_instances_with_ami(profile_name, ami_id, output_file):
 if __name__ == "__main__":
     # 사용자로부터 입력 받기
     aws_profile = input("AWS Profile Name: ").strip()
-    ami_id = input("AMI ID: ").strip()
+    ami_ids = parse_image_ids(input("AMI ID (쉼표로 구분 또는 AMI ID 목록 파일 경로): ").strip())
     output_csv = input("Output CSV File Name (default: output.csv): ").strip() or "output.csv"
 
-    # AMI 검색 실행
-    find_ec2_instances_with_ami(aws_profile, ami_id, output_csv)
\ No newline at end of file
+    # AMI 검색 실행 (여러 AMI는 일괄 검색)
+    if not ami_ids:
+        print("[ERROR] AMI ID가 비어 있습니다.")
+    elif len(ami_ids) == 1:
+        find_ec2_instances_with_ami(aws_profile, ami_ids[0], output_csv)
+    else:
+        find_ec2_instances_with_amis(aws_profile, ami_ids, output_csv)
\ No newline at end of file
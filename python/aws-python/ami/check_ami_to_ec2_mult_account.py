@@ -1,67 +1,110 @@
-import boto3
 import csv
+import os
+import sys
 from botocore.exceptions import NoCredentialsError, PartialCredentialsError
 
-def find_ec2_instances_with_ami(profiles, ami_id, output_file):
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.account_broker import target_profiles
+from common.aws_session import get_client
+from common.ec2_inventory import find_instances_by_image, parse_image_ids
+from common.fanout import fan_out
+from common.report_history import ReportHistory, target_query
+
+def search_account_instances(profile_name, ami_id, region_name=None, snapshot=None):
+    """
+    단일 AWS 계정/리전에서 특정 AMI ID(또는 여러 AMI ID)를 사용하는 EC2 인스턴스를 검색합니다.
+    AMI 개수와 관계없이 한 번의 페이지네이션 조회로 검색합니다.
+    
+    Args:
+        profile_name (str): AWS 프로필명
+        ami_id (str | list): 검색할 AMI ID 또는 AMI ID 리스트
+        region_name (str): AWS 리전명 (None이면 프로필 기본 리전 사용)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 검색)
+    
+    Returns:
+        list: 매칭된 인스턴스 정보 딕셔너리 리스트 (AMI ID 입력 순서)
     """
-    특정 AMI ID를 사용하는 EC2 인스턴스를 여러 AWS 계정에서 검색합니다.
+    ami_ids = [ami_id] if isinstance(ami_id, str) else ami_id
+
+    if snapshot is not None:
+        instance_index = snapshot.find_instances_by_image(profile_name, region_name, ami_ids)
+    else:
+        # 공유 클라이언트 풀에서 EC2 클라이언트 획득
+        ec2_client = get_client('ec2', profile_name, region_name)
+        # image-id 필터(또는 AMI가 많으면 전체 조회 역색인)로 지정된 AMI를 사용하는 인스턴스 검색 (모든 상태 포함)
+        instance_index = find_instances_by_image(ec2_client, ami_ids)
+
+    matching_instances = []
+    for instances in instance_index.values():
+        for instance in instances:
+            # 매칭된 인스턴스 정보 저장 (상세 정보 포함)
+            matching_instances.append({
+                'Profile': profile_name,
+                'InstanceName': instance['Name'] or 'N/A',
+                'InstanceID': instance['InstanceId'],
+                'State': instance['State'],  # 인스턴스 상태 추가
+                'AMI_ID': instance['ImageId']
+            })
+    return matching_instances
+
+def find_ec2_instances_with_ami(profiles, ami_id, output_file, regions=None, max_workers=8, timeout=None, snapshot=None,
+                                history="ami-usage"):
+    """
+    특정 AMI ID(또는 여러 AMI ID)를 사용하는 EC2 인스턴스를 여러 AWS 계정에서 검색합니다.
     v2 버전: 인스턴스 ID와 상태 정보 추가
+    (계정, 리전)별 검색은 병렬로 수행되며, 결과는 입력 순서대로 출력됩니다.
+    여러 AMI를 지정해도 (계정, 리전)당 한 번만 조회하며, 결과는 CSV 하나로 저장합니다.
     
     Args:
         profiles (list): AWS 프로필명 리스트
-        ami_id (str): 검색할 AMI ID
+        ami_id (str | list): 검색할 AMI ID 또는 AMI ID 리스트
         output_file (str): 결과를 저장할 CSV 파일명
+        regions (list): 검색할 AWS 리전 목록 (None이면 프로필 기본 리전만 검색)
+        max_workers (int): 최대 동시 검색 수 (기본값: 8)
+        timeout (float): (계정, 리전)별 검색 제한 시간(초) (None이면 무제한)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 검색)
+        history (str): 결과를 저장할 보고서 이력 이름 (None이면 저장하지 않음, snapshot/diff_reports.py로 비교)
     """
     all_matching_instances = []
+    regions = regions or [None]
+    # 검색 대상(프로필, 리전)과 AMI 목록이 같은 이력끼리 비교 (다른 AMI를 검색한 실행이 대량 추가/삭제로 보이지 않도록)
+    # 이력은 리전별로 조회 실패 범위를 구분하도록 Region 컬럼을 추가하여 (프로필, 리전, 인스턴스 ID) 순서로 저장
+    report_history = ReportHistory(history, ['Profile', 'Region', 'InstanceName', 'InstanceID', 'State', 'AMI_ID'],
+                                   ['Profile', 'Region', 'InstanceID'],
+                                   query={**target_query(profiles, regions),
+                                          "ami_ids": sorted(set([ami_id] if isinstance(ami_id, str) else ami_id))})
+    targets = [(profile_name, ami_id, region_name, snapshot) for profile_name in profiles for region_name in regions]
 
-    # 각 프로필별로 순차 처리
-    for profile_name in profiles:
-        try:
-            print(f"\n[INFO] '{profile_name}' 프로필로 작업 시작...")
-            
-            # AWS 세션 초기화
-            session = boto3.Session(profile_name=profile_name)
-            ec2_client = session.client('ec2')
-
-            print("[INFO] EC2 인스턴스를 검색하는 중...")
-
-            # 모든 EC2 인스턴스 검색 (모든 상태 포함)
-            instances = ec2_client.describe_instances()
+    # (계정, 리전)별 병렬 검색 후 입력 순서대로 결과 처리
+    for target_result in fan_out(search_account_instances, targets, max_workers, timeout):
+        profile_name, _, region_name, _ = target_result.target
+        region_label = f" ({region_name})" if region_name else ""
+        print(f"\n[INFO] '{profile_name}' 프로필{region_label} 검색 결과")
 
-            # 지정된 AMI ID를 사용하는 인스턴스 필터링
-            matching_instances = []
-            for reservation in instances['Reservations']:
-                for instance in reservation['Instances']:
-                    if instance.get('ImageId') == ami_id:
-                        instance_name = None
-                        # 태그에서 Name 태그 추출
-                        if 'Tags' in instance:
-                            for tag in instance['Tags']:
-                                if tag['Key'] == 'Name':
-                                    instance_name = tag['Value']
-                                    break
-                        # 매칭된 인스턴스 정보 저장 (상세 정보 포함)
-                        matching_instances.append({
-                            'Profile': profile_name,
-                            'InstanceName': instance_name or 'N/A',
-                            'InstanceID': instance['InstanceId'],
-                            'State': instance['State']['Name'],  # 인스턴스 상태 추가
-                            'AMI_ID': instance['ImageId']
-                        })
+        # (프로필, 리전)별 오류는 해당 대상만 건너뛰고 계속 진행 (이력 비교에서도 해당 리전만 제외)
+        if isinstance(target_result.error, (NoCredentialsError, PartialCredentialsError)):
+            print(f"[ERROR] '{profile_name}' 프로필의 인증 정보를 찾을 수 없습니다.")
+            report_history.mark_incomplete(profile_name, region_name)
+            continue
+        if target_result.error:
+            print(f"[ERROR] '{profile_name}' 프로필에서 오류 발생: {str(target_result.error)}")
+            report_history.mark_incomplete(profile_name, region_name)
+            continue
 
-            # 프로필별 진행 상태 출력
-            if matching_instances:
-                print(f"[INFO] {len(matching_instances)}개의 인스턴스 발견.")
-            else:
-                print("[INFO] 해당 AMI ID를 사용하는 인스턴스가 없습니다.")
+        matching_instances = target_result.result
 
-            # 전체 결과 리스트에 추가
-            all_matching_instances.extend(matching_instances)
+        # 프로필별 진행 상태 출력
+        if matching_instances:
+            print(f"[INFO] {len(matching_instances)}개의 인스턴스 발견.")
+        else:
+            print("[INFO] 해당 AMI ID를 사용하는 인스턴스가 없습니다.")
 
-        except (NoCredentialsError, PartialCredentialsError):
-            print(f"[ERROR] '{profile_name}' 프로필의 인증 정보를 찾을 수 없습니다.")
-        except Exception as e:
-            print(f"[ERROR] '{profile_name}' 프로필에서 오류 발생: {str(e)}")
+        # 전체 결과 리스트에 추가
+        all_matching_instances.extend(matching_instances)
+        for instance in matching_instances:
+            report_history.add(dict(instance, Region=region_name))
+    report_history.close()
 
     # 모든 프로필의 결과를 CSV 파일에 저장
     try:
@@ -76,14 +119,19 @@ def find_ec2_instances_with_ami(profiles, ami_id, output_file):
 
 if __name__ == "__main__":
     # 사용자로부터 입력 받기
-    profiles = input("AWS Profile Names (쉼표로 구분): ").strip().split(',')
-    profiles = [p.strip() for p in profiles if p.strip()]  # 공백 제거 및 빈 항목 제거
-    ami_id = input("AMI ID: ").strip()
+    # (AWS_ACCOUNT_SOURCE 환경변수가 있으면 프로필 입력 대신 Organizations/계정 파일의 계정에 AssumeRole 하여 사용)
+    profiles = list(target_profiles({}))
+    if not profiles:
+        profiles = input("AWS Profile Names (쉼표로 구분): ").strip().split(',')
+        profiles = [p.strip() for p in profiles if p.strip()]  # 공백 제거 및 빈 항목 제거
+    ami_ids = parse_image_ids(input("AMI ID (쉼표로 구분 또는 AMI ID 목록 파일 경로): ").strip())
     output_csv = input("Output CSV File Name (default: output.csv): ").strip() or "output.csv"
 
     # 입력 검증
     if not profiles:
         print("[ERROR] 프로파일 목록이 비어 있습니다.")
+    elif not ami_ids:
+        print("[ERROR] AMI ID가 비어 있습니다.")
     else:
-        # 다중 계정 AMI 검색 실행 (상세 정보 포함)
-        find_ec2_instances_with_ami(profiles, ami_id, output_csv)
\ No newline at end of file
+        # 다중 계정 AMI 검색 실행 (상세 정보 포함, 여러 AMI는 일괄 검색)
+        find_ec2_instances_with_ami(profiles, ami_ids, output_csv)
\ No newline at end of file
@@ -1,14 +1,170 @@
-import boto3
 import csv
 from collections import defaultdict
+import os
+import sys
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.account_broker import target_profiles
+from common.ami_cache import get_images
+from common.aws_session import get_client
+from common.ec2_inventory import iter_instances, scan_instances
+from common.os_classifier import CLASSIFIER_KEY, OsTierStats, classify_os, refine_os
+from common.fanout import fan_out
+from common.inventory_snapshot import InventorySnapshot
+from common.report_history import ReportHistory, target_query
+
+# tag-key/tag-value 필터 하나에 넣는 값(대소문자 조합, 와일드카드 패턴) 최대 개수 (EC2 필터 값 개수 제한)
+CASE_VARIANTS_LIMIT = 200
+
+def _escape_filter_value(text):
+    # EC2 필터 값의 와일드카드 문자(*, ?)와 이스케이프 문자(\)를 문자 그대로 비교하도록 이스케이프
+    return "".join("\\" + char if char in "*?\\" else char for char in text)
+
+def _case_variants(text, limit=CASE_VARIANTS_LIMIT):
+    """
+    대소문자 구분 없는 비교 대상 문자열의 모든 대소문자 조합을 EC2 필터 값 목록으로 만듭니다.
+    (예: "APM" -> ["apm", "apM", ..., "APM"] 8개, "true" -> 16개)
+    조합 수가 limit을 넘거나 ASCII 외의 대소문자 문자가 있으면 None을 반환합니다.
+    
+    Args:
+        text (str): 소문자 태그 키 또는 값
+        limit (int): 최대 조합 수
+    
+    Returns:
+        list: tag-key/tag-value 필터 값 리스트 (또는 None)
+    """
+    variants = [""]
+    for char in text:
+        if char.lower() == char.upper():
+            cases = (char,)
+        elif char.isascii():
+            cases = (char.lower(), char.upper())
+        else:
+            return None
+        if len(variants) * len(cases) > limit:
+            return None
+        variants = [variant + case for variant in variants for case in cases]
+    return [_escape_filter_value(variant) for variant in variants]
+
+def _wildcard_pattern(text):
+    """
+    대소문자 구분 없는 비교 대상 문자열을 EC2 필터 와일드카드 패턴으로 변환합니다.
+    EC2 필터 값은 대소문자를 구분하므로, 대소문자가 있는 문자(및 ASCII 외 문자)는 '?'로 바꾸어
+    모든 대소문자 조합을 포함하는 상위 집합 패턴을 만듭니다. (예: "APM" -> "???", "project01" -> "???????01")
+    선택도가 낮으므로 대소문자 조합(여러 조건의 합계 포함)이 CASE_VARIANTS_LIMIT을 넘는 긴 문자열에만 사용합니다.
+    
+    Args:
+        text (str): 태그 키 또는 값
+    
+    Returns:
+        str: tag-key/tag-value 필터 패턴
+    """
+    pattern = []
+    for char in text:
+        if not char.isascii() or char.lower() != char.upper():
+            pattern.append("?")
+        elif char in "*?\\":
+            pattern.append("\\" + char)
+        else:
+            pattern.append(char)
+    # 빈 값은 모든 값과 일치하는 패턴으로 조회 후 클라이언트에서 확인
+    return "".join(pattern) or "*"
+
+def _tag_filter_values(texts, limit=CASE_VARIANTS_LIMIT):
+    """
+    여러 태그 키(또는 값)의 대소문자 조합을 합쳐 tag-key(또는 tag-value) 필터 값 하나로 만듭니다.
+    합계가 limit을 넘으면 조합이 가장 많은 문자열부터 와일드카드 패턴 하나로 바꿉니다.
+    (빈 문자열은 모든 값과 일치하는 패턴으로 조회 후 클라이언트에서 확인)
+    
+    Args:
+        texts (iterable): 소문자 태그 키 또는 값 목록
+        limit (int): 필터 값 최대 개수
+    
+    Returns:
+        list: 필터 값 리스트 (와일드카드 패턴으로 바꾸어도 limit을 넘으면 None)
+    """
+    values = {text: (text and _case_variants(text, limit)) or [_wildcard_pattern(text)] for text in sorted(set(texts))}
+    while sum(len(variants) for variants in values.values()) > limit:
+        text = max(values, key=lambda text: len(values[text]))
+        if len(values[text]) == 1:
+            return None
+        values[text] = [_wildcard_pattern(text)]
+    return list(dict.fromkeys(value for variants in values.values() for value in variants))
+
+def plan_instance_query(keyword_filter=None, tag_filters=None):
+    """
+    필터 조건을 API로 넘길 수 있는 부분과 클라이언트에서 확인할 부분으로 나누는 조회 계획을 만듭니다.
+    - 키워드 조건이 있으면 (인스턴스명 또는 AMI명 OR 조건) 서버 필터로 표현할 수 없으므로 전체 조회
+    - 태그 조건만 있으면 태그 조건(OR)을 tag-key/tag-value 필터로 상태별 조회에 함께 넘겨 대상 인스턴스만 조회
+    - 조건이 없으면 지정된 상태의 전체 조회
+    
+    Args:
+        keyword_filter (str): 검색할 키워드
+        tag_filters (list): 태그 필터 리스트
+    
+    Returns:
+        list: 태그 조건 (소문자 키, 소문자 값) 튜플 리스트 (None이면 전체 조회)
+    """
+    if keyword_filter or not tag_filters:
+        return None
+    return list(dict.fromkeys((tag_filter["key"].lower(), tag_filter["value"].lower()) for tag_filter in tag_filters))
+
+def tag_pushdown_filters(tag_conditions):
+    """
+    태그 조건(OR)을 describe_instances 한 번에 넘길 tag-key/tag-value 필터로 변환합니다.
+    모든 조건의 키 조합을 tag-key 하나에, 값 조합을 tag-value 하나에 합치므로 결과는 조건들의 상위 집합이며
+    (다른 조건의 키/값이 섞여 일치하거나, 키와 값이 서로 다른 태그에서 일치할 수 있음)
+    대소문자 구분 없는 키-값 비교는 호출자가 다시 확인합니다.
+    상태별 전체 조회에 필터만 더하는 한 번의 조회이므로 조건이 넓어도 호출 수가 전체 조회보다 많아지지 않습니다.
+    
+    Args:
+        tag_conditions (list): (소문자 키, 소문자 값) 튜플 리스트
+    
+    Returns:
+        list: describe_instances Filters (필터 값 개수 제한을 넘으면 None, 상태별 전체 조회)
+    """
+    keys = _tag_filter_values(tag_key for tag_key, _ in tag_conditions)
+    values = _tag_filter_values(tag_value for _, tag_value in tag_conditions)
+    if keys is None or values is None:
+        return None
+    return [{"Name": "tag-key", "Values": keys}, {"Name": "tag-value", "Values": values}]
+
+def iter_planned_instances(ec2, instance_states, keyword_filter=None, tag_filters=None, history_key=None):
+    """
+    조회 계획에 따라 인스턴스 레코드를 반환합니다.
+    태그 조건만 있으면 상태 필터에 tag-key/tag-value 필터를 더해 한 번에 조회하고,
+    그 외에는 지정된 상태의 인스턴스를 전체 조회합니다. (나머지 조건은 호출자가 확인)
+    
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        instance_states (list): 조회할 인스턴스 상태 리스트
+        keyword_filter (str): 검색할 키워드
+        tag_filters (list): 태그 필터 리스트
+        history_key (str): 전체 조회를 분할 병렬 조회할 때의 분할 이력 키 (EC2_SCAN_PARTITIONS 설정 시)
+    
+    Yields:
+        dict: to_instance_record 형태의 인스턴스 레코드
+    """
+    state_filter = {"Name": "instance-state-name", "Values": instance_states}
+    tag_conditions = plan_instance_query(keyword_filter, tag_filters)
+    tag_filters = tag_pushdown_filters(tag_conditions) if tag_conditions is not None else None
+    if tag_filters is None:
+        yield from scan_instances(ec2, [state_filter], history_key)
+        return
+    
+    yield from iter_instances(ec2, [state_filter] + tag_filters)
 
 def get_ec2_instances(profile_name, account_name, region_name="ap-northeast-2", 
-                     keyword_filter=None, tag_filters=None, instance_states=None):
+                     keyword_filter=None, tag_filters=None, instance_states=None, snapshot=None,
+                     ami_names=True, stats=None):
     """
     특정 조건에 맞는 EC2 인스턴스를 필터링하여 조회합니다.
     - 키워드 기반 인스턴스 (이름 또는 AMI 이름에 키워드 포함)
     - 태그 기반 인스턴스 (지정된 태그 키-값 쌍)
     - 조건이 없으면 모든 인스턴스 조회
+    OS는 인스턴스 필드(Platform, PlatformDetails, UsageOperation)로 먼저 판별하며, ami_names가 False이고
+    키워드 조건이 없으면 인스턴스 필드로 판별되지 않은 Linux/UNIX 인스턴스의 AMI만 조회합니다.
     
     Args:
         profile_name (str): AWS 프로필명
@@ -17,6 +173,9 @@ def get_ec2_instances(profile_name, account_name, region_name="ap-northeast-2",
         keyword_filter (str): 검색할 키워드 (None이면 키워드 필터링 안함)
         tag_filters (list): 태그 필터 리스트 (None이면 태그 필터링 안함)
         instance_states (list): 조회할 인스턴스 상태 리스트 (기본값: ["running"])
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 조회)
+        ami_names (bool): 모든 인스턴스의 AMI 이름 조회 여부 (False면 AMI를 조회하지 않은 인스턴스의 AMI Name은 '-')
+        stats (OsTierStats): 판별 단계별 AMI 조회 생략 집계 (None이면 집계하지 않음)
     
     Returns:
         list: 필터링된 인스턴스 정보 리스트
@@ -25,275 +184,181 @@ def get_ec2_instances(profile_name, account_name, region_name="ap-northeast-2",
     if instance_states is None:
         instance_states = ["running"]
     
-    # AWS 세션 및 EC2 클라이언트 초기화
-    session = boto3.Session(profile_name=profile_name)
-    ec2 = session.client("ec2", region_name=region_name)
-    
-    # 지정된 상태의 인스턴스만 조회
-    response = ec2.describe_instances(Filters=[{"Name": "instance-state-name", "Values": instance_states}])
-    
     instances = []
+    instance_records = []  # (인스턴스 레코드, 인스턴스 필드로 판별한 OS 타입)
     image_ids = set()
+    stats = stats if stats is not None else OsTierStats()
+    # 키워드는 AMI 이름과도 비교하므로 키워드 조건이 있으면 모든 AMI 조회
+    ami_names = ami_names or bool(keyword_filter)
+    
+    # 조회 계획에 따라 (태그 조건만 있으면 해당 인스턴스만) 스트리밍하며 경량 레코드와 조회할 AMI ID를 단일 패스로 수집
+    # (스냅샷 조회 시에는 상태 조건만 적용하고 나머지 조건은 아래에서 동일하게 확인)
+    if snapshot is not None:
+        records = snapshot.iter_instances(profile_name, region_name, instance_states)
+    else:
+        # 공유 클라이언트 풀에서 EC2 클라이언트 획득
+        ec2 = get_client("ec2", profile_name, region_name)
+        records = iter_planned_instances(ec2, instance_states, keyword_filter, tag_filters,
+                                         f"{profile_name}|{region_name}")
+    for record in records:
+        os_type = stats.classify(record)
+        instance_records.append((record, os_type))
+        if os_type is None or ami_names:
+            image_ids.add(record["ImageId"])
     
-    # 모든 인스턴스에서 사용 중인 AMI ID 수집
-    for reservation in response["Reservations"]:
-        for instance in reservation["Instances"]:
-            image_ids.add(instance["ImageId"])
+    # 조회된 인스턴스가 없으면 AMI 조회 생략 (빈 ImageIds는 전체 AMI 조회가 되므로)
+    if not instance_records:
+        return instances
     
-    # AMI 정보를 배치로 조회하여 API 호출 최적화
-    image_details = ec2.describe_images(ImageIds=list(image_ids))
     image_os_map = {}
     image_name_map = {}
     
-    def determine_os_type(image):
-        """
-        AMI 정보를 기반으로 OS 타입을 더 정확하게 판별합니다.
-        AMI 설명에서 OS 버전 정보도 추출합니다.
-        
-        Args:
-            image (dict): AMI 이미지 정보
-            
-        Returns:
-            str: OS 타입
-        """
-        # 기본 정보 추출
-        name = image.get("Name", "").lower()
-        description = image.get("Description", "").lower()
-        platform = image.get("Platform", "").lower()
-        platform_details = image.get("PlatformDetails", "").lower()
-        architecture = image.get("Architecture", "").lower()
-        virtualization_type = image.get("VirtualizationType", "").lower()
-        
-        # AMI 설명에서 OS 정보 추출 함수
-        def extract_os_from_description(desc):
-            """
-            AMI 설명에서 OS 정보를 추출합니다.
-            예: "base-image:GI-amazonlinux2023-arm-V20240819-CyberArk..."
-            """
-            # Amazon Linux 패턴 검사 (al2023, EKS 노드 패턴 추가)
-            if any(pattern in desc for pattern in ["amazonlinux2023", "amazon-linux-2023", "al2023"]):
-                return "Amazon Linux 2023"
-            elif "amazonlinux2" in desc or "amazon-linux-2" in desc:
-                return "Amazon Linux 2"
-            elif "amazonlinux" in desc or "amazon-linux" in desc:
-                # 버전 번호가 없으면 Amazon Linux 1로 추정
-                return "Amazon Linux 1"
-            
-            # Ubuntu 패턴 검사
-            ubuntu_patterns = [
-                ("ubuntu-22.04", "Ubuntu 22.04 LTS"),
-                ("ubuntu22.04", "Ubuntu 22.04 LTS"),
-                ("ubuntu-jammy", "Ubuntu 22.04 LTS"),
-                ("ubuntu-20.04", "Ubuntu 20.04 LTS"),
-                ("ubuntu20.04", "Ubuntu 20.04 LTS"),
-                ("ubuntu-focal", "Ubuntu 20.04 LTS"),
-                ("ubuntu-18.04", "Ubuntu 18.04 LTS"),
-                ("ubuntu18.04", "Ubuntu 18.04 LTS"),
-                ("ubuntu-bionic", "Ubuntu 18.04 LTS"),
-                ("ubuntu", "Ubuntu")
-            ]
-            
-            for pattern, os_name in ubuntu_patterns:
-                if pattern in desc:
-                    return os_name
-            
-            # CentOS 패턴 검사
-            centos_patterns = [
-                ("centos-8", "CentOS 8"),
-                ("centos8", "CentOS 8"),
-                ("centos-7", "CentOS 7"),
-                ("centos7", "CentOS 7"),
-                ("centos-6", "CentOS 6"),
-                ("centos6", "CentOS 6"),
-                ("centos", "CentOS")
-            ]
-            
-            for pattern, os_name in centos_patterns:
-                if pattern in desc:
-                    return os_name
-            
-            # RHEL 패턴 검사
-            rhel_patterns = [
-                ("rhel-9", "Red Hat Enterprise Linux 9"),
-                ("rhel9", "Red Hat Enterprise Linux 9"),
-                ("rhel-8", "Red Hat Enterprise Linux 8"),
-                ("rhel8", "Red Hat Enterprise Linux 8"),
-                ("rhel-7", "Red Hat Enterprise Linux 7"),
-                ("rhel7", "Red Hat Enterprise Linux 7"),
-                ("red-hat", "Red Hat Enterprise Linux"),
-                ("rhel", "Red Hat Enterprise Linux")
-            ]
-            
-            for pattern, os_name in rhel_patterns:
-                if pattern in desc:
-                    return os_name
-            
-            # Debian 패턴 검사
-            debian_patterns = [
-                ("debian-12", "Debian 12"),
-                ("debian12", "Debian 12"),
-                ("debian-11", "Debian 11"),
-                ("debian11", "Debian 11"),
-                ("debian-10", "Debian 10"),
-                ("debian10", "Debian 10"),
-                ("debian", "Debian")
-            ]
-            
-            for pattern, os_name in debian_patterns:
-                if pattern in desc:
-                    return os_name
-            
-            # Windows 패턴 검사
-            if any(pattern in desc for pattern in ["windows-2022", "windows2022", "win2022"]):
-                return "Windows Server 2022"
-            elif any(pattern in desc for pattern in ["windows-2019", "windows2019", "win2019"]):
-                return "Windows Server 2019"
-            elif any(pattern in desc for pattern in ["windows-2016", "windows2016", "win2016"]):
-                return "Windows Server 2016"
-            elif any(pattern in desc for pattern in ["windows", "win-"]):
-                return "Windows"
-            
-            return None
-        
-        # AWS에서 제공하는 Platform 필드를 우선 확인 (가장 정확)
-        if platform == "windows":
-            # 설명에서 더 상세한 Windows 버전 찾기
-            desc_os = extract_os_from_description(description)
-            if desc_os and desc_os.startswith("Windows"):
-                return desc_os
-            return "Windows"
-        
-        # AMI 설명에서 OS 정보 추출 시도 (우선순위 높음)
-        desc_os = extract_os_from_description(description)
-        if desc_os:
-            return desc_os
-        
-        # AMI 이름에서 OS 정보 추출 시도
-        desc_os = extract_os_from_description(name)
-        if desc_os:
-            return desc_os
+    # AMI 정보와 OS 분류 결과를 로컬 캐시에서 조회 (캐시에 없는 AMI만 describe_images 호출)
+    # (모든 인스턴스가 인스턴스 필드로 판별되면 AMI 조회 생략, 빈 ImageIds는 전체 AMI 조회가 되므로)
+    stats.record_lookups(image_ids)
+    if not image_ids:
+        images = {}
+    elif snapshot is not None:
+        images = snapshot.get_images(profile_name, region_name, image_ids)
+    else:
+        images = get_images(ec2, image_ids, classify_os, CLASSIFIER_KEY, scope=profile_name or "")
+    
+    # AMI 이름과 설명을 기반으로 OS 타입 분류 및 이름 매핑
+    for image_id, image in images.items():
+        image_name_map[image_id] = image.get("Name") or "Unknown"
+        image_os_map[image_id] = image["OsType"]
+    
+    # 필터링 조건에 맞는 인스턴스 정보 수집
+    for record, instance_os in instance_records:
+        instance_id = record["InstanceId"]
+        image_id = record["ImageId"]
+        instance_type = record["InstanceType"]
+        instance_state = record["State"]  # 인스턴스 상태 추가
+        # 인스턴스 필드 판별 결과가 있어도 같은 계열의 AMI 판별 결과가 있으면 버전이 포함된 값을 사용
+        os_type = refine_os(instance_os, image_os_map.get(image_id)) or "Other"
+        ami_name = image_name_map.get(image_id, "Unknown" if image_id in image_ids else "-")
         
-        # PlatformDetails 필드 확인 (더 상세한 정보)
-        if "windows" in platform_details:
-            return "Windows"
-        elif "linux" in platform_details:
-            # Linux 계열 상세 분류 (EKS 노드 패턴 추가)
-            if any(keyword in name for keyword in ["amzn2-ami", "amazonlinux2", "amazon-linux-2"]):
-                return "Amazon Linux 2"
-            elif any(keyword in name for keyword in ["al2023-ami", "amazon-linux-2023", "amazonlinux2023", "al2023"]):
-                return "Amazon Linux 2023"
-            elif any(keyword in name for keyword in ["al2-ami", "amazon-linux-ami"]):
-                return "Amazon Linux 1"
-            elif any(keyword in name for keyword in ["ubuntu"]):
-                # Ubuntu 버전 상세 분류
-                if "22.04" in name or "jammy" in name:
-                    return "Ubuntu 22.04 LTS"
-                elif "20.04" in name or "focal" in name:
-                    return "Ubuntu 20.04 LTS"
-                elif "18.04" in name or "bionic" in name:
-                    return "Ubuntu 18.04 LTS"
-                else:
-                    return "Ubuntu"
-            elif any(keyword in name for keyword in ["centos"]):
-                return "CentOS"
-            elif any(keyword in name for keyword in ["rhel", "red-hat"]):
-                return "Red Hat Enterprise Linux"
-            elif any(keyword in name for keyword in ["debian"]):
-                return "Debian"
-            elif any(keyword in name for keyword in ["suse", "sles"]):
-                return "SUSE Linux"
-            elif any(keyword in name for keyword in ["alpine"]):
-                return "Alpine Linux"
-            else:
-                return "Linux (Other)"
+        # 태그를 소문자로 변환하여 매핑
+        tags = {key.lower(): value.lower() for key, value in record["Tags"].items()}
+        instance_name = tags.get("name", "N/A")
         
-        # 이름과 설명 기반 분류 (Platform 정보가 없는 경우)
-        if any(keyword in name or keyword in description for keyword in ["windows", "win-"]):
-            return "Windows"
-        elif any(keyword in name for keyword in ["amzn2-ami", "amazonlinux2", "amazon-linux-2"]):
-            return "Amazon Linux 2"
-        elif any(keyword in name for keyword in ["al2023-ami", "amazon-linux-2023", "amazonlinux2023", "al2023"]):
-            return "Amazon Linux 2023"
-        elif any(keyword in name for keyword in ["al2-ami", "amazon-linux-ami"]):
-            return "Amazon Linux 1"
-        elif "ubuntu" in name:
-            if "22.04" in name or "jammy" in name:
-                return "Ubuntu 22.04 LTS"
-            elif "20.04" in name or "focal" in name:
-                return "Ubuntu 20.04 LTS"
-            elif "18.04" in name or "bionic" in name:
-                return "Ubuntu 18.04 LTS"
-            else:
-                return "Ubuntu"
-        elif "centos" in name:
-            return "CentOS"
-        elif any(keyword in name for keyword in ["rhel", "red-hat"]):
-            return "Red Hat Enterprise Linux"
-        elif "debian" in name:
-            return "Debian"
-        elif any(keyword in name for keyword in ["suse", "sles"]):
-            return "SUSE Linux"
-        elif "alpine" in name:
-            return "Alpine Linux"
-        elif any(keyword in name for keyword in ["freebsd"]):
-            return "FreeBSD"
-        elif any(keyword in name for keyword in ["openbsd"]):
-            return "OpenBSD"
-        elif any(keyword in name for keyword in ["netbsd"]):
-            return "NetBSD"
+        # 필터링 로직 개선: 조건이 없으면 모든 인스턴스 포함
+        should_include = False
         
-        # 기본적으로 Linux 계열로 추정 (대부분의 EC2 인스턴스가 Linux)
-        if platform_details and "linux" not in platform_details and platform != "windows":
-            return "Unknown"
+        # 키워드와 태그 필터가 모두 없으면 모든 인스턴스 포함
+        if keyword_filter is None and (tag_filters is None or len(tag_filters) == 0):
+            should_include = True
+        else:
+            # 필터링 조건 1: 키워드 기반 필터링 (키워드가 지정된 경우만)
+            if keyword_filter and (keyword_filter.lower() in instance_name.lower() or 
+                                 keyword_filter.lower() in ami_name.lower()):
+                should_include = True
+            
+            # 필터링 조건 2: 태그 기반 필터링 (태그 필터가 지정된 경우만)
+            if tag_filters and not should_include:
+                for tag_filter in tag_filters:
+                    tag_key = tag_filter["key"].lower()
+                    tag_value = tag_filter["value"].lower()
+                    if tags.get(tag_key) == tag_value:
+                        should_include = True
+                        break
         
-        return "Linux (Unknown Distribution)"
+        # 조건을 만족하는 인스턴스만 결과에 추가 (상태 정보 포함)
+        if should_include:
+            instances.append([account_name, instance_id, instance_name, instance_state, os_type, image_id, ami_name, instance_type])
     
-    # AMI 이름과 설명을 기반으로 OS 타입 분류 및 이름 매핑
-    for image in image_details["Images"]:
-        image_id = image["ImageId"]
-        image_name_map[image_id] = image.get("Name", "Unknown")
-        image_os_map[image_id] = determine_os_type(image)
+    return instances
+
+def export_filtered_ec2_list(aws_profiles, regions, keyword_filter=None, tag_filters=None, instance_states=None,
+                             output_file="filtered_ec2_list.csv", max_workers=8, timeout=None, snapshot=None,
+                             ami_names=True, history="ec2-list"):
+    """
+    여러 AWS 계정/리전에서 조건에 맞는 EC2 인스턴스를 병렬로 조회하여 콘솔에 출력하고 CSV로 저장합니다.
+    결과는 입력 순서대로, 각 대상의 조회가 끝나는 즉시 출력 및 저장됩니다.
+
+    Args:
+        aws_profiles (dict): 계정 별칭과 AWS 프로필명의 매핑 딕셔너리
+        regions (list): 조회할 AWS 리전 목록
+        keyword_filter (str): 검색할 키워드 (None이면 키워드 필터링 안함)
+        tag_filters (list): 태그 필터 리스트 (None이면 태그 필터링 안함)
+        instance_states (list): 조회할 인스턴스 상태 리스트 (기본값: ["running"])
+        output_file (str): 결과를 저장할 CSV 파일 경로
+        max_workers (int): 최대 동시 조회 수 (기본값: 8)
+        timeout (float): (계정, 리전)별 조회 제한 시간(초) (None이면 무제한)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 조회)
+        ami_names (bool): 모든 인스턴스의 AMI 이름 조회 여부 (False면 인스턴스 필드로 OS가 판별된 인스턴스의 AMI 조회 생략)
+        history (str): 결과를 저장할 보고서 이력 이름 (None이면 저장하지 않음, snapshot/diff_reports.py로 비교)
+
+    Returns:
+        int: 조회된 인스턴스 수
+    """
+    instance_states = instance_states or ["running"]
+    header = ["Account", "Instance ID", "Instance Name", "State", "OS", "AMI ID", "AMI Name", "Instance Type"]
+    # 보고서 이력은 리전별로 조회 실패 범위를 구분하도록 Region 컬럼을 추가하여 (계정, 리전, 인스턴스 ID) 순서로 저장
+    # AMI Name은 ami_names 설정에 따라 '-'로 출력되므로 변경 비교에서 제외하고,
+    # 대상 프로필/리전과 키워드/태그/상태 조건이 같은 이력끼리만 비교 (조건이 다른 실행이 대량 추가/삭제로 보이지 않도록)
+    report_history = ReportHistory(
+        history, header[:1] + ["Region"] + header[1:], ["Account", "Region", "Instance ID"],
+        ["Instance Name", "State", "OS", "AMI ID", "Instance Type"],
+        query={**target_query(aws_profiles.values(), regions),
+               "keyword": keyword_filter or None,
+               "tags": sorted({(tag_filter["key"].lower(), tag_filter["value"].lower())
+                               for tag_filter in tag_filters or []}),
+               "states": sorted(set(instance_states))})
     
-    # 필터링 조건에 맞는 인스턴스 정보 수집
-    for reservation in response["Reservations"]:
-        for instance in reservation["Instances"]:
-            instance_id = instance["InstanceId"]
-            image_id = instance["ImageId"]
-            instance_type = instance["InstanceType"]
-            instance_state = instance["State"]["Name"]  # 인스턴스 상태 추가
-            os_type = image_os_map.get(image_id, "Other")
-            ami_name = image_name_map.get(image_id, "Unknown")
-            
-            # 태그를 소문자로 변환하여 매핑
-            tags = {tag["Key"].lower(): tag["Value"].lower() for tag in instance.get("Tags", [])}
-            instance_name = tags.get("name", "N/A")
-            
-            # 필터링 로직 개선: 조건이 없으면 모든 인스턴스 포함
-            should_include = False
+    # 필터링 조건 출력
+    print(f"필터링 조건:")
+    print(f"  - 키워드: {keyword_filter if keyword_filter else '모든 키워드'}")
+    print(f"  - 태그 조건: {tag_filters if tag_filters else '모든 태그'}")
+    print(f"  - 인스턴스 상태: {instance_states}")
+    print(f"  - 조회 리전: {regions}")
+    if snapshot is not None:
+        print(f"  - 조회 방식: 인벤토리 스냅샷 ({snapshot.path})")
+    else:
+        tag_conditions = plan_instance_query(keyword_filter, tag_filters)
+        pushed_down = tag_conditions is not None and tag_pushdown_filters(tag_conditions) is not None
+        print(f"  - 조회 방식: {'태그 조건 서버 필터 (tag-key/tag-value)' if pushed_down else '상태별 전체 조회'}")
+    
+    # 조건이 모두 비어있으면 전체 조회 안내
+    if not keyword_filter and not tag_filters:
+        print(f"  ⚠️  필터링 조건이 없어 지정된 상태의 모든 EC2 인스턴스를 조회합니다.")
+    print()
+    
+    with open(output_file, mode="w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        
+        # 콘솔 출력 헤더
+        print("Account | Instance ID | Instance Name | State | OS | AMI ID | AMI Name | Instance Type")
+        print("------------------------------------------------------------------------------------------------")
+        
+        # (계정, 리전)별로 인스턴스를 병렬 조회하고, 입력 순서대로 완료되는 즉시 출력 및 저장
+        total_instances = 0
+        total_stats = OsTierStats()
+        targets = [(profile, alias, region, keyword_filter, tag_filters, instance_states, snapshot, ami_names,
+                    OsTierStats())
+                   for alias, profile in aws_profiles.items() for region in regions]
+        for target_result in fan_out(get_ec2_instances, targets, max_workers, timeout):
+            profile, alias, region = target_result.target[:3]
             
-            # 키워드와 태그 필터가 모두 없으면 모든 인스턴스 포함
-            if keyword_filter is None and (tag_filters is None or len(tag_filters) == 0):
-                should_include = True
-            else:
-                # 필터링 조건 1: 키워드 기반 필터링 (키워드가 지정된 경우만)
-                if keyword_filter and (keyword_filter.lower() in instance_name.lower() or 
-                                     keyword_filter.lower() in ami_name.lower()):
-                    should_include = True
-                
-                # 필터링 조건 2: 태그 기반 필터링 (태그 필터가 지정된 경우만)
-                if tag_filters and not should_include:
-                    for tag_filter in tag_filters:
-                        tag_key = tag_filter["key"].lower()
-                        tag_value = tag_filter["value"].lower()
-                        if tags.get(tag_key) == tag_value:
-                            should_include = True
-                            break
+            # 조회 실패 시 해당 계정/리전만 오류 출력 후 다음 대상 처리
+            if target_result.error:
+                print(f"[ERROR] '{alias}' ({region}) 조회 중 오류 발생: {target_result.error}")
+                report_history.mark_incomplete(alias, region)
+                continue
             
-            # 조건을 만족하는 인스턴스만 결과에 추가 (상태 정보 포함)
-            if should_include:
-                instances.append([account_name, instance_id, instance_name, instance_state, os_type, image_id, ami_name, instance_type])
+            total_stats.merge(target_result.target[8])
+            for instance in target_result.result:
+                print(" | ".join(instance))
+                writer.writerow(instance)
+                report_history.add(instance[:1] + [region] + instance[1:])
+                total_instances += 1
+    report_history.close()
     
-    return instances
+    print(f"\n총 {total_instances}개의 인스턴스가 조회되었습니다.")
+    print(f"[INFO] {total_stats.summary()}")
+    print(f"Output saved to {output_file}")
+    return total_instances
 
 if __name__ == "__main__":
     # ===== 필터링 조건 설정 =====
@@ -325,40 +390,28 @@ if __name__ == "__main__":
         # "aws-alias-name": "profile-name",
         # "aws-alias-name2": "profile-name2",
     }
-    region = "ap-northeast-2"
+    # AWS_ACCOUNT_SOURCE 환경변수(organizations 또는 계정 파일)가 있으면 위 목록 대신 조회한 계정에 AssumeRole 하여 사용
+    # (이 스크립트는 {별칭: 프로필명} 형태를 사용)
+    aws_profiles = {alias: profile for profile, alias in target_profiles(
+        {profile: alias for alias, profile in aws_profiles.items()}).items()}
+    # 조회할 AWS 리전 목록
+    regions = ["ap-northeast-2"]
     
-    # CSV 파일 생성 및 결과 저장
-    output_file = "filtered_ec2_list.csv"
-    header = ["Account", "Instance ID", "Instance Name", "State", "OS", "AMI ID", "AMI Name", "Instance Type"]
+    # 병렬 처리 설정 (최대 동시 조회 수, 대상별 제한 시간(초))
+    max_workers = 8
+    target_timeout = 300
     
-    # 필터링 조건 출력
-    print(f"필터링 조건:")
-    print(f"  - 키워드: {KEYWORD_FILTER if KEYWORD_FILTER else '모든 키워드'}")
-    print(f"  - 태그 조건: {TAG_FILTERS if TAG_FILTERS else '모든 태그'}")
-    print(f"  - 인스턴스 상태: {INSTANCE_STATES}")
-    print(f"  - 조회 리전: {region}")
+    # 인벤토리 스냅샷 사용 여부 (True면 snapshot/collect_snapshot.py로 수집한 스냅샷에서 API 호출 없이 조회)
+    use_snapshot = False
+    snapshot = InventorySnapshot() if use_snapshot else None
     
-    # 조건이 모두 비어있으면 전체 조회 안내
-    if not KEYWORD_FILTER and not TAG_FILTERS:
-        print(f"  ⚠️  필터링 조건이 없어 지정된 상태의 모든 EC2 인스턴스를 조회합니다.")
-    print()
+    # AMI 이름 조회 여부 (False면 Windows/RHEL/SUSE 등 인스턴스 필드로 OS가 판별된 인스턴스의 AMI 조회를 생략하고 AMI Name을 '-'로 출력)
+    # (키워드 조건이 있으면 AMI 이름과도 비교하므로 항상 조회)
+    ami_names = True
     
-    with open(output_file, mode="w", newline="") as file:
-        writer = csv.writer(file)
-        writer.writerow(header)
-        
-        # 콘솔 출력 헤더
-        print("Account | Instance ID | Instance Name | State | OS | AMI ID | AMI Name | Instance Type")
-        print("------------------------------------------------------------------------------------------------")
-        
-        # 각 계정별로 인스턴스 조회 및 출력
-        total_instances = 0
-        for alias, profile in aws_profiles.items():
-            instances = get_ec2_instances(profile, alias, region, KEYWORD_FILTER, TAG_FILTERS, INSTANCE_STATES)
-            for instance in instances:
-                print(" | ".join(instance))
-                writer.writerow(instance)
-                total_instances += 1
+    # 결과를 저장할 CSV 파일
+    output_file = "filtered_ec2_list.csv"
     
-    print(f"\n총 {total_instances}개의 인스턴스가 조회되었습니다.")
-    print(f"Output saved to {output_file}")
+    # 조건에 맞는 EC2 인스턴스 조회 및 CSV 저장
+    export_filtered_ec2_list(aws_profiles, regions, KEYWORD_FILTER, TAG_FILTERS, INSTANCE_STATES,
+                             output_file, max_workers, target_timeout, snapshot, ami_names)
@@ -1,35 +1,59 @@
-import boto3
+import os
+import sys
 from datetime import datetime, timezone
 
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.aws_session import get_client
+from common.iam_credential_report import iter_access_keys, iter_credential_report
+
 ## AWS Users
 usernames = []
 ## AWS User expirkeys
 expirkeys = [] 
+## AWS Users with expir active accesskey (from credential report)
+expirusers = []
+## except iam user
+exceptusers = ["AAAA", "BBBB", "CCCC"]
 ## AccessKey expir trem 
 expir = 90
 
+def init(profile_name=None):
+    ## IAM client (profile_name None -> default credential chain)
+    global iam
+    iam = get_client('iam', profile_name)
+
 def run():
-    ## make IAM User list
-    users = iam.list_users()
-    for user in users['Users']:
-        tmp = str(user['UserName'])
-        usernames.append(tmp)
+    ## clear previous result (run several times in one process)
+    del usernames[:], expirkeys[:], expirusers[:]
+
+    ## make IAM User list and expir user list from credential report (one report instead of per-user calls)
+    for row in iter_credential_report(iam):
+        username = row['user']
+        usernames.append(username)
+        ## except iam user
+        if username in exceptusers:
+            continue
+        for accesskey in iter_access_keys(row):
+            ## (now - createdate)days
+            activeday = (datetime.now(timezone.utc)-accesskey['last_rotated']).days
+            ## Active and over expir date
+            if accesskey['active'] and activeday > expir:
+                expirusers.append(username)
+                break
     
     ## make expir accesskey list(and check acive accesskey)
-    for username in usernames:
-        ## except iam user
-        if username == "AAAA" or username == "BBBB" or username == "CCCC":
-            pass
-        else:
-            accesskeys = iam.list_access_keys(UserName = username)
-            for accesskey in accesskeys['AccessKeyMetadata']:
-                status = accesskey['Status']
-                ## (now - createdate)days
-                activeday = (datetime.now(timezone.utc)-accesskey['CreateDate']).days
-                ## Active and over expir date
-                if status == "Active" and activeday > expir:
-                    result = [username,activeday,accesskey['AccessKeyId']]
-                    expirkeys.append(result)
+    ## credential report has no AccessKeyId -> list_access_keys only for expir users
+    for username in expirusers:
+        accesskeys = iam.list_access_keys(UserName = username)
+        for accesskey in accesskeys['AccessKeyMetadata']:
+            status = accesskey['Status']
+            ## (now - createdate)days
+            activeday = (datetime.now(timezone.utc)-accesskey['CreateDate']).days
+            ## Active and over expir date
+            if status == "Active" and activeday > expir:
+                result = [username,activeday,accesskey['AccessKeyId']]
+                expirkeys.append(result)
 
     ## Expir List Report
     ## Expir AccessKey Inactive
@@ -49,5 +73,6 @@ def run():
     print("Expir Accesskey Count: " + str(len(expirkeys)))
 
 ## main
-iam = boto3.client('iam')
-run()
\ No newline at end of file
+if __name__ == "__main__":
+    init()
+    run()
@@ -1,10 +1,18 @@
-import boto3
+import os
+import sys
 from datetime import datetime, timezone
 
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.aws_session import get_client
+from common.iam_credential_report import iter_access_keys, iter_credential_report
+
 ## AWS Users
 usernames = []
 ## AWS User expirkeys
 acceskeylist = []
+## AccessKey last used info from credential report (AccessKeyId: [user, lastuseddate, usedservice])
+lastusedinfo = {}
 
 def acceskeylasteused(accesskeyid):
     #print(accesskeyid)
@@ -18,14 +26,26 @@ def acceskeylasteused(accesskeyid):
 
     print("User: " + user +" AccessKeyID: "+ accesskeyid +" LastUsedDate: "+ str(lastuseddate) +" Use Service: "+ usedservice) 
 
+def init(profile_name=None):
+    ## IAM client (profile_name None -> default credential chain)
+    global iam
+    iam = get_client('iam', profile_name)
+
 def run():
-    users = iam.list_users()
-    ## make IAM User list
-    for user in users['Users']:
-        tmp = str(user['UserName'])
-        usernames.append(tmp)
+    ## clear previous result (run several times in one process)
+    del usernames[:], acceskeylist[:]
+    lastusedinfo.clear()
+
+    ## make IAM User list from credential report (users with active accesskey only)
+    reportkeys = {}
+    for row in iter_credential_report(iam):
+        activekeys = [accesskey for accesskey in iter_access_keys(row) if accesskey['active']]
+        if activekeys:
+            usernames.append(row['user'])
+            reportkeys[row['user']] = activekeys
     
-    ## make expir accesskey list(and check acive accesskey)
+    ## make active accesskey list
+    ## credential report has no AccessKeyId -> list_access_keys, match report slot by createdate
     for username in usernames:
         accesskeys = iam.list_access_keys(UserName = username)
         for accesskey in accesskeys['AccessKeyMetadata']:
@@ -33,10 +53,22 @@ def run():
             ## Active and over expir date
             if status == "Active" :
                 acceskeylist.append(accesskey['AccessKeyId'])
+                createdate = accesskey['CreateDate'].replace(microsecond=0)
+                for reportkey in reportkeys[username]:
+                    if reportkey['last_rotated'] == createdate:
+                        lastuseddate = reportkey['last_used_date'] or "N/A"
+                        lastusedinfo[accesskey['AccessKeyId']] = [username, lastuseddate, reportkey['last_used_service']]
+                        break
 
     for alist in acceskeylist:
-        acceskeylasteused(alist)
+        ## use credential report info (fallback: get_access_key_last_used)
+        if alist in lastusedinfo:
+            user, lastuseddate, usedservice = lastusedinfo[alist]
+            print("User: " + user +" AccessKeyID: "+ alist +" LastUsedDate: "+ str(lastuseddate) +" Use Service: "+ usedservice) 
+        else:
+            acceskeylasteused(alist)
 
 ## main
-iam = boto3.client('iam')
-run()
\ No newline at end of file
+if __name__ == "__main__":
+    init()
+    run()
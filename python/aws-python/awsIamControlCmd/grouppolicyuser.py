@@ -1,6 +1,11 @@
-import boto3
+import os
+import sys
 from datetime import datetime, timezone
 
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.aws_session import get_client
+
 ## AWS Groups
 groups = []
 
@@ -13,37 +18,65 @@ policies = []
 ## Group Inline Policies
 inlinepolicies = []
 
-def groupdetail(groupname):
-    result = iam.get_group(GroupName = groupname)
-    GroupName = result['Group']['GroupName']
-    GroupId = result['Group']['GroupId']
-    Path = result['Group']['Path']
-    Arn = result['Group']['Arn']
-    users = result['Users']
-    print("GroupName: " +GroupName+" | GroupId: " +GroupId+ " | ARN: " +Arn)
+## Account Authorization Details Index
+## GroupName: group detail
+groupindex = {}
+## GroupName: [user detail]
+groupusers = {}
+## GroupName: [attached policy]
+groupattachedpolicies = {}
+## GroupName: [inline policy name]
+groupinlinepolicies = {}
+
+def loadauthdetails():
+    ## get all groups/users with paginated get_account_authorization_details (instead of 3 calls per group)
+    paginator = iam.get_paginator('get_account_authorization_details')
+    for page in paginator.paginate(Filter = ['Group', 'User']):
+        for group in page['GroupDetailList']:
+            groupname = group['GroupName']
+            groupindex[groupname] = group
+            groupusers.setdefault(groupname, [])
+            groupattachedpolicies[groupname] = group.get('AttachedManagedPolicies', [])
+            groupinlinepolicies[groupname] = [policy['PolicyName'] for policy in group.get('GroupPolicyList', [])]
+        for user in page['UserDetailList']:
+            for groupname in user.get('GroupList', []):
+                groupusers.setdefault(groupname, []).append(user)
+
+def groupdetailfromindex(groupname):
+    ## group detail (group, attached/inline policies, users) rendered from authorization details index
+    group = groupindex[groupname]
+    print("GroupName: " +group['GroupName']+" | GroupId: " +group['GroupId']+ " | ARN: " +group['Arn'])
 
     ## Attached Policies
-    policies = iam.list_attached_group_policies(GroupName = groupname)
-    for policy in policies['AttachedPolicies']:
+    for policy in groupattachedpolicies[groupname]:
         print("PolicyName: " +policy['PolicyName']+ " | ARN: " + policy['PolicyArn'])
     
     ## Inline Policies
-    inlinepolicies = iam.list_group_policies(GroupName = groupname)
-    for inlinepolicy in inlinepolicies['PolicyNames']:
+    for inlinepolicy in groupinlinepolicies[groupname]:
         print("InlinePolicyName: " +inlinepolicy) 
 
     ## Users
-    for user in users:
+    for user in groupusers[groupname]:
         print("User: " +user['UserName']+ " | UserID: " +user['UserId']+ " | UserCreateDate: " + str(user['CreateDate']))
 
+def init(profile_name=None):
+    ## IAM client (profile_name None -> default credential chain)
+    global iam
+    iam = get_client('iam', profile_name)
+
 def run():
-    groups = iam.list_groups()
+    ## clear previous result (run several times in one process)
+    del groups[:]
+    for index in (groupindex, groupusers, groupattachedpolicies, groupinlinepolicies):
+        index.clear()
+    loadauthdetails()
     ## make iam groupname list
-    for group in groups['Groups']:
-        groupname = group['GroupName']
-        groupdetail(groupname)
+    for groupname in groupindex:
+        groups.append(groupname)
+        groupdetailfromindex(groupname)
         print("===============")
 
 ## main
-iam = boto3.client('iam')
-run()
\ No newline at end of file
+if __name__ == "__main__":
+    init()
+    run()
@@ -1,74 +1,47 @@
-import boto3
+import os
+import sys
 from datetime import datetime, timezone
 
-## AWS Users
-usernames = []
-tags = []
-usergroups = []
-
-def getUserTags(userName):
-    usernm=""
-    team=""
-    company=""
-    tags = iam.list_user_tags(UserName = userName)
-    for tag in tags['Tags']:
-        if tag['Key'] == "Name":
-            usernm = tag['Value']
-            #print(tag['Key']+": " + tag['Value'])
-
-        if tag['Key'] == "Team":
-            team = tag['Value']
-            #print(tag['Key']+": " + tag['Value'])
-
-        if tag['Key'] == "Company":
-            company = tag['Value']
-            #print(tag['Key']+": " + tag['Value'])
-
-    return (usernm, team, company)
-
-def getUserGroup(userName):
-    result = []
-    usergroups = iam.list_groups_for_user(UserName = userName)
-    for usergroup in usergroups['Groups']:
-        #print(usergroup['GroupName'])
-        result.append(usergroup['GroupName'])
-    return result
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.aws_session import get_client
+from common.iam_user_directory import IamUserDirectory
+
+def printUser(user):
+    username = user['UserName']
+    usernm = user['Tags'].get("Name", "")
+    team = user['Tags'].get("Team", "")
+    company = user['Tags'].get("Company", "")
+    createdate = datetime.fromisoformat(user['CreateDate'])
+    print("IAMUser: " +username)
+    print("Company: " +company+ " | Team: " +team+ " | Name: " +usernm+ " | IAMUser: " +username+ " | CreateDate:" + str(createdate))
+    print(user['Groups'])
+
+def init(profile_name=None):
+    ## IAM client and IAM User directory (profile_name None -> default credential chain)
+    global directory
+    directory = IamUserDirectory(get_client('iam', profile_name), profile_name=profile_name)
 
 def run():
-    ## make IAM User list
-    users = iam.list_users()
-    for user in users['Users']:
-        usernames.append(user['UserName'])
+    ## IAM User directory (no api call when fresh, incremental refresh when stale)
+    directory.refresh()
     
-    ## make expir accesskey list(and check acive accesskey)
-    for username in usernames:
-        tmp = iam.get_user(UserName = username)
-        usernm, team, company = getUserTags(username)
-        #group = getUserGroup(username)
-        if company == "":
-            print("IAMUser: " +username)
-            print("Company: " +company+ " | Team: " +team+ " | Name: " +usernm+ " | IAMUser: " +username+ " | CreateDate:" + str(tmp['User']['CreateDate']))
-            print(getUserGroup(username))
-            print("===================")
+    ## users with empty Company tag (Company tag index)
+    for user in directory.find_by_tag("Company", ""):
+        printUser(user)
+        print("===================")
 
 def selectrun(iamuser):
-    ## make IAM User list
-    users = iam.list_users()
-    for user in users['Users']:
-        usernames.append(user['UserName'])
+    ## IAM User directory (no api call when fresh, incremental refresh when stale)
+    directory.refresh()
     
-    ## make expir accesskey list(and check acive accesskey)
-    for username in usernames:
-        tmp = iam.get_user(UserName = username)
-        usernm, team, company = getUserTags(username)
-        #group = getUserGroup(username)
-        if username == iamuser:
-            print("IAMUser: " +username)
-            print("Company: " +company+ " | Team: " +team+ " | Name: " +usernm+ " | IAMUser: " +username+ " | CreateDate:" + str(tmp['User']['CreateDate']))
-            print(getUserGroup(username))
-            break    
+    ## single user lookup (username index)
+    user = directory.get(iamuser)
+    if user:
+        printUser(user)
 
 ## main
-iam = boto3.client('iam')
-run()
-#selectrun("grmoon")
\ No newline at end of file
+if __name__ == "__main__":
+    init()
+    run()
+    #selectrun("grmoon")
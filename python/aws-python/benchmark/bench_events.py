@@ -0,0 +1,334 @@
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import common.inventory_events
+import common.inventory_snapshot
+from benchmark.bench_scripts import (PROFILE, RANDOM_SEED, REGION, USAGE_OPERATIONS, BenchEnvironment,
+                                     generate_fleet)
+from common.inventory_events import STATE_CHANGE_EVENT, load_events, normalize_event, sync_inventory
+from common.inventory_snapshot import InventorySnapshot, collect_snapshot
+
+# 측정 기본 설정
+DEFAULT_SIZE = 10000
+DEFAULT_CHANGES = 200
+
+# 변경 종류별 비율 (launch, stop, start, terminate, tag, volume)
+CHANGE_WEIGHTS = {"launch": 20, "stop": 20, "start": 15, "terminate": 15, "tag": 20, "volume": 10}
+
+
+def _iso(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+
+def cloudtrail_record(name, at, request=None, response=None):
+    """
+    CloudTrail 로그 파일의 레코드 형태로 EC2 API 호출 이벤트를 만듭니다.
+    """
+    return {"eventVersion": "1.08", "eventTime": _iso(at), "eventSource": "ec2.amazonaws.com",
+            "eventName": name, "awsRegion": REGION, "readOnly": False,
+            "requestParameters": request, "responseElements": response}
+
+
+def state_change(instance_id, state, at):
+    """
+    EventBridge EC2 인스턴스 상태 변경 알림 형태의 이벤트를 만듭니다.
+    """
+    return {"version": "0", "detail-type": STATE_CHANGE_EVENT, "source": "aws.ec2", "time": _iso(at),
+            "region": REGION, "detail": {"instance-id": instance_id, "state": state}}
+
+
+class FleetMutator:
+    """
+    가상 인벤토리를 변경하고, 같은 변경을 나타내는 CloudTrail/EventBridge 이벤트를 기록합니다.
+    """
+
+    def __init__(self, fleet, rng):
+        self.fleet = fleet
+        self.rng = rng
+        self.images = list(fleet["images"].values())
+        self.launched = 0
+        self.volumes_created = 0
+
+    def _pick(self, states):
+        # 상태가 맞는 인스턴스를 무작위로 선택 (대부분 running/stopped이므로 몇 번 안에 찾음)
+        instances = self.fleet["instances"]
+        for _ in range(1000):
+            instance = self.rng.choice(instances)
+            if instance["State"]["Name"] in states:
+                return instance
+        return None
+
+    def _set_tag(self, instance, key, value):
+        instance["Tags"] = [tag for tag in instance["Tags"] if tag["Key"] != key] + [{"Key": key, "Value": value}]
+        tags = self.fleet["tags"]
+        tags[:] = [tag for tag in tags if not (tag["ResourceId"] == instance["InstanceId"] and tag["Key"] == key)]
+        tags.append({"ResourceId": instance["InstanceId"], "ResourceType": "instance", "Key": key, "Value": value})
+
+    def launch(self, at):
+        image = self.rng.choice(self.images)
+        instance_id = f"i-e{self.launched:016x}"
+        volume_id = f"vol-e{self.launched:016x}"
+        self.launched += 1
+        tags = {"Name": f"app-new-{self.launched}", "Team": self.rng.choice(["DevOps", "backend", "Data"])}
+        instance = {
+            "InstanceId": instance_id, "ImageId": image["ImageId"], "InstanceType": "t3.large",
+            "State": {"Code": 16, "Name": "running"},
+            "Placement": {"AvailabilityZone": f"{REGION}{self.rng.choice('abcd')}"},
+            "PlatformDetails": image.get("PlatformDetails") or "Linux/UNIX",
+            "UsageOperation": USAGE_OPERATIONS.get(image.get("PlatformDetails"), "RunInstances"),
+            "Tags": [],
+        }
+        if image.get("Platform") == "windows":
+            instance["Platform"] = "windows"
+        self.fleet["instances"].append(instance)
+        for key, value in tags.items():
+            self._set_tag(instance, key, value)
+        self.fleet["volumes"].append({"VolumeId": volume_id, "Encrypted": True,
+                                      "Attachments": [{"InstanceId": instance_id, "Device": "/dev/xvda",
+                                                       "State": "attached", "DeleteOnTermination": True}]})
+
+        item = {"instanceId": instance_id, "imageId": image["ImageId"], "instanceType": "t3.large",
+                "instanceState": {"code": 0, "name": "pending"},
+                "placement": {"availabilityZone": instance["Placement"]["AvailabilityZone"]}}
+        if image.get("Platform") == "windows":
+            item["platform"] = "windows"
+        request = {"tagSpecificationSet": {"items": [{"resourceType": "instance",
+                                                      "tags": [{"key": key, "value": value}
+                                                               for key, value in tags.items()]}]}}
+        return [cloudtrail_record("RunInstances", at, request, {"instancesSet": {"items": [item]}}),
+                state_change(instance_id, "running", at + 0.5)]
+
+    def _transition(self, instance, api, transitional, final, at):
+        previous = instance["State"]["Name"]
+        instance["State"]["Name"] = final
+        item = {"instanceId": instance["InstanceId"], "previousState": {"name": previous},
+                "currentState": {"name": transitional}}
+        return [cloudtrail_record(api, at, {"instancesSet": {"items": [{"instanceId": instance["InstanceId"]}]}},
+                                  {"instancesSet": {"items": [item]}}),
+                state_change(instance["InstanceId"], transitional, at + 0.1),
+                state_change(instance["InstanceId"], final, at + 0.5)]
+
+    def stop(self, at):
+        instance = self._pick({"running"})
+        return self._transition(instance, "StopInstances", "stopping", "stopped", at) if instance else []
+
+    def start(self, at):
+        instance = self._pick({"stopped"})
+        return self._transition(instance, "StartInstances", "pending", "running", at) if instance else []
+
+    def terminate(self, at):
+        instance = self._pick({"running", "stopped"})
+        if instance is None:
+            return []
+        # 종료 시 함께 삭제되는 볼륨은 삭제하고 나머지는 연결 해제 (EC2 동작과 동일)
+        instance_id = instance["InstanceId"]
+        volumes = []
+        for volume in self.fleet["volumes"]:
+            attachments = volume["Attachments"]
+            if any(attachment["InstanceId"] == instance_id for attachment in attachments):
+                if any(attachment["InstanceId"] == instance_id and attachment.get("DeleteOnTermination")
+                       for attachment in attachments):
+                    continue
+                volume["Attachments"] = [attachment for attachment in attachments
+                                         if attachment["InstanceId"] != instance_id]
+            volumes.append(volume)
+        self.fleet["volumes"] = volumes
+        return self._transition(instance, "TerminateInstances", "shutting-down", "terminated", at)
+
+    def tag(self, at):
+        instance = self._pick({"running", "stopped"})
+        if instance is None:
+            return []
+        team = self.rng.choice(["DevOps", "backend", "Data", "platform", "Security"])
+        self._set_tag(instance, "Team", team)
+        request = {"resourcesSet": {"items": [{"resourceId": instance["InstanceId"]}]},
+                   "tagSet": {"items": [{"key": "Team", "value": team}]}}
+        return [cloudtrail_record("CreateTags", at, request, {"_return": True})]
+
+    def volume(self, at):
+        instance = self._pick({"running"})
+        if instance is None:
+            return []
+        volume_id = f"vol-f{self.volumes_created:016x}"
+        self.volumes_created += 1
+        encrypted = self.rng.random() < 0.5
+        self.fleet["volumes"].append({"VolumeId": volume_id, "Encrypted": encrypted,
+                                      "Attachments": [{"InstanceId": instance["InstanceId"], "Device": "/dev/sdf",
+                                                       "State": "attached", "DeleteOnTermination": False}]})
+        return [cloudtrail_record("CreateVolume", at, {"size": 100, "encrypted": encrypted},
+                                  {"volumeId": volume_id, "encrypted": encrypted, "size": "100",
+                                   "status": "creating"}),
+                cloudtrail_record("AttachVolume", at + 0.2,
+                                  {"volumeId": volume_id, "instanceId": instance["InstanceId"], "device": "/dev/sdf"},
+                                  {"volumeId": volume_id, "instanceId": instance["InstanceId"], "device": "/dev/sdf",
+                                   "status": "attaching", "deleteOnTermination": False})]
+
+
+def generate_changes(fleet, count, start, seed=RANDOM_SEED):
+    """
+    가상 인벤토리에 count개의 변경을 적용하고 해당 이벤트 목록을 반환합니다.
+
+    Args:
+        fleet (dict): generate_fleet 인벤토리 (직접 변경됨)
+        count (int): 변경 수
+        start (float): 첫 이벤트 시각 (epoch 초, 변경마다 1초씩 증가)
+
+    Returns:
+        list: CloudTrail 레코드와 EC2 상태 변경 알림 목록 (발생 순서)
+    """
+    rng = random.Random(seed)
+    mutator = FleetMutator(fleet, rng)
+    kinds, weights = zip(*CHANGE_WEIGHTS.items())
+    events = []
+    for index in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        events.extend(getattr(mutator, kind)(start + index))
+    return events
+
+
+def rebase_events(events, start):
+    """
+    기록된 이벤트의 시각을 순서와 간격을 유지한 채 start 이후로 옮깁니다. (재생 시 스냅샷 수집 이후 이벤트가 되도록)
+    """
+    times = [item[0] for item in map(normalize_event, events) if item is not None]
+    if not times:
+        return events
+    offset = start - min(times)
+    rebased = []
+    for event in events:
+        event = json.loads(json.dumps(event))
+        if "time" in event:
+            event["time"] = _iso(common.inventory_events._epoch(event["time"]) + offset)
+        target = event.get("detail") if event.get("detail-type") == "AWS API Call via CloudTrail" else event
+        if "eventTime" in target:
+            target["eventTime"] = _iso(common.inventory_events._epoch(target["eventTime"]) + offset)
+        rebased.append(event)
+    return rebased
+
+
+def build_reports(env, snapshot=None):
+    """
+    스냅샷 또는 실시간 조회로 보고서 결과를 만들고, 비교할 수 있도록 순서를 정규화합니다.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        total, distribution = env.load("ec2/check_al2.py").get_ec2_os_distribution(PROFILE, REGION, snapshot)
+        rows = env.load("ami/filtered_ec2_list.py").get_ec2_instances(
+            PROFILE, "bench", REGION, None, [], ["running", "stopped"], snapshot)
+        volumes = []
+        ebs = env.load("ebs/check_ebs_encryption.py").analyze_ebs_encryption(PROFILE, REGION, snapshot, volumes.append)
+    ebs = dict(ebs, unattached_volumes=sorted(ebs["unattached_volumes"]),
+               unencrypted_instances={key: sorted(value) for key, value in ebs["unencrypted_instances"].items()},
+               unencrypted_instance_names=sorted(ebs["unencrypted_instance_names"]),
+               volumes=sorted(volumes, key=lambda row: row[0]))
+    return {
+        "check_al2.get_ec2_os_distribution": (total, dict(sorted(distribution.items()))),
+        "filtered_ec2_list.get_ec2_instances": sorted(rows),
+        "check_ebs_encryption.analyze_ebs_encryption": ebs,
+    }
+
+
+def _measure(env, func):
+    before = Counter(env.fake.calls)
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start, env.fake.calls - before
+
+
+def run_benchmark(size=DEFAULT_SIZE, changes=DEFAULT_CHANGES, replay=None, record=None):
+    """
+    전체 수집 후 변경 이벤트를 증분 반영하는 시간/API 호출 수를 전체 재수집과 비교합니다.
+    (replay가 없으면 증분 반영한 스냅샷의 보고서가 실시간 전체 조회 결과와 같은지도 확인)
+
+    Args:
+        size (int): 가상 인벤토리 인스턴스 수
+        changes (int): 생성할 변경 수 (replay가 있으면 무시)
+        replay (str): 재생할 이벤트 파일 경로 (None이면 변경을 생성)
+        record (str): 생성/재생한 이벤트를 저장할 파일 경로
+
+    Returns:
+        dict: 측정 결과
+    """
+    env = BenchEnvironment(generate_fleet(size))
+    # 스냅샷/이벤트 모듈이 공유 Client 풀 대신 FakeAws Client를 사용하도록 연결
+    originals = (common.inventory_snapshot.get_client, common.inventory_events.get_client)
+    common.inventory_snapshot.get_client = common.inventory_events.get_client = env.get_client
+    try:
+        env.reset_caches()
+        _, seed_seconds, seed_calls = _measure(env, lambda: collect_snapshot(PROFILE, REGION))
+        snapshot = InventorySnapshot()
+        # 변경 이벤트는 스냅샷 수집 이후에 발생한 것으로 기록
+        scanned_at = snapshot.scanned_at(PROFILE, REGION)
+        start = max(time.time(), scanned_at) + 1
+
+        if replay:
+            events = rebase_events(load_events(replay), start)
+        else:
+            events = generate_changes(env.fake.fleet, changes, start)
+            env.fake.invalidate()
+        if record:
+            with open(record, "w", encoding="utf-8") as file:
+                file.write(json.dumps(events, indent=2, ensure_ascii=False))
+
+        sync, sync_seconds, sync_calls = _measure(env, lambda: sync_inventory(PROFILE, REGION, events))
+        incremental = build_reports(env, snapshot)
+        mismatches = None
+        if not replay:
+            live = build_reports(env)
+            mismatches = [name for name in live if live[name] != incremental[name]]
+
+        _, resync_seconds, resync_calls = _measure(env, lambda: collect_snapshot(PROFILE, REGION))
+    finally:
+        common.inventory_snapshot.get_client, common.inventory_events.get_client = originals
+        env.close()
+
+    return {
+        "size": size,
+        "events": len(events),
+        "sync": sync,
+        "seed_seconds": seed_seconds,
+        "seed_calls": dict(sorted(seed_calls.items())),
+        "sync_seconds": sync_seconds,
+        "sync_calls": dict(sorted(sync_calls.items())),
+        "resync_seconds": resync_seconds,
+        "resync_calls": dict(sorted(resync_calls.items())),
+        "reports": incremental if replay else None,
+        "mismatches": mismatches,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="인벤토리 스냅샷 증분 반영(sync_inventory)과 전체 재수집을 비교 측정합니다.")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="가상 인벤토리 인스턴스 수 (기본값: 10000)")
+    parser.add_argument("--changes", type=int, default=DEFAULT_CHANGES, help="생성할 변경 수 (기본값: 200)")
+    parser.add_argument("--replay", help="생성 대신 재생할 이벤트 파일 (JSON 배열, CloudTrail 로그 파일, JSON Lines)")
+    parser.add_argument("--record", help="생성/재생한 이벤트를 저장할 파일 경로")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.size, args.changes, args.replay, args.record)
+    sync = result["sync"]
+    print(f"Instances         : {result['size']}")
+    print(f"Events            : {result['events']} (applied {sync['applied']}, new instances {sync['new_instances']}, "
+          f"mode {sync['mode']}{' - ' + sync['reason'] if sync['reason'] else ''})")
+    print(f"Full collect      : {result['resync_seconds']:.3f}s, "
+          f"{sum(result['resync_calls'].values())} API calls {result['resync_calls']}")
+    print(f"Incremental sync  : {result['sync_seconds']:.3f}s, "
+          f"{sum(result['sync_calls'].values())} API calls {result['sync_calls']}")
+    if result["mismatches"] is None:
+        for name, report in result["reports"].items():
+            print(f"{name}: {json.dumps(report, ensure_ascii=False, default=str)[:500]}")
+    elif result["mismatches"]:
+        print(f"[MISMATCH] 실시간 전체 조회와 다른 보고서: {', '.join(result['mismatches'])}")
+        sys.exit(1)
+    else:
+        print("Reports           : 증분 반영한 스냅샷과 실시간 전체 조회 결과 일치")
@@ -0,0 +1,263 @@
+import argparse
+import importlib.util
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+LAMBDA_PATH = os.path.join(ROOT, "ck-ssm", "ck-ssm-lambda_fuc.py")
+
+# 측정 기본 설정
+DEFAULT_SIZE = 1000
+DEFAULT_COLD_RUNS = 5
+DEFAULT_WARM_INVOCATIONS = 20
+
+
+class LocalContext:
+    """
+    Lambda 컨텍스트 객체를 대신하는 로컬 컨텍스트입니다. (남은 실행 시간은 생성 시점부터 timeout_ms 기준)
+    """
+
+    def __init__(self, function_name="ssm-checker", timeout_ms=60000, memory_limit_in_mb=128):
+        self.function_name = function_name
+        self.function_version = "$LATEST"
+        self.memory_limit_in_mb = memory_limit_in_mb
+        self.aws_request_id = str(uuid.uuid4())
+        self.invoked_function_arn = f"arn:aws:lambda:ap-northeast-2:123456789012:function:{function_name}"
+        self.log_group_name = f"/aws/lambda/{function_name}"
+        self.log_stream_name = "local"
+        self._deadline = time.monotonic() + timeout_ms / 1000
+
+    def get_remaining_time_in_millis(self):
+        return max(0, int((self._deadline - time.monotonic()) * 1000))
+
+
+class WebhookServer:
+    """
+    Slack 웹훅을 대신하는 로컬 HTTP/1.1 서버입니다. (수신 메시지 수, 새로 맺어진 커넥션 수, 429 응답 수를 기록)
+    rate_limit_every가 N이면 N번째 요청마다 429(Retry-After: 0)로 응답합니다.
+    """
+
+    def __init__(self, rate_limit_every=0):
+        stats = self.stats = {"requests": 0, "messages": 0, "connections": 0, "bytes": 0,
+                              "max_message_bytes": 0, "rate_limited": 0}
+        lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 헤더/본문을 나누어 쓰므로 Nagle 지연(~40ms)이 측정에 섞이지 않도록 비활성화
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                stats["connections"] += 1
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with lock:
+                    stats["requests"] += 1
+                    limited = rate_limit_every and stats["requests"] % rate_limit_every == 0
+                    if limited:
+                        stats["rate_limited"] += 1
+                    else:
+                        text = json.loads(body)["text"].encode("utf-8")
+                        stats["messages"] += 1
+                        stats["bytes"] += len(text)
+                        stats["max_message_bytes"] = max(stats["max_message_bytes"], len(text))
+                if limited:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.send_header("Content-Length", "12")
+                    self.end_headers()
+                    self.wfile.write(b"rate_limited")
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", "2")
+                self.end_headers()
+                self.wfile.write(b"ok")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/services/T000/B000/XXXX"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def apply_churn(fleet, count, rng):
+    """
+    실행 중인 인스턴스 count개 중 절반은 SSM PingStatus를 바꾸고, 나머지는 중지시킵니다. (변경 감시 모드 측정용)
+    """
+    ssm = {info["InstanceId"]: info for info in fleet["ssm"]}
+    running = [instance for instance in fleet["instances"] if instance["State"]["Name"] == "running"]
+    for index, instance in enumerate(rng.sample(running, min(count, len(running)))):
+        info = ssm.get(instance["InstanceId"])
+        if index % 2 == 0 and info is not None:
+            info["PingStatus"] = "ConnectionLost" if info["PingStatus"] == "Online" else "Online"
+        else:
+            instance["State"] = {"Code": 80, "Name": "stopped"}
+            fleet["ssm"] = [item for item in fleet["ssm"] if item["InstanceId"] != instance["InstanceId"]]
+
+
+def run_container(size, invocations, webhook_url, watch=False, churn=0, regions=None, timeout_ms=60000,
+                  api_latency_ms=0):
+    """
+    하나의 Lambda 컨테이너를 흉내 내어 모듈 로드(init)와 연속 호출 시간을 측정합니다.
+    boto3.client를 가상 인벤토리(FakeAws)에 연결된 Client로 대체하므로 네트워크/자격 증명이 필요 없습니다.
+
+    Args:
+        size (int): 가상 인벤토리 인스턴스 수
+        invocations (int): 연속 호출 횟수 (첫 호출은 콜드, 나머지는 웜)
+        webhook_url (str): 로컬 웹훅 서버 URL
+        watch (bool): 변경 감시 모드(SSM_WATCH_MODE=changes)로 실행
+        churn (int): 호출 사이마다 상태를 바꿀 인스턴스 수 (변경 감시 모드)
+        regions (list): 검사할 리전 목록 (SSM_REGIONS, 리전마다 같은 가상 인벤토리로 응답)
+        timeout_ms (int): 호출별 Lambda 제한 시간(ms)
+        api_latency_ms (int): API 호출마다 추가할 지연 시간(ms) (제한 시간 동작 확인용)
+
+    Returns:
+        dict: init_ms, invocations_ms, api_calls, ec2_calls, last_result
+    """
+    os.environ["SLACK_WEBHOOK_URL"] = webhook_url
+    os.environ["SSM_STATE_URI"] = os.path.join(tempfile.mkdtemp(prefix="ssm-watch-"), "state.json")
+    if watch:
+        os.environ["SSM_WATCH_MODE"] = "changes"
+    if regions:
+        os.environ["SSM_REGIONS"] = ",".join(regions)
+
+    # Lambda 핸들러 모듈 로드 시간 (Lambda init 단계, boto3 등 import 비용 포함)
+    started = time.perf_counter()
+    spec = importlib.util.spec_from_file_location("ck_ssm_lambda", LAMBDA_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    init_ms = (time.perf_counter() - started) * 1000
+
+    # 가상 인벤토리 준비 (init 측정 이후에 import)
+    import boto3
+    from benchmark.bench_scripts import REGION, FakeAws, generate_fleet
+
+    fake = FakeAws(generate_fleet(size))
+    session = boto3.Session(aws_access_key_id="bench", aws_secret_access_key="bench", region_name=REGION)
+
+    def add_latency(**kwargs):
+        time.sleep(api_latency_ms / 1000)
+
+    def create_client(service_name, region_name=None):
+        client = session.client(service_name, region_name=region_name)
+        if api_latency_ms:
+            client.meta.events.register_first("before-call.*.*", add_latency)
+        return fake.attach(client)
+
+    # 모듈이 만드는 Client를 FakeAws에 연결 (Client 생성 비용은 그대로 첫 호출에 포함)
+    module.boto3 = type("boto3", (), {"client": staticmethod(create_client)})
+
+    durations = []
+    rng = random.Random(size)
+    for invocation in range(invocations):
+        if churn and invocation:
+            apply_churn(fake.fleet, churn, rng)
+            fake.invalidate()
+        started = time.perf_counter()
+        result = module.lambda_handler({}, LocalContext(timeout_ms=timeout_ms))
+        durations.append((time.perf_counter() - started) * 1000)
+    return {"init_ms": init_ms, "invocations_ms": durations, "api_calls": sum(fake.calls.values()),
+            "ec2_calls": fake.calls["ec2:DescribeInstances"], "last_result": result}
+
+
+def percentile(values, ratio):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+def run_benchmark(size=DEFAULT_SIZE, cold_runs=DEFAULT_COLD_RUNS, invocations=DEFAULT_WARM_INVOCATIONS,
+                  rate_limit_every=0, watch=False, churn=0, regions=None, timeout_ms=60000, api_latency_ms=0):
+    """
+    새 파이썬 프로세스(콜드 컨테이너)마다 init 시간과 콜드/웜 호출 시간을 측정합니다.
+
+    Returns:
+        dict: init_ms, cold_ms, warm_p50_ms, warm_p95_ms (콜드 컨테이너들의 중앙값), webhook 통계
+    """
+    server = WebhookServer(rate_limit_every)
+    try:
+        containers = []
+        for _ in range(cold_runs):
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--container", "--size", str(size),
+                 "--invocations", str(invocations), "--webhook-url", server.url, "--churn", str(churn),
+                 "--timeout-ms", str(timeout_ms), "--api-latency-ms", str(api_latency_ms)]
+                + (["--watch"] if watch else []) + (["--regions", ",".join(regions)] if regions else []),
+                check=True, capture_output=True, text=True).stdout
+            containers.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        server.close()
+
+    warm = [duration for container in containers for duration in container["invocations_ms"][1:]]
+    return {
+        "size": size,
+        "init_ms": statistics.median(container["init_ms"] for container in containers),
+        "cold_ms": statistics.median(container["invocations_ms"][0] for container in containers),
+        "warm_p50_ms": percentile(warm, 0.5) if warm else None,
+        "warm_p95_ms": percentile(warm, 0.95) if warm else None,
+        "api_calls_per_invocation": containers[0]["api_calls"] / invocations,
+        "ec2_calls_per_invocation": containers[0]["ec2_calls"] / invocations,
+        "handler_result": containers[0]["last_result"],
+        "webhook": dict(server.stats),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SSM Slack Lambda의 init/콜드/웜 호출 시간을 오프라인으로 측정합니다.")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="가상 인벤토리 인스턴스 수 (기본값: 1000)")
+    parser.add_argument("--cold-runs", type=int, default=DEFAULT_COLD_RUNS, help="콜드 컨테이너 수 (기본값: 5)")
+    parser.add_argument("--invocations", type=int, default=DEFAULT_WARM_INVOCATIONS,
+                        help="컨테이너별 연속 호출 수 (기본값: 20)")
+    parser.add_argument("--rate-limit-every", type=int, default=0,
+                        help="로컬 웹훅이 N번째 요청마다 429(Retry-After: 0)로 응답 (기본값: 0, 사용 안 함)")
+    parser.add_argument("--watch", action="store_true", help="변경 감시 모드(SSM_WATCH_MODE=changes)로 측정")
+    parser.add_argument("--churn", type=int, default=0,
+                        help="변경 감시 모드에서 호출 사이마다 상태를 바꿀 인스턴스 수 (기본값: 0)")
+    parser.add_argument("--regions", type=lambda value: [item for item in value.split(",") if item],
+                        help="검사할 리전 목록 (쉼표로 구분, 기본값: ap-northeast-2)")
+    parser.add_argument("--timeout-ms", type=int, default=60000, help="호출별 Lambda 제한 시간(ms) (기본값: 60000)")
+    parser.add_argument("--api-latency-ms", type=int, default=0,
+                        help="API 호출마다 추가할 지연 시간(ms) (기본값: 0)")
+    parser.add_argument("--container", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--webhook-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # 측정용 하위 프로세스: 결과를 마지막 줄 JSON으로 출력
+    if args.container:
+        print(json.dumps(run_container(args.size, args.invocations, args.webhook_url, args.watch, args.churn,
+                                       args.regions, args.timeout_ms, args.api_latency_ms)))
+        sys.exit(0)
+
+    result = run_benchmark(args.size, args.cold_runs, args.invocations, args.rate_limit_every, args.watch, args.churn,
+                           args.regions, args.timeout_ms, args.api_latency_ms)
+    webhook = result["webhook"]
+    print(f"Instances              : {result['size']}")
+    print(f"Init (module load)     : {result['init_ms']:.1f} ms")
+    print(f"Cold invocation        : {result['cold_ms']:.1f} ms")
+    print(f"Warm invocation p50/p95: {result['warm_p50_ms']:.1f} / {result['warm_p95_ms']:.1f} ms")
+    print(f"API calls / invocation : {result['api_calls_per_invocation']:.1f} "
+          f"(ec2:DescribeInstances {result['ec2_calls_per_invocation']:.1f})")
+    print(f"Handler result         : {json.dumps(result['handler_result'], ensure_ascii=False)}")
+    print(f"Webhook messages       : {webhook['messages']} ({webhook['bytes']} bytes, "
+          f"max {webhook['max_message_bytes']} bytes/message)")
+    print(f"Webhook connections    : {webhook['connections']} (cold containers: {args.cold_runs})")
+    print(f"Webhook 429 responses  : {webhook['rate_limited']}")
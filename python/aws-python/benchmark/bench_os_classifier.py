@@ -0,0 +1,376 @@
+import os
+import random
+import sys
+import time
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.os_classifier import _classify, classify_os
+
+# 벤치마크 기본 설정
+DEFAULT_CORPUS_SIZE = 5000
+DEFAULT_REPEAT = 5
+RANDOM_SEED = 20240819
+
+# 기존 check_al2.classify_image_os가 판별하던 설명 기반 분류 (이름으로는 OS를 알 수 없는 골든/커스텀 AMI)
+# filtered_ec2_list의 determine_os_type은 띄어 쓴 "amazon linux 2"를 판별하지 않으므로 코퍼스 비교와 별도로 확인
+CHECK_AL2_CASES = [
+    ({"Name": "my-golden-20240101", "Description": "Built from Amazon Linux 2 AMI", "PlatformDetails": "Linux/UNIX"},
+     "Amazon Linux 2"),
+    ({"Name": "my-golden-20240101", "Description": "Built from Amazon Linux 2023 AMI", "PlatformDetails": "Linux/UNIX"},
+     "Amazon Linux 2023"),
+    ({"Name": "app-base-v3", "Description": "Amazon Linux 2 Kernel 5.10 AMI 2.0 x86_64 HVM gp2",
+      "PlatformDetails": "Linux/UNIX"}, "Amazon Linux 2"),
+]
+
+
+# 기존 filtered_ec2_list.get_ec2_instances 내부의 determine_os_type (비교 기준용 원본 복사본)
+def legacy_determine_os_type(image):
+    """
+    AMI 정보를 기반으로 OS 타입을 더 정확하게 판별합니다.
+    AMI 설명에서 OS 버전 정보도 추출합니다.
+    
+    Args:
+        image (dict): AMI 이미지 정보
+        
+    Returns:
+        str: OS 타입
+    """
+    # 기본 정보 추출
+    name = image.get("Name", "").lower()
+    description = image.get("Description", "").lower()
+    platform = image.get("Platform", "").lower()
+    platform_details = image.get("PlatformDetails", "").lower()
+    architecture = image.get("Architecture", "").lower()
+    virtualization_type = image.get("VirtualizationType", "").lower()
+    
+    # AMI 설명에서 OS 정보 추출 함수
+    def extract_os_from_description(desc):
+        """
+        AMI 설명에서 OS 정보를 추출합니다.
+        예: "base-image:GI-amazonlinux2023-arm-V20240819-CyberArk..."
+        """
+        # Amazon Linux 패턴 검사 (al2023, EKS 노드 패턴 추가)
+        if any(pattern in desc for pattern in ["amazonlinux2023", "amazon-linux-2023", "al2023"]):
+            return "Amazon Linux 2023"
+        elif "amazonlinux2" in desc or "amazon-linux-2" in desc:
+            return "Amazon Linux 2"
+        elif "amazonlinux" in desc or "amazon-linux" in desc:
+            # 버전 번호가 없으면 Amazon Linux 1로 추정
+            return "Amazon Linux 1"
+        
+        # Ubuntu 패턴 검사
+        ubuntu_patterns = [
+            ("ubuntu-22.04", "Ubuntu 22.04 LTS"),
+            ("ubuntu22.04", "Ubuntu 22.04 LTS"),
+            ("ubuntu-jammy", "Ubuntu 22.04 LTS"),
+            ("ubuntu-20.04", "Ubuntu 20.04 LTS"),
+            ("ubuntu20.04", "Ubuntu 20.04 LTS"),
+            ("ubuntu-focal", "Ubuntu 20.04 LTS"),
+            ("ubuntu-18.04", "Ubuntu 18.04 LTS"),
+            ("ubuntu18.04", "Ubuntu 18.04 LTS"),
+            ("ubuntu-bionic", "Ubuntu 18.04 LTS"),
+            ("ubuntu", "Ubuntu")
+        ]
+        
+        for pattern, os_name in ubuntu_patterns:
+            if pattern in desc:
+                return os_name
+        
+        # CentOS 패턴 검사
+        centos_patterns = [
+            ("centos-8", "CentOS 8"),
+            ("centos8", "CentOS 8"),
+            ("centos-7", "CentOS 7"),
+            ("centos7", "CentOS 7"),
+            ("centos-6", "CentOS 6"),
+            ("centos6", "CentOS 6"),
+            ("centos", "CentOS")
+        ]
+        
+        for pattern, os_name in centos_patterns:
+            if pattern in desc:
+                return os_name
+        
+        # RHEL 패턴 검사
+        rhel_patterns = [
+            ("rhel-9", "Red Hat Enterprise Linux 9"),
+            ("rhel9", "Red Hat Enterprise Linux 9"),
+            ("rhel-8", "Red Hat Enterprise Linux 8"),
+            ("rhel8", "Red Hat Enterprise Linux 8"),
+            ("rhel-7", "Red Hat Enterprise Linux 7"),
+            ("rhel7", "Red Hat Enterprise Linux 7"),
+            ("red-hat", "Red Hat Enterprise Linux"),
+            ("rhel", "Red Hat Enterprise Linux")
+        ]
+        
+        for pattern, os_name in rhel_patterns:
+            if pattern in desc:
+                return os_name
+        
+        # Debian 패턴 검사
+        debian_patterns = [
+            ("debian-12", "Debian 12"),
+            ("debian12", "Debian 12"),
+            ("debian-11", "Debian 11"),
+            ("debian11", "Debian 11"),
+            ("debian-10", "Debian 10"),
+            ("debian10", "Debian 10"),
+            ("debian", "Debian")
+        ]
+        
+        for pattern, os_name in debian_patterns:
+            if pattern in desc:
+                return os_name
+        
+        # Windows 패턴 검사
+        if any(pattern in desc for pattern in ["windows-2022", "windows2022", "win2022"]):
+            return "Windows Server 2022"
+        elif any(pattern in desc for pattern in ["windows-2019", "windows2019", "win2019"]):
+            return "Windows Server 2019"
+        elif any(pattern in desc for pattern in ["windows-2016", "windows2016", "win2016"]):
+            return "Windows Server 2016"
+        elif any(pattern in desc for pattern in ["windows", "win-"]):
+            return "Windows"
+        
+        return None
+    
+    # AWS에서 제공하는 Platform 필드를 우선 확인 (가장 정확)
+    if platform == "windows":
+        # 설명에서 더 상세한 Windows 버전 찾기
+        desc_os = extract_os_from_description(description)
+        if desc_os and desc_os.startswith("Windows"):
+            return desc_os
+        return "Windows"
+    
+    # AMI 설명에서 OS 정보 추출 시도 (우선순위 높음)
+    desc_os = extract_os_from_description(description)
+    if desc_os:
+        return desc_os
+    
+    # AMI 이름에서 OS 정보 추출 시도
+    desc_os = extract_os_from_description(name)
+    if desc_os:
+        return desc_os
+    
+    # PlatformDetails 필드 확인 (더 상세한 정보)
+    if "windows" in platform_details:
+        return "Windows"
+    elif "linux" in platform_details:
+        # Linux 계열 상세 분류 (EKS 노드 패턴 추가)
+        if any(keyword in name for keyword in ["amzn2-ami", "amazonlinux2", "amazon-linux-2"]):
+            return "Amazon Linux 2"
+        elif any(keyword in name for keyword in ["al2023-ami", "amazon-linux-2023", "amazonlinux2023", "al2023"]):
+            return "Amazon Linux 2023"
+        elif any(keyword in name for keyword in ["al2-ami", "amazon-linux-ami"]):
+            return "Amazon Linux 1"
+        elif any(keyword in name for keyword in ["ubuntu"]):
+            # Ubuntu 버전 상세 분류
+            if "22.04" in name or "jammy" in name:
+                return "Ubuntu 22.04 LTS"
+            elif "20.04" in name or "focal" in name:
+                return "Ubuntu 20.04 LTS"
+            elif "18.04" in name or "bionic" in name:
+                return "Ubuntu 18.04 LTS"
+            else:
+                return "Ubuntu"
+        elif any(keyword in name for keyword in ["centos"]):
+            return "CentOS"
+        elif any(keyword in name for keyword in ["rhel", "red-hat"]):
+            return "Red Hat Enterprise Linux"
+        elif any(keyword in name for keyword in ["debian"]):
+            return "Debian"
+        elif any(keyword in name for keyword in ["suse", "sles"]):
+            return "SUSE Linux"
+        elif any(keyword in name for keyword in ["alpine"]):
+            return "Alpine Linux"
+        else:
+            return "Linux (Other)"
+    
+    # 이름과 설명 기반 분류 (Platform 정보가 없는 경우)
+    if any(keyword in name or keyword in description for keyword in ["windows", "win-"]):
+        return "Windows"
+    elif any(keyword in name for keyword in ["amzn2-ami", "amazonlinux2", "amazon-linux-2"]):
+        return "Amazon Linux 2"
+    elif any(keyword in name for keyword in ["al2023-ami", "amazon-linux-2023", "amazonlinux2023", "al2023"]):
+        return "Amazon Linux 2023"
+    elif any(keyword in name for keyword in ["al2-ami", "amazon-linux-ami"]):
+        return "Amazon Linux 1"
+    elif "ubuntu" in name:
+        if "22.04" in name or "jammy" in name:
+            return "Ubuntu 22.04 LTS"
+        elif "20.04" in name or "focal" in name:
+            return "Ubuntu 20.04 LTS"
+        elif "18.04" in name or "bionic" in name:
+            return "Ubuntu 18.04 LTS"
+        else:
+            return "Ubuntu"
+    elif "centos" in name:
+        return "CentOS"
+    elif any(keyword in name for keyword in ["rhel", "red-hat"]):
+        return "Red Hat Enterprise Linux"
+    elif "debian" in name:
+        return "Debian"
+    elif any(keyword in name for keyword in ["suse", "sles"]):
+        return "SUSE Linux"
+    elif "alpine" in name:
+        return "Alpine Linux"
+    elif any(keyword in name for keyword in ["freebsd"]):
+        return "FreeBSD"
+    elif any(keyword in name for keyword in ["openbsd"]):
+        return "OpenBSD"
+    elif any(keyword in name for keyword in ["netbsd"]):
+        return "NetBSD"
+    
+    # 기본적으로 Linux 계열로 추정 (대부분의 EC2 인스턴스가 Linux)
+    if platform_details and "linux" not in platform_details and platform != "windows":
+        return "Unknown"
+    
+    return "Linux (Unknown Distribution)"
+
+
+def generate_ami_corpus(size=DEFAULT_CORPUS_SIZE, seed=RANDOM_SEED):
+    """
+    실제 AMI와 유사한 이름/설명/Platform 조합의 테스트 코퍼스를 생성합니다.
+    공유 골든 AMI처럼 같은 AMI가 여러 번 등장하는 분포를 흉내 냅니다.
+
+    Args:
+        size (int): 생성할 AMI 수
+        seed (int): 난수 시드 (같은 시드면 같은 코퍼스)
+
+    Returns:
+        list: AMI 정보 딕셔너리 리스트
+    """
+    rng = random.Random(seed)
+    date = lambda: f"{rng.randint(2019, 2025)}{rng.randint(1, 12):02d}{rng.randint(1, 28):02d}"
+    arch = lambda: rng.choice(["x86_64", "arm64", "amd64"])
+    linux = ("Linux/UNIX", "")
+    templates = [
+        (lambda: f"amzn2-ami-hvm-2.0.{date()}.0-{arch()}-gp2", lambda: "Amazon Linux 2 AMI 2.0 x86_64 HVM gp2", linux),
+        (lambda: f"amzn2-ami-kernel-5.10-hvm-2.0.{date()}.0-{arch()}-gp2", lambda: "", linux),
+        (lambda: f"al2023-ami-2023.5.{date()}.0-kernel-6.1-{arch()}", lambda: "Amazon Linux 2023 AMI 2023.5 x86_64 HVM kernel-6.1", linux),
+        (lambda: f"amzn-ami-hvm-2018.03.0.{date()}-x86_64-gp2", lambda: "Amazon Linux AMI 2018.03 x86_64 HVM gp2", linux),
+        (lambda: f"amazon-eks-node-1.{rng.randint(23, 30)}-v{date()}", lambda: "EKS Kubernetes Worker AMI with AmazonLinux2 image", linux),
+        (lambda: f"amazon-eks-node-al2023-{arch()}-standard-1.{rng.randint(23, 30)}-v{date()}", lambda: "EKS-optimized Kubernetes node based on Amazon Linux 2023", linux),
+        (lambda: f"GI-golden-{arch()}-V{date()}", lambda: f"base-image:GI-amazonlinux2023-arm-V{date()}-CyberArk", linux),
+        (lambda: f"GI-golden-{arch()}-V{date()}", lambda: f"base-image:GI-amazonlinux2-x86-V{date()}", linux),
+        (lambda: f"ubuntu/images/hvm-ssd/ubuntu-jammy-22.04-{arch()}-server-{date()}", lambda: f"Canonical, Ubuntu, 22.04 LTS, {arch()} jammy image build on {date()}", linux),
+        (lambda: f"ubuntu/images/hvm-ssd/ubuntu-focal-20.04-{arch()}-server-{date()}", lambda: "Canonical, Ubuntu, 20.04 LTS, amd64 focal image", linux),
+        (lambda: f"ubuntu/images/hvm-ssd/ubuntu-bionic-18.04-{arch()}-server-{date()}", lambda: "", linux),
+        (lambda: f"ubuntu-minimal/images/hvm-ssd/ubuntu-noble-24.04-{arch()}-minimal-{date()}", lambda: "", linux),
+        (lambda: f"CentOS-7-2111-{date()}_1.x86_64", lambda: "CentOS-7 2111 x86_64", linux),
+        (lambda: f"CentOS Stream 9 x86_64 {date()}", lambda: "CentOS Stream 9 x86_64", linux),
+        (lambda: f"RHEL-9.2.0_HVM-{date()}-x86_64-41-Hourly2-GP2", lambda: "Provided by Red Hat, Inc.", ("Red Hat Enterprise Linux", "")),
+        (lambda: f"RHEL-8.6.0_HVM-{date()}-arm64-2-Hourly2-GP2", lambda: "Provided by Red Hat, Inc.", ("Red Hat Enterprise Linux", "")),
+        (lambda: f"debian-12-{arch()}-{date()}-1811", lambda: "Debian 12 (20240717-1811)", linux),
+        (lambda: f"debian-11-{arch()}-{date()}-1470", lambda: "Debian 11 (20230912-1470)", linux),
+        (lambda: f"suse-sles-15-sp5-v{date()}-hvm-ssd-{arch()}", lambda: "SUSE Linux Enterprise Server 15 SP5 (HVM, 64-bit, SSD-Backed)", ("SUSE Linux", "")),
+        (lambda: f"alpine-3.19.1-{arch()}-uefi-tiny-r0", lambda: "Alpine Linux 3.19.1 x86_64 UEFI tiny", linux),
+        (lambda: f"FreeBSD 14.0-RELEASE-{arch()} UEFI", lambda: "FreeBSD/amd64 releng/14.0@1234", ("", "")),
+        (lambda: f"Windows_Server-2022-English-Full-Base-{date()}", lambda: "Microsoft Windows Server 2022 Full Locale English AMI provided by Amazon", ("Windows", "windows")),
+        (lambda: f"Windows_Server-2019-English-Full-Base-{date()}", lambda: "Microsoft Windows Server 2019 with Desktop Experience Locale English AMI", ("Windows", "windows")),
+        (lambda: f"Windows_Server-2016-Korean-Full-SQL_2017_Standard-{date()}", lambda: "Microsoft Windows Server 2016 Korean", ("Windows with SQL Server Standard", "windows")),
+        (lambda: f"win-golden-{date()}", lambda: "windows-2019 golden image", ("Windows", "windows")),
+        (lambda: f"bottlerocket-aws-k8s-1.29-{arch()}-v1.20.0-{date()}", lambda: "bottlerocket-aws-k8s-1.29-x86_64", linux),
+        (lambda: f"packer-app-{rng.randint(1, 999)}-{date()}", lambda: "", linux),
+        (lambda: f"app-server-{rng.randint(1, 999)}-{date()}", lambda: "", ("", "")),
+        (lambda: f"custom-image-{rng.randint(1, 999)}", lambda: "", ("Linux/UNIX", "")),
+        (lambda: f"legacy-al2-ami-{date()}", lambda: "", ("", "")),
+    ]
+
+    # 고유 AMI 풀을 만든 뒤, 골든 AMI 공유처럼 일부 AMI가 반복 등장하도록 샘플링
+    unique_images = []
+    for index in range(max(1, size // 3)):
+        name, description, (platform_details, platform) = (lambda t: (t[0](), t[1](), t[2]))(rng.choice(templates))
+        if rng.random() < 0.3:
+            name, description = name.upper() if rng.random() < 0.5 else name, description.title()
+        image = {"ImageId": f"ami-{index:017x}", "Name": name, "Description": description, "PlatformDetails": platform_details}
+        if platform:
+            image["Platform"] = platform
+        unique_images.append(image)
+    return [rng.choice(unique_images) for _ in range(size)]
+
+
+def _time(func, images, repeat):
+    """
+    코퍼스 전체 분류 시간을 repeat회 측정하여 최소값(초)을 반환합니다.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for image in images:
+            func(image)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _classify_cold(image):
+    """
+    메모이제이션 효과를 제외한 순수 매처 성능 측정용 (호출마다 캐시 초기화 없이 원본 함수 호출)
+    """
+    return _classify.__wrapped__(
+        (image.get("Name") or "").lower(),
+        (image.get("Description") or "").lower(),
+        (image.get("Platform") or "").lower(),
+        (image.get("PlatformDetails") or "").lower(),
+    )
+
+
+def run_benchmark(size=DEFAULT_CORPUS_SIZE, repeat=DEFAULT_REPEAT):
+    """
+    기존 determine_os_type과 common.os_classifier.classify_os의 분류 결과 일치 여부와 성능을 비교합니다.
+
+    Args:
+        size (int): 코퍼스 크기
+        repeat (int): 반복 측정 횟수
+
+    Returns:
+        dict: 불일치 수와 구현별 측정 시간(초)
+    """
+    images = generate_ami_corpus(size)
+
+    # 분류 결과 일치 여부 확인
+    mismatches = [
+        (image["Name"], image["Description"], legacy_determine_os_type(image), classify_os(image))
+        for image in images
+        if legacy_determine_os_type(image) != classify_os(image)
+    ]
+    mismatches += [
+        (image["Name"], image["Description"], expected, classify_os(image))
+        for image, expected in CHECK_AL2_CASES
+        if classify_os(image) != expected
+    ]
+
+    legacy = _time(legacy_determine_os_type, images, repeat)
+    compiled = _time(_classify_cold, images, repeat)
+    _classify.cache_clear()
+    memoized = _time(classify_os, images, repeat)
+
+    return {
+        "corpus_size": len(images),
+        "unique_images": len({image["ImageId"] for image in images}),
+        "mismatches": mismatches,
+        "legacy_seconds": legacy,
+        "compiled_seconds": compiled,
+        "memoized_seconds": memoized,
+    }
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CORPUS_SIZE
+    result = run_benchmark(size)
+
+    print(f"Corpus: {result['corpus_size']} AMIs ({result['unique_images']} unique)")
+    print(f"Legacy determine_os_type : {result['legacy_seconds'] * 1000:.2f} ms")
+    print(f"Compiled matcher (no memo): {result['compiled_seconds'] * 1000:.2f} ms "
+          f"(x{result['legacy_seconds'] / result['compiled_seconds']:.2f})")
+    print(f"classify_os (memoized)   : {result['memoized_seconds'] * 1000:.2f} ms "
+          f"(x{result['legacy_seconds'] / result['memoized_seconds']:.2f})")
+
+    if result["mismatches"]:
+        print(f"[ERROR] 분류 결과 불일치 {len(result['mismatches'])}건")
+        for mismatch in result["mismatches"][:20]:
+            print(f"  {mismatch}")
+        sys.exit(1)
+    print("[INFO] 모든 AMI의 분류 결과가 기존 로직과 일치합니다.")
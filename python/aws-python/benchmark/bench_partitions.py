@@ -0,0 +1,119 @@
+import argparse
+import contextlib
+import os
+import sys
+import time
+from collections import Counter
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark.bench_scripts import PROFILE, REGION, BenchEnvironment, generate_fleet
+
+# 측정 기본 설정
+DEFAULT_SIZE = 20000
+DEFAULT_PARTITIONS = (2, 4, 8)
+DEFAULT_API_LATENCY_MS = 200
+
+
+def build_scans(env):
+    """
+    분할 조회를 사용하는 세 진입점의 결과를 비교할 수 있는 형태로 반환하는 함수 목록을 만듭니다.
+    """
+    def os_distribution():
+        total, distribution = env.load("ec2/check_al2.py").get_ec2_os_distribution(PROFILE, REGION)
+        return total, dict(sorted(distribution.items()))
+
+    def filtered_list():
+        rows = env.load("ami/filtered_ec2_list.py").get_ec2_instances(
+            PROFILE, "bench", REGION, None, [], ["running", "stopped"])
+        return sorted(rows)
+
+    def running_instances():
+        module = env.load("ck-ssm/ck-ssm.py", {"AWS_PROFILE": PROFILE})
+        return sorted(instance["InstanceId"] for instance in module.get_running_instances(REGION))
+
+    return [
+        ("check_al2.get_ec2_os_distribution", os_distribution),
+        ("filtered_ec2_list.get_ec2_instances", filtered_list),
+        ("ck-ssm.get_running_instances", running_instances),
+    ]
+
+
+def _run(env, func, partitions):
+    os.environ["EC2_SCAN_PARTITIONS"] = str(partitions)
+    before = Counter(env.fake.calls)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        result = func()
+    return result, time.perf_counter() - start, sum((env.fake.calls - before).values())
+
+
+def run_benchmark(size=DEFAULT_SIZE, partitions_list=DEFAULT_PARTITIONS, api_latency_ms=DEFAULT_API_LATENCY_MS,
+                  on_result=None):
+    """
+    단일 페이지네이션과 분할 병렬 조회(이력 없음/이전 조회 이력 사용)의 시간과 API 호출 수를 측정하고 결과가 같은지 확인합니다.
+
+    Args:
+        size (int): 가상 인벤토리 인스턴스 수
+        partitions_list (iterable): 측정할 분할 수 목록
+        api_latency_ms (int): API 호출마다 추가할 지연 시간(ms)
+        on_result (callable): 측정이 끝날 때마다 (오퍼레이션, 모드, 측정값)으로 호출되는 함수
+
+    Returns:
+        list: 실시간 조회 결과가 단일 페이지네이션과 다른 (오퍼레이션, 모드) 목록
+    """
+    env = BenchEnvironment(generate_fleet(size))
+    # API 호출마다 지연 추가 (FakeAws 응답 전에 실행)
+    env.clients["ec2"].meta.events.register_first("before-call.*.*",
+                                                  lambda **kwargs: time.sleep(api_latency_ms / 1000))
+    original = os.environ.get("EC2_SCAN_PARTITIONS")
+    mismatches = []
+    try:
+        for name, func in build_scans(env):
+            env.reset_caches()
+            func()  # AMI 캐시 준비 (조회 방식과 관계없는 describe_images 호출 제외)
+            expected, seconds, calls = _run(env, func, 0)
+            on_result and on_result(name, "serial", {"seconds": seconds, "api_calls": calls, "speedup": 1.0})
+            serial_seconds = seconds
+            for partitions in partitions_list:
+                os.remove(os.environ["EC2_PARTITION_HISTORY_PATH"]) \
+                    if os.path.exists(os.environ["EC2_PARTITION_HISTORY_PATH"]) else None
+                for mode in ("cold", "adaptive"):
+                    result, seconds, calls = _run(env, func, partitions)
+                    label = f"partitions={partitions} {mode}"
+                    if result != expected:
+                        mismatches.append((name, label))
+                    on_result and on_result(name, label, {"seconds": seconds, "api_calls": calls,
+                                                          "speedup": serial_seconds / seconds})
+    finally:
+        if original is None:
+            os.environ.pop("EC2_SCAN_PARTITIONS", None)
+        else:
+            os.environ["EC2_SCAN_PARTITIONS"] = original
+        env.close()
+    return mismatches
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="describe_instances 분할 병렬 조회(EC2_SCAN_PARTITIONS)를 단일 페이지네이션과 비교 측정합니다.")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="가상 인벤토리 인스턴스 수 (기본값: 20000)")
+    parser.add_argument("--partitions", default=",".join(map(str, DEFAULT_PARTITIONS)),
+                        help="측정할 분할 수 목록 (쉼표 구분, 기본값: 2,4,8)")
+    parser.add_argument("--api-latency-ms", type=int, default=DEFAULT_API_LATENCY_MS,
+                        help="API 호출마다 추가할 지연 시간(ms) (기본값: 200)")
+    args = parser.parse_args()
+
+    print(f"{'Operation':<38} | {'Mode':<22} | {'Time(s)':>8} | {'API calls':>9} | {'Speedup':>7}")
+    print("-" * 97)
+    mismatches = run_benchmark(
+        args.size, [int(value) for value in args.partitions.split(",") if value], args.api_latency_ms,
+        on_result=lambda name, mode, result: print(
+            f"{name:<38} | {mode:<22} | {result['seconds']:>8.2f} | {result['api_calls']:>9} | "
+            f"{result['speedup']:>6.1f}x", flush=True))
+
+    if mismatches:
+        print(f"\n[ERROR] 단일 페이지네이션과 결과가 다른 측정 {len(mismatches)}건: {mismatches}")
+        sys.exit(1)
+    print("\n[INFO] 모든 분할 조회 결과가 단일 페이지네이션과 같습니다.")
@@ -0,0 +1,135 @@
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmark.bench_scripts import RANDOM_SEED
+from common.report_history import SORT_RUN_ROWS, ReportHistory, diff_reports
+
+# 측정 기본 설정
+DEFAULT_SIZE = 100000
+DEFAULT_CHANGES = 3000
+
+# filtered_ec2_list 이력과 같은 컬럼
+COLUMNS = ["Account", "Region", "Instance ID", "Instance Name", "State", "OS", "AMI ID", "AMI Name", "Instance Type"]
+KEY_COLUMNS = ["Account", "Region", "Instance ID"]
+DIFF_COLUMNS = ["Instance Name", "State", "OS", "AMI ID", "Instance Type"]
+
+
+def _row(index, changed=False):
+    """
+    인스턴스 번호로 항상 같은 가상 행을 만듭니다. (changed면 상태/인스턴스 타입이 바뀐 행)
+    """
+    rng = random.Random(RANDOM_SEED + index)
+    state = rng.choice(["running", "running", "running", "stopped"])
+    instance_type = rng.choice(["t3.micro", "t3.large", "m5.xlarge", "c6g.2xlarge"])
+    if changed:
+        state = "stopped" if state == "running" else "running"
+        instance_type = "r6i.large"
+    image = rng.randrange(500)
+    return [f"alias{index % 7:02d}", "ap-northeast-2", f"i-{index:017x}", f"app-{index}", state,
+            rng.choice(["Amazon Linux 2", "Amazon Linux 2023", "Ubuntu 22.04 LTS", "Windows"]),
+            f"ami-{image:017x}", f"golden-{image}", instance_type]
+
+
+def iter_rows(size, changes, version):
+    """
+    보고서가 (계정, 리전) 순서로 내보내는 것처럼 키 순서와 다른 순서로 행을 생성합니다.
+    새 버전(version=1)은 changes를 추가/삭제/변경에 1/3씩 나누어 반영합니다.
+    """
+    per_kind = changes // 3
+    step = max(3, size // max(1, per_kind))
+    stride = 7919  # size와 서로소인 간격으로 순회하여 정렬되지 않은 순서를 만듦
+    while size % stride == 0:
+        stride += 2
+    for position in range(size):
+        index = position * stride % size
+        selected = index // step < per_kind
+        if version and selected and index % step == 2:
+            continue  # 삭제
+        yield _row(index, changed=bool(version and selected and index % step == 1))
+    if version:
+        for index in range(size, size + per_kind):
+            yield _row(index)  # 추가
+
+
+def _measure(func):
+    """
+    시간은 tracemalloc 없이 한 번, 최대 메모리는 tracemalloc을 켜고 한 번 더 실행하여 측정합니다.
+    """
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def run_benchmark(size=DEFAULT_SIZE, changes=DEFAULT_CHANGES, run_rows=SORT_RUN_ROWS):
+    """
+    보고서 이력 저장(외부 정렬)과 두 이력의 merge-join 비교 시간/최대 메모리를 측정하고 비교 결과를 검증합니다.
+
+    Returns:
+        dict: 측정 결과 {"write_old", "write_new", "diff"} (각 (초, 최대 메모리 바이트)), "counts", "expected"
+    """
+    workdir = tempfile.mkdtemp(prefix="bench-report-diff-")
+    try:
+        def write(version):
+            def run():
+                history = ReportHistory("ec2-list", COLUMNS, KEY_COLUMNS, DIFF_COLUMNS, workdir, run_rows)
+                for row in iter_rows(size, changes, version):
+                    history.add(row)
+                return history.close()
+            return run
+
+        old_path, write_old_seconds, write_old_peak = _measure(write(0))
+        new_path, write_new_seconds, write_new_peak = _measure(write(1))
+        counts, diff_seconds, diff_peak = _measure(
+            lambda: Counter(change for change, *_ in diff_reports(old_path, new_path)))
+        per_kind = changes // 3
+        return {
+            "write_old": (write_old_seconds, write_old_peak),
+            "write_new": (write_new_seconds, write_new_peak),
+            "diff": (diff_seconds, diff_peak),
+            "counts": counts,
+            "expected": Counter({"added": per_kind, "removed": per_kind, "changed": per_kind}),
+            "file_bytes": os.path.getsize(new_path),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="보고서 이력 저장(외부 정렬)과 merge-join 비교의 시간/메모리를 측정합니다.")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="이력 행 수 (기본값: 100000)")
+    parser.add_argument("--changes", type=int, default=DEFAULT_CHANGES,
+                        help="추가/삭제/변경 행 수의 합 (기본값: 3000)")
+    parser.add_argument("--run-rows", type=int, default=SORT_RUN_ROWS,
+                        help=f"메모리에서 한 번에 정렬하는 최대 행 수 (기본값: {SORT_RUN_ROWS})")
+    args = parser.parse_args()
+
+    result = run_benchmark(args.size, args.changes, args.run_rows)
+    print(f"Rows              : {args.size} (history file {result['file_bytes'] / 2 ** 20:.1f} MiB)")
+    for label, key in (("Write (old)", "write_old"), ("Write (new)", "write_new"), ("Diff", "diff")):
+        seconds, peak = result[key]
+        print(f"{label:<18}: {seconds:.2f}s, peak {peak / 2 ** 20:.1f} MiB")
+    counts = result["counts"]
+    print(f"Changes           : added {counts['added']}, removed {counts['removed']}, changed {counts['changed']}")
+
+    if counts != result["expected"]:
+        print(f"\n[ERROR] 비교 결과가 예상과 다릅니다: {dict(result['expected'])}")
+        sys.exit(1)
+    print("\n[INFO] 비교 결과가 예상과 같습니다.")
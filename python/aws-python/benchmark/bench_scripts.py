@@ -0,0 +1,650 @@
+import argparse
+import contextlib
+import csv
+import importlib.util
+import io
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import boto3
+from botocore.awsrequest import AWSResponse
+
+import common.aws_session
+from benchmark.bench_os_classifier import generate_ami_corpus
+
+# 벤치마크 기본 설정
+DEFAULT_SIZES = (1000, 10000, 100000)
+RANDOM_SEED = 20240819
+PROFILE = "bench"
+REGION = "ap-northeast-2"
+
+DEFAULT_REPEAT = 3
+
+# 가상 인스턴스의 PlatformDetails별 UsageOperation (그 외는 Linux/UNIX 과금 코드)
+USAGE_OPERATIONS = {
+    "Windows": "RunInstances:0002",
+    "Windows with SQL Server Standard": "RunInstances:0006",
+    "Red Hat Enterprise Linux": "RunInstances:0010",
+    "SUSE Linux": "RunInstances:000g",
+}
+
+# 기준선 비교 시 회귀로 판단하는 증가율 (시간/메모리)
+DEFAULT_THRESHOLD = 0.25
+
+
+def _page(items, params, token_in, token_out, limit_key, default_limit):
+    """
+    목록을 API 페이지 형태로 나눕니다. (토큰은 다음 항목의 위치)
+
+    Returns:
+        tuple: (현재 페이지 항목 리스트, 다음 페이지 토큰 또는 None)
+    """
+    start = int(params.get(token_in) or 0)
+    limit = params.get(limit_key) or default_limit
+    end = start + limit
+    return items[start:end], (str(end) if end < len(items) else None)
+
+
+def _wildcard_regex(pattern):
+    """
+    EC2 필터 값 와일드카드(*: 0개 이상, ?: 0~1개, \\: 이스케이프)를 정규식으로 변환합니다.
+    """
+    parts = []
+    chars = iter(pattern)
+    for char in chars:
+        if char == "\\":
+            parts.append(re.escape(next(chars, "\\")))
+        elif char == "*":
+            parts.append(".*")
+        elif char == "?":
+            parts.append(".?")
+        else:
+            parts.append(re.escape(char))
+    return re.compile("".join(parts) + r"\Z", re.S)
+
+
+class FakeAws:
+    """
+    생성된 가상 인벤토리로 EC2/SSM/IAM API 응답을 만들어 주는 오프라인 응답기입니다.
+    botocore Stubber와 같은 방식(before-parameter-build/before-call 이벤트)으로 Client에 연결되며,
+    고정 응답 큐 대신 요청 파라미터(필터, 페이지 토큰)에 따라 응답을 계산합니다.
+    API 호출 수는 (서비스, 오퍼레이션)별로 집계됩니다.
+    """
+
+    def __init__(self, fleet):
+        self.fleet = fleet
+        self.calls = Counter()
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _cached(self, key, build):
+        """
+        필터 결과 등 페이지마다 반복되는 계산을 재사용합니다. (응답기 자체의 비용이 측정값에 섞이지 않도록)
+        """
+        result = self._cache.get(key)
+        if result is None:
+            result = self._cache[key] = build()
+        return result
+
+    def invalidate(self):
+        """
+        가상 인벤토리를 변경한 뒤 재사용 중인 필터 결과를 버립니다.
+        """
+        self._cache.clear()
+
+    def attach(self, client):
+        client.meta.events.register_first("before-parameter-build.*.*", self._capture_params)
+        client.meta.events.register("before-call.*.*", self._respond)
+        return client
+
+    @staticmethod
+    def _capture_params(params, context, **kwargs):
+        context["bench_params"] = dict(params)
+
+    def _respond(self, model, context, **kwargs):
+        service = model.service_model.service_name
+        with self._lock:
+            self.calls[f"{service}:{model.name}"] += 1
+        handler = getattr(self, f"_{service}_{model.name}", None)
+        if handler is None:
+            raise NotImplementedError(f"{service}:{model.name} 응답이 정의되지 않았습니다.")
+        parsed = handler(context.get("bench_params", {}))
+        parsed.setdefault("ResponseMetadata", {"HTTPStatusCode": 200, "RetryAttempts": 0})
+        return AWSResponse(None, 200, {}, None), parsed
+
+    # ===== EC2 =====
+    @staticmethod
+    def _filters(params):
+        return {item["Name"]: item["Values"] for item in params.get("Filters", [])}
+
+    @staticmethod
+    def _filters_key(operation, filters):
+        return (operation,) + tuple(sorted((name, tuple(values)) for name, values in filters.items()))
+
+    def _filter_instances(self, filters):
+        instances = self.fleet["instances"]
+        if "instance-id" in filters:
+            ids = set(filters["instance-id"])
+            instances = [instance for instance in instances if instance["InstanceId"] in ids]
+        if "image-id" in filters:
+            ids = set(filters["image-id"])
+            instances = [instance for instance in instances if instance["ImageId"] in ids]
+        if "instance-state-name" in filters:
+            states = set(filters["instance-state-name"])
+            instances = [instance for instance in instances if instance["State"]["Name"] in states]
+        if "instance-type" in filters:
+            # 여러 와일드카드 값을 하나의 정규식으로 합쳐 인스턴스마다 한 번만 확인
+            pattern = re.compile("|".join(f"(?:{_wildcard_regex(value).pattern})" for value in filters["instance-type"]))
+            instances = [instance for instance in instances if pattern.match(instance["InstanceType"])]
+        if "availability-zone" in filters:
+            zones = set(filters["availability-zone"])
+            instances = [instance for instance in instances if instance["Placement"]["AvailabilityZone"] in zones]
+        for name, field in (("tag-key", "Key"), ("tag-value", "Value")):
+            # 키와 값은 서로 다른 태그에서 일치해도 됨 (EC2 tag-key/tag-value 필터 의미)
+            if name in filters:
+                pattern = re.compile("|".join(f"(?:{_wildcard_regex(value).pattern})" for value in filters[name]), re.S)
+                instances = [instance for instance in instances
+                             if any(pattern.match(tag[field]) for tag in instance.get("Tags", []))]
+        return instances
+
+    def _ec2_DescribeInstances(self, params):
+        filters = self._filters(params)
+        instances = self._cached(self._filters_key("instances", filters), lambda: self._filter_instances(filters))
+        page, token = _page(instances, params, "NextToken", "NextToken", "MaxResults", 1000)
+        response = {"Reservations": [{"ReservationId": f"r-{instance['InstanceId'][2:]}", "Instances": [instance]}
+                                     for instance in page]}
+        if token:
+            response["NextToken"] = token
+        return response
+
+    def _ec2_DescribeAvailabilityZones(self, params):
+        return {"AvailabilityZones": [{"ZoneName": f"{REGION}{suffix}", "ZoneType": "availability-zone",
+                                       "State": "available", "RegionName": REGION} for suffix in "abcd"]}
+
+    def _ec2_DescribeImages(self, params):
+        ids = self._filters(params).get("image-id")
+        images = self.fleet["images"]
+        if ids is not None:
+            images = [images[image_id] for image_id in ids if image_id in images]
+        else:
+            images = list(images.values())
+        return {"Images": images}
+
+    def _ec2_DescribeVolumes(self, params):
+        volumes = self.fleet["volumes"]
+        instance_ids = self._filters(params).get("attachment.instance-id")
+        if instance_ids is not None:
+            instance_ids = set(instance_ids)
+            volumes = [volume for volume in volumes
+                       if any(attachment["InstanceId"] in instance_ids for attachment in volume["Attachments"])]
+        page, token = _page(volumes, params, "NextToken", "NextToken", "MaxResults", 500)
+        response = {"Volumes": page}
+        if token:
+            response["NextToken"] = token
+        return response
+
+    def _filter_tags(self, filters):
+        # 여러 와일드카드 값(대소문자 조합 등)을 하나의 정규식으로 합쳐 태그마다 한 번만 확인
+        key_pattern, value_pattern = (
+            re.compile("|".join(f"(?:{_wildcard_regex(value).pattern})" for value in filters.get(name, ["*"])), re.S)
+            for name in ("key", "value"))
+        return [tag for tag in self.fleet["tags"]
+                if key_pattern.match(tag["Key"]) and value_pattern.match(tag["Value"])]
+
+    def _ec2_DescribeTags(self, params):
+        filters = self._filters(params)
+        tags = self._cached(self._filters_key("tags", filters), lambda: self._filter_tags(filters))
+        page, token = _page(tags, params, "NextToken", "NextToken", "MaxResults", 1000)
+        response = {"Tags": page}
+        if token:
+            response["NextToken"] = token
+        return response
+
+    # ===== SSM =====
+    def _ssm_DescribeInstanceInformation(self, params):
+        page, token = _page(self.fleet["ssm"], params, "NextToken", "NextToken", "MaxResults", 50)
+        response = {"InstanceInformationList": page}
+        if token:
+            response["NextToken"] = token
+        return response
+
+    # ===== IAM =====
+    @staticmethod
+    def _iam_page(items, params, key):
+        page, token = _page(items, params, "Marker", "Marker", "MaxItems", 100)
+        response = {key: page, "IsTruncated": token is not None}
+        if token:
+            response["Marker"] = token
+        return response
+
+    def _iam_GenerateCredentialReport(self, params):
+        return {"State": "COMPLETE"}
+
+    def _iam_GetCredentialReport(self, params):
+        return {"Content": self.fleet["credential_report"], "ReportFormat": "text/csv",
+                "GeneratedTime": self.fleet["now"]}
+
+    def _iam_ListUsers(self, params):
+        users = self._cached(("users",), lambda: [
+            {key: user[key] for key in ("UserName", "UserId", "Arn", "Path", "CreateDate")}
+            for user in self.fleet["users"]])
+        return self._iam_page(users, params, "Users")
+
+    def _iam_GetUser(self, params):
+        user = self.fleet["users_by_name"][params["UserName"]]
+        return {"User": {key: user[key] for key in ("UserName", "UserId", "Arn", "Path", "CreateDate", "Tags")}}
+
+    def _iam_ListGroupsForUser(self, params):
+        user = self.fleet["users_by_name"][params["UserName"]]
+        groups = [self.fleet["groups_by_name"][name] for name in user["GroupList"]]
+        return self._iam_page([{key: group[key] for key in ("GroupName", "GroupId", "Arn", "Path", "CreateDate")}
+                               for group in groups], params, "Groups")
+
+    def _iam_ListAccessKeys(self, params):
+        user = self.fleet["users_by_name"][params["UserName"]]
+        keys = [{"UserName": user["UserName"], "AccessKeyId": key["AccessKeyId"],
+                 "Status": key["Status"], "CreateDate": key["CreateDate"]} for key in user["AccessKeys"]]
+        return self._iam_page(keys, params, "AccessKeyMetadata")
+
+    def _iam_GetAccessKeyLastUsed(self, params):
+        key = self.fleet["access_keys"][params["AccessKeyId"]]
+        last_used = {"ServiceName": key["LastUsedService"], "Region": REGION}
+        if key["LastUsedDate"]:
+            last_used["LastUsedDate"] = key["LastUsedDate"]
+        return {"UserName": key["UserName"], "AccessKeyLastUsed": last_used}
+
+    def _iam_GetAccountAuthorizationDetails(self, params):
+        kinds = tuple(params.get("Filter") or ["User", "Group"])
+
+        def build():
+            items = []
+            if "Group" in kinds:
+                items.extend(("Group", group) for group in self.fleet["groups"])
+            if "User" in kinds:
+                items.extend(("User", {key: value for key, value in user.items() if key != "AccessKeys"})
+                             for user in self.fleet["users"])
+            return items
+
+        page, token = _page(self._cached(("authorization", kinds), build), params, "Marker", "Marker", "MaxItems", 100)
+        # 정책 문서는 after-call 핸들러가 응답 안에서 디코딩하므로 그룹은 매 응답마다 복사본 사용
+        response = {"UserDetailList": [item for kind, item in page if kind == "User"],
+                    "GroupDetailList": [dict(item, GroupPolicyList=[dict(policy) for policy in item["GroupPolicyList"]])
+                                        for kind, item in page if kind == "Group"],
+                    "RoleDetailList": [], "Policies": [], "IsTruncated": token is not None}
+        if token:
+            response["Marker"] = token
+        return response
+
+
+def generate_fleet(size, seed=RANDOM_SEED):
+    """
+    인스턴스/AMI/EBS 볼륨/SSM/IAM 사용자 수가 size 규모인 가상 인벤토리를 생성합니다.
+    (같은 시드면 같은 인벤토리)
+
+    Args:
+        size (int): 인스턴스 수 (IAM 사용자 수도 같은 규모)
+        seed (int): 난수 시드
+
+    Returns:
+        dict: FakeAws 응답 생성용 인벤토리
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+
+    # AMI: 골든 AMI 공유 분포 (일부는 등록 해제되어 describe_images에서 조회되지 않음)
+    corpus = generate_ami_corpus(size, seed)
+    images = {}
+    for image in corpus:
+        if image["ImageId"] not in images and rng.random() >= 0.02:
+            images[image["ImageId"]] = dict(image)
+
+    teams = ["DevOps", "backend", "Data", "platform", "Service Engineering"]
+    instances, tags, volumes, ssm = [], [], [], []
+    for index, image in enumerate(corpus):
+        instance_id = f"i-{index:017x}"
+        state = rng.choices(["running", "stopped", "terminated"], [80, 15, 5])[0]
+        instance_tags = {"Name": f"app-{rng.choice(['web', 'api', 'db', 'batch'])}-{index}",
+                         "Team": rng.choice(teams), "APM": rng.choice(["true", "false", "True"])}
+        instance = {
+            "InstanceId": instance_id,
+            "ImageId": image["ImageId"],
+            "InstanceType": rng.choice(["t3.micro", "t3.large", "m5.xlarge", "c6g.2xlarge", "r6i.large"]),
+            "State": {"Code": 16, "Name": state},
+            "Placement": {"AvailabilityZone": f"{REGION}{rng.choice('abcd')}"},
+            "PlatformDetails": image.get("PlatformDetails") or "Linux/UNIX",
+            "UsageOperation": USAGE_OPERATIONS.get(image.get("PlatformDetails"), "RunInstances"),
+            "Tags": [{"Key": key, "Value": value} for key, value in instance_tags.items()],
+        }
+        if image.get("Platform") == "windows":
+            instance["Platform"] = "windows"
+        instances.append(instance)
+        tags.extend({"ResourceId": instance_id, "ResourceType": "instance", "Key": key, "Value": value}
+                    for key, value in instance_tags.items())
+
+        if state != "terminated":
+            volumes.append({"VolumeId": f"vol-{index:017x}", "Encrypted": rng.random() < 0.7,
+                            "Attachments": [{"InstanceId": instance_id, "Device": "/dev/xvda", "State": "attached",
+                                             "DeleteOnTermination": True}]})
+            if rng.random() < 0.5:
+                volumes.append({"VolumeId": f"vol-d{index:016x}", "Encrypted": rng.random() < 0.6,
+                                "Attachments": [{"InstanceId": instance_id, "Device": "/dev/sdb", "State": "attached"}]})
+        if state == "running" and rng.random() < 0.85:
+            online = rng.random() < 0.9
+            # 마지막 핑 시각 (Online은 5분 이내, ConnectionLost는 1시간 이전, 난수 순서에 영향 없도록 index 사용)
+            last_ping = now - timedelta(seconds=index % 300 if online else 3600 + index % 3600)
+            ssm.append({"InstanceId": instance_id, "PingStatus": "Online" if online else "ConnectionLost",
+                        "LastPingDateTime": last_ping})
+    for index in range(size // 20):
+        volumes.append({"VolumeId": f"vol-u{index:016x}", "Encrypted": rng.random() < 0.5, "Attachments": []})
+
+    # IAM: 그룹, 사용자(태그/그룹/Access Key), 자격 증명 보고서
+    groups = []
+    for index in range(max(5, size // 50)):
+        groups.append({
+            "GroupName": f"group-{index}", "GroupId": f"AGPA{index:016d}", "Path": "/",
+            "Arn": f"arn:aws:iam::123456789012:group/group-{index}", "CreateDate": now - timedelta(days=1000),
+            "GroupPolicyList": [{"PolicyName": f"inline-{index}", "PolicyDocument": "%7B%7D"}] if index % 3 == 0 else [],
+            "AttachedManagedPolicies": [{"PolicyName": "ReadOnlyAccess",
+                                         "PolicyArn": "arn:aws:iam::aws:policy/ReadOnlyAccess"}],
+        })
+
+    users, access_keys = [], {}
+    report = io.StringIO()
+    writer = csv.writer(report)
+    writer.writerow(["user", "arn", "user_creation_time",
+                     "access_key_1_active", "access_key_1_last_rotated", "access_key_1_last_used_date",
+                     "access_key_1_last_used_service",
+                     "access_key_2_active", "access_key_2_last_rotated", "access_key_2_last_used_date",
+                     "access_key_2_last_used_service"])
+    writer.writerow(["<root_account>", "arn:aws:iam::123456789012:root", now.isoformat()]
+                    + ["false", "N/A", "N/A", "N/A"] * 2)
+    for index in range(size):
+        username = f"user{index:06d}"
+        user_tags = {"Name": f"name{index}", "Team": rng.choice(teams),
+                     "Company": "" if rng.random() < 0.3 else rng.choice(["corp", "partner"])}
+        user = {
+            "UserName": username, "UserId": f"AIDA{index:016d}", "Path": "/",
+            "Arn": f"arn:aws:iam::123456789012:user/{username}",
+            "CreateDate": now - timedelta(days=rng.randint(1, 2000)),
+            "GroupList": [group["GroupName"] for group in rng.sample(groups, rng.randint(0, 2))],
+            "Tags": [{"Key": key, "Value": value} for key, value in user_tags.items() if value],
+            "AttachedManagedPolicies": [], "UserPolicyList": [],
+            "AccessKeys": [],
+        }
+        row = [username, user["Arn"], user["CreateDate"].isoformat()]
+        for slot in (1, 2):
+            if rng.random() < (0.7 if slot == 1 else 0.2):
+                key = {
+                    "AccessKeyId": f"AKIA{index:012d}{slot:04d}", "UserName": username,
+                    "Status": "Active" if rng.random() < 0.8 else "Inactive",
+                    "CreateDate": now - timedelta(days=rng.randint(1, 400)),
+                    "LastUsedDate": now - timedelta(days=rng.randint(0, 30)) if rng.random() < 0.8 else None,
+                    "LastUsedService": rng.choice(["s3", "ec2", "sts"]),
+                }
+                user["AccessKeys"].append(key)
+                access_keys[key["AccessKeyId"]] = key
+                row += ["true" if key["Status"] == "Active" else "false", key["CreateDate"].isoformat(),
+                        key["LastUsedDate"].isoformat() if key["LastUsedDate"] else "N/A",
+                        key["LastUsedService"] if key["LastUsedDate"] else "N/A"]
+            else:
+                row += ["false", "N/A", "N/A", "N/A"]
+        writer.writerow(row)
+        users.append(user)
+
+    return {
+        "now": now,
+        "images": images,
+        "instances": instances,
+        "tags": tags,
+        "volumes": volumes,
+        "ssm": ssm,
+        "groups": groups,
+        "groups_by_name": {group["GroupName"]: group for group in groups},
+        "users": users,
+        "users_by_name": {user["UserName"]: user for user in users},
+        "access_keys": access_keys,
+        "credential_report": report.getvalue().encode("utf-8"),
+    }
+
+
+class BenchEnvironment:
+    """
+    FakeAws에 연결된 Client를 공유 Client 풀 대신 반환하고, 캐시 파일을 임시 디렉토리에 두는 실행 환경입니다.
+    """
+
+    def __init__(self, fleet):
+        self.fake = FakeAws(fleet)
+        self.workdir = tempfile.mkdtemp(prefix="aws-python-bench-")
+        session = boto3.Session(aws_access_key_id="bench", aws_secret_access_key="bench", region_name=REGION)
+        self.clients = {service: self.fake.attach(session.client(service, region_name=REGION))
+                        for service in ("ec2", "ssm", "iam")}
+
+    def get_client(self, service_name, profile_name=None, region_name=None):
+        return self.clients[service_name]
+
+    def reset_caches(self):
+        """
+        AMI 캐시/IAM 사용자 디렉토리 등 로컬 캐시를 비워 매 측정을 콜드 상태로 시작합니다.
+        """
+        for name in os.listdir(self.workdir):
+            path = os.path.join(self.workdir, name)
+            shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+        os.environ["AMI_CACHE_PATH"] = os.path.join(self.workdir, "ami_cache.sqlite3")
+        os.environ["IAM_USER_DIRECTORY_PATH"] = os.path.join(self.workdir, "iam_user_directory.json")
+        os.environ["INVENTORY_SNAPSHOT_PATH"] = os.path.join(self.workdir, "inventory_snapshot.sqlite3")
+        os.environ["EC2_PARTITION_HISTORY_PATH"] = os.path.join(self.workdir, "ec2_partitions.json")
+        os.environ["REPORT_HISTORY_DIR"] = os.path.join(self.workdir, "report_history")
+
+    def load(self, relative_path, env=None):
+        """
+        스크립트를 공유 Client 풀 대신 FakeAws Client를 사용하도록 로드합니다.
+        """
+        original_get_client = common.aws_session.get_client
+        original_env = {key: os.environ.get(key) for key in (env or {})}
+        common.aws_session.get_client = self.get_client
+        os.environ.update(env or {})
+        try:
+            name = "bench_" + re.sub(r"\W", "_", relative_path[:-3])
+            spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, relative_path))
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+        finally:
+            common.aws_session.get_client = original_get_client
+            for key, value in original_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+    def close(self):
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def build_operations(env, fleet):
+    """
+    측정할 스크립트 진입점 목록을 만듭니다.
+
+    Returns:
+        list: (오퍼레이션명, 인자 없는 호출 함수) 리스트
+    """
+    output_file = os.path.join(env.workdir, "output.csv")
+    ami_ids = list(dict.fromkeys(instance["ImageId"] for instance in fleet["instances"]))[:30]
+    profiles = {PROFILE: "bench"}
+
+    def os_distribution():
+        env.load("ec2/check_al2.py").get_ec2_os_distribution(PROFILE, REGION)
+
+    def filtered_list():
+        env.load("ami/filtered_ec2_list.py").get_ec2_instances(PROFILE, "bench", REGION, None, [], ["running"])
+
+    def filtered_list_tier():
+        env.load("ami/filtered_ec2_list.py").get_ec2_instances(PROFILE, "bench", REGION, None, [], ["running"],
+                                                               ami_names=False)
+
+    def filtered_list_tags():
+        env.load("ami/filtered_ec2_list.py").get_ec2_instances(
+            PROFILE, "bench", REGION, None, [{"key": "team", "value": "devops"}], ["running"])
+
+    def ami_usage():
+        env.load("ami/check_ami_to_ec2_mult_account.py").find_ec2_instances_with_ami(
+            [PROFILE], ami_ids, output_file, [REGION])
+
+    def ssm_check():
+        env.load("ck-ssm/ck-ssm.py", {"AWS_PROFILE": PROFILE}).run_check(REGION)
+
+    def ebs_encryption():
+        env.load("ebs/check_ebs_encryption.py").get_ebs_encryption_status(profiles, [REGION])
+
+    def iam(relative_path):
+        def run():
+            module = env.load(relative_path)
+            module.init(PROFILE)
+            module.run()
+        return run
+
+    return [
+        ("check_al2.get_ec2_os_distribution", os_distribution),
+        ("filtered_ec2_list.get_ec2_instances", filtered_list),
+        ("filtered_ec2_list.get_ec2_instances[skip-ami-names]", filtered_list_tier),
+        ("filtered_ec2_list.get_ec2_instances[tag]", filtered_list_tags),
+        ("check_ami_to_ec2_mult_account.find_ec2_instances_with_ami[30]", ami_usage),
+        ("ck-ssm.run_check", ssm_check),
+        ("check_ebs_encryption.get_ebs_encryption_status", ebs_encryption),
+        ("accesskeyexpir_ck.run", iam("awsIamControlCmd/accesskeyexpir_ck.py")),
+        ("accesskeylastused_ck.run", iam("awsIamControlCmd/accesskeylastused_ck.py")),
+        ("grouppolicyuser.run", iam("awsIamControlCmd/grouppolicyuser.py")),
+        ("userlist-nsmform.run", iam("awsIamControlCmd/userlist-nsmform.py")),
+    ]
+
+
+def measure(env, func, repeat=DEFAULT_REPEAT):
+    """
+    오퍼레이션 하나의 실행 시간, 최대 메모리, API 호출 수를 측정합니다.
+    (시간은 tracemalloc 없이 repeat회 실행한 최소값, 메모리는 tracemalloc으로 한 번 더 실행하여 측정)
+
+    Returns:
+        dict: {"seconds", "peak_bytes", "api_calls", "calls"}
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        seconds = None
+        for _ in range(repeat):
+            env.reset_caches()
+            before = Counter(env.fake.calls)
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            seconds = elapsed if seconds is None else min(seconds, elapsed)
+            calls = env.fake.calls - before
+
+        env.reset_caches()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return {"seconds": seconds, "peak_bytes": peak, "api_calls": sum(calls.values()), "calls": dict(sorted(calls.items()))}
+
+
+def run_benchmark(sizes=DEFAULT_SIZES, only=None, on_result=None, repeat=DEFAULT_REPEAT):
+    """
+    규모별 가상 인벤토리로 모든 스크립트 진입점을 측정합니다.
+
+    Args:
+        sizes (iterable): 인벤토리 규모 목록
+        only (str): 이 문자열을 포함하는 오퍼레이션만 측정 (None이면 전체)
+        on_result (callable): 측정이 끝날 때마다 (규모, 오퍼레이션, 측정값)으로 호출되는 함수
+        repeat (int): 시간 측정 반복 횟수
+
+    Returns:
+        dict: {"created_at", "python", "results": {규모: {오퍼레이션: 측정값}}}
+    """
+    results = {}
+    for size in sizes:
+        fleet = generate_fleet(size)
+        env = BenchEnvironment(fleet)
+        try:
+            results[str(size)] = {}
+            for name, func in build_operations(env, fleet):
+                if only and only not in name:
+                    continue
+                results[str(size)][name] = measure(env, func, repeat)
+                if on_result:
+                    on_result(size, name, results[str(size)][name])
+        finally:
+            env.close()
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    기준선과 현재 측정값을 비교합니다. API 호출 수 증가, 시간/메모리의 threshold 초과 증가를 회귀로 봅니다.
+
+    Returns:
+        list: (규모, 오퍼레이션, 항목, 기준값, 현재값) 회귀 리스트
+    """
+    regressions = []
+    for size, operations in current["results"].items():
+        for name, result in operations.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if base is None:
+                continue
+            if result["api_calls"] > base["api_calls"]:
+                regressions.append((size, name, "api_calls", base["api_calls"], result["api_calls"]))
+            for field in ("seconds", "peak_bytes"):
+                if base[field] and result[field] > base[field] * (1 + threshold):
+                    regressions.append((size, name, field, base[field], result[field]))
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="가상 인벤토리로 스크립트별 실행 시간/메모리/API 호출 수를 측정합니다.")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)), help="인벤토리 규모 목록 (쉼표 구분)")
+    parser.add_argument("--only", help="이 문자열을 포함하는 오퍼레이션만 측정")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="시간 측정 반복 횟수 (최소값 사용, 기본값: 3)")
+    parser.add_argument("--save", help="측정 결과를 저장할 기준선 JSON 경로")
+    parser.add_argument("--compare", help="비교할 기준선 JSON 경로 (회귀가 있으면 종료 코드 1)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="시간/메모리 회귀 판단 증가율 (기본값: 0.25)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    print(f"{'Size':>7} | {'Operation':<62} | {'Time(ms)':>10} | {'Peak(MiB)':>9} | {'API calls':>9}")
+    print("-" * 110)
+    current = run_benchmark(sizes, args.only, repeat=args.repeat, on_result=lambda size, name, result: print(
+        f"{size:>7} | {name:<62} | {result['seconds'] * 1000:>10.1f} | "
+        f"{result['peak_bytes'] / 1024 / 1024:>9.1f} | {result['api_calls']:>9}", flush=True))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump(current, file, indent=2, ensure_ascii=False)
+        print(f"\n[INFO] 기준선이 '{args.save}' 파일에 저장되었습니다.")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            regressions = compare(json.load(file), current, args.threshold)
+        if regressions:
+            print(f"\n[ERROR] 기준선 대비 회귀 {len(regressions)}건")
+            for size, name, field, base, value in regressions:
+                print(f"  {size} | {name} | {field}: {base} -> {value}")
+            sys.exit(1)
+        print("\n[INFO] 기준선 대비 회귀가 없습니다.")
@@ -1,6 +1,110 @@
-import boto3
+import http.client
+import json
 import os
-import requests
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import boto3
+
+# Lambda 컨테이너 단위로 재사용할 (서비스, 리전)별 boto3 클라이언트 캐시
+# (Lambda 배포 패키지를 단일 파일로 유지하기 위해 common.aws_session과 동일한 방식을 내장)
+_clients = {}
+_clients_lock = threading.Lock()
+
+# API 호출 비용 계측 여부 (AWS_API_METRICS 환경변수가 있으면 호출별 비용 로그 출력)
+# (common.api_metrics와 동일한 방식을 호출 단위 집계로 축약하여 내장)
+_metrics_enabled = bool(os.environ.get('AWS_API_METRICS'))
+_api_costs = {}
+_api_costs_lock = threading.Lock()
+
+def instrument_client(client):
+    """
+    클라이언트의 botocore 이벤트에 (서비스, 오퍼레이션)별 호출 수, 재시도 수, 스로틀링 수,
+    응답 바이트, 지연 시간을 집계하는 핸들러를 연결합니다.
+    
+    Args:
+        client (botocore.client.BaseClient): 계측할 클라이언트
+    """
+    service = client.meta.service_model.service_name
+
+    def stats(operation):
+        return _api_costs.setdefault(f"{service}:{operation}", {'calls': 0, 'retries': 0, 'throttles': 0, 'bytes': 0, 'seconds': 0.0})
+
+    def before_call(model, context, **kwargs):
+        context['api_metrics_operation'] = model.name
+        context['api_metrics_started'] = time.perf_counter()
+
+    def after_call(context, **kwargs):
+        started = context.pop('api_metrics_started', None)
+        if started is not None:
+            with _api_costs_lock:
+                entry = stats(context['api_metrics_operation'])
+                entry['calls'] += 1
+                entry['retries'] += context.get('retries', {}).get('attempt', 1) - 1
+                entry['seconds'] += time.perf_counter() - started
+
+    def needs_retry(operation, response=None, **kwargs):
+        # 재시도 판단에는 관여하지 않도록 항상 None 반환
+        if response is not None:
+            code = response[1].get('Error', {}).get('Code', '')
+            with _api_costs_lock:
+                entry = stats(operation.name)
+                entry['bytes'] += len(response[0].content or b'')
+                entry['throttles'] += int('Throttl' in code or code in ('RequestLimitExceeded', 'TooManyRequestsException', 'SlowDown'))
+        return None
+
+    client.meta.events.register_last('before-call.*.*', before_call)
+    client.meta.events.register('after-call.*.*', after_call)
+    client.meta.events.register('after-call-error.*.*', after_call)
+    client.meta.events.register_first('needs-retry.*.*', needs_retry)
+
+def log_api_cost(context):
+    """
+    이번 호출의 API 호출 비용을 한 줄의 JSON 로그로 출력하고 집계를 초기화합니다.
+    
+    Args:
+        context: Lambda 컨텍스트 객체
+    """
+    line = {
+        'type': 'aws_api_cost',
+        'request_id': getattr(context, 'aws_request_id', None),
+        'calls': sum(entry['calls'] for entry in _api_costs.values()),
+        'retries': sum(entry['retries'] for entry in _api_costs.values()),
+        'throttles': sum(entry['throttles'] for entry in _api_costs.values()),
+        'bytes': sum(entry['bytes'] for entry in _api_costs.values()),
+        'api_seconds': round(sum(entry['seconds'] for entry in _api_costs.values()), 3),
+        'operations': {name: entry['calls'] for name, entry in sorted(_api_costs.items())},
+    }
+    print(json.dumps(line, ensure_ascii=False))
+    _api_costs.clear()
+
+def get_client(service_name, region_name):
+    """
+    (서비스, 리전)별로 하나의 boto3 클라이언트를 생성하여 재사용합니다.
+    
+    Args:
+        service_name (str): AWS 서비스명 (예: ec2, ssm)
+        region_name (str): AWS 리전명
+    
+    Returns:
+        botocore.client.BaseClient: 캐시된 클라이언트 객체
+    """
+    key = (service_name, region_name)
+    client = _clients.get(key)
+    if client is None:
+        # 리전별 작업 스레드에서 동시에 호출되며, boto3 기본 세션은 스레드 안전하지 않으므로 잠금 안에서 생성
+        with _clients_lock:
+            client = _clients.get(key)
+            if client is None:
+                client = boto3.client(service_name, region_name=region_name)
+                if _metrics_enabled:
+                    instrument_client(client)
+                _clients[key] = client
+    return client
 
 def get_running_instances(region='ap-northeast-2'):
     """
@@ -13,7 +117,7 @@ def get_running_instances(region='ap-northeast-2'):
     Returns:
         list: 인스턴스 ID와 Name 태그를 포함한 딕셔너리 리스트
     """
-    ec2 = boto3.client('ec2', region_name=region)
+    ec2 = get_client('ec2', region)
     instances = []
     
     # 페이지네이션을 사용하여 모든 실행 중인 인스턴스 조회
@@ -45,7 +149,7 @@ def is_ssm_online(instance_id, region='ap-northeast-2'):
     Returns:
         bool: SSM 온라인 상태 여부
     """
-    ssm = boto3.client('ssm', region_name=region)
+    ssm = get_client('ssm', region)
     try:
         # SSM에서 해당 인스턴스 정보 조회
         response = ssm.describe_instance_information(
@@ -61,60 +165,602 @@ def is_ssm_online(instance_id, region='ap-northeast-2'):
         pass
     return False
 
-def send_slack_message(webhook_url, message):
+def get_ssm_ping_status_map(region='ap-northeast-2'):
+    """
+    리전의 SSM 관리형 인스턴스 정보를 한 번에 페이지 단위로 조회하여
+    인스턴스 ID별 PingStatus 조회용 딕셔너리를 만듭니다.
+    (ck-ssm.py와 동일한 로직, 조회 실패 시 예외를 그대로 전달하여 해당 리전을 검사 실패로 기록)
+    
+    Args:
+        region (str): AWS 리전명 (기본값: ap-northeast-2)
+    
+    Returns:
+        dict: {인스턴스ID: PingStatus} 딕셔너리
+    """
+    ssm = get_client('ssm', region)
+    ping_status_map = {}
+    # 페이지네이션을 사용하여 모든 관리형 인스턴스 정보 조회 (페이지당 최대 50건)
+    paginator = ssm.get_paginator('describe_instance_information')
+    for page in paginator.paginate(PaginationConfig={'PageSize': 50}):
+        for info in page.get('InstanceInformationList', []):
+            ping_status_map[info['InstanceId']] = info.get('PingStatus')
+    return ping_status_map
+
+def get_ssm_instance_info(region='ap-northeast-2'):
+    """
+    리전의 SSM 관리형 인스턴스별 PingStatus와 마지막 핑 시각을 페이지 단위로 조회합니다.
+    (변경 감시 모드용, 조회 실패 시 모든 인스턴스가 연결 끊김으로 잘못 보고되지 않도록 예외를 그대로 전달)
+    
+    Args:
+        region (str): AWS 리전명 (기본값: ap-northeast-2)
+    
+    Returns:
+        dict: {인스턴스ID: {'PingStatus': 상태, 'LastPingDateTime': datetime 또는 None}} 딕셔너리
+    """
+    ssm = get_client('ssm', region)
+    infos = {}
+    paginator = ssm.get_paginator('describe_instance_information')
+    for page in paginator.paginate(PaginationConfig={'PageSize': 50}):
+        for info in page.get('InstanceInformationList', []):
+            infos[info['InstanceId']] = {'PingStatus': info.get('PingStatus'),
+                                         'LastPingDateTime': info.get('LastPingDateTime')}
+    return infos
+
+def get_running_instances_by_ids(instance_ids, region='ap-northeast-2'):
+    """
+    지정한 인스턴스 중 실행 중인 인스턴스만 조회합니다. (종료된 ID가 있어도 오류 없이 제외되도록 필터 사용)
+    
+    Args:
+        instance_ids (iterable): 조회할 인스턴스 ID
+        region (str): AWS 리전명 (기본값: ap-northeast-2)
+    
+    Returns:
+        list: 인스턴스 ID와 Name 태그를 포함한 딕셔너리 리스트
+    """
+    ec2 = get_client('ec2', region)
+    instance_ids = sorted(instance_ids)
+    instances = []
+    # instance-id 필터 값 개수 제한을 고려하여 200개 단위로 조회
+    for i in range(0, len(instance_ids), 200):
+        filters = [{'Name': 'instance-state-name', 'Values': ['running']},
+                   {'Name': 'instance-id', 'Values': instance_ids[i:i + 200]}]
+        for page in ec2.get_paginator('describe_instances').paginate(Filters=filters):
+            for reservation in page['Reservations']:
+                for instance in reservation['Instances']:
+                    name = next((tag['Value'] for tag in instance.get('Tags', []) if tag['Key'] == 'Name'), None)
+                    instances.append({'InstanceId': instance['InstanceId'], 'Name': name})
+    return instances
+
+# Slack 메시지 1건의 최대 크기(UTF-8 바이트, Slack 권장 text 길이 4,000자 이하)
+SLACK_MAX_MESSAGE_BYTES = int(os.environ.get('SLACK_MAX_MESSAGE_BYTES', 3800))
+
+# 429/5xx/연결 오류 시 메시지별 최대 재시도 횟수와 최대 대기 시간(초)
+SLACK_MAX_RETRIES = 5
+SLACK_MAX_RETRY_WAIT = 30
+
+# Slack 웹훅 요청 1건의 최대 대기 시간(초, 전송 마감 시각이 더 가까우면 마감 시각까지)
+SLACK_REQUEST_TIMEOUT = 10
+
+# Slack 전송을 마친 뒤 상태 저장/응답 반환을 위해 Lambda 제한 시간 전에 남겨 둘 시간(ms)
+SLACK_DEADLINE_RESERVE_MS = int(os.environ.get('SLACK_DEADLINE_RESERVE_MS', 2000))
+
+# Lambda 컨테이너 단위로 재사용할 Slack 웹훅 커넥션 (requests 대신 표준 라이브러리 http.client keep-alive)
+_webhook_connections = {}
+
+def post_webhook(webhook_url, body, timeout=SLACK_REQUEST_TIMEOUT):
     """
-    Slack 웹훅을 통해 메시지를 전송합니다.
+    웹훅 URL에 JSON 본문을 POST 합니다.
+    웜 호출과 같은 호출의 여러 메시지는 하나의 keep-alive 커넥션을 재사용하여 TCP/TLS 연결 비용을 줄입니다.
+    
+    Args:
+        webhook_url (str): Slack 웹훅 URL
+        body (bytes): 전송할 JSON 본문
+        timeout (float): 연결/응답 대기 시간(초)
+    
+    Returns:
+        http.client.HTTPResponse: 본문까지 읽은 응답 객체
+    """
+    url = urlsplit(webhook_url)
+    path = url.path + ('?' + url.query if url.query else '')
+    headers = {'Content-Type': 'application/json'}
+    key = (url.scheme, url.netloc)
+
+    while True:
+        connection = _webhook_connections.get(key)
+        reused = connection is not None
+        if connection is None:
+            connection_class = http.client.HTTPSConnection if url.scheme == 'https' else http.client.HTTPConnection
+            connection = _webhook_connections[key] = connection_class(url.netloc, timeout=timeout)
+        else:
+            # 재사용하는 커넥션도 이번 요청의 대기 시간 적용
+            connection.timeout = timeout
+            if connection.sock is not None:
+                connection.sock.settimeout(timeout)
+        try:
+            connection.request('POST', path, body=body, headers=headers)
+            response = connection.getresponse()
+            # 커넥션을 재사용하려면 응답 본문을 끝까지 읽어야 함
+            response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            del _webhook_connections[key]
+            # 유휴 상태에서 서버가 끊은 커넥션이면 새 커넥션으로 한 번 더 전송
+            if reused:
+                continue
+            raise
+        if response.will_close:
+            connection.close()
+            del _webhook_connections[key]
+        return response
+
+def parse_retry_after(value, default):
+    """
+    Retry-After 헤더 값을 대기 시간(초)으로 변환합니다.
+    초 단위 숫자와 HTTP-date 형식을 지원하며, 해석할 수 없거나 없는 값이면 default를 반환합니다.
+    
+    Args:
+        value (str): Retry-After 헤더 값
+        default (float): 기본 대기 시간(초)
+    
+    Returns:
+        float: 대기 시간(초)
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return default
+    if retry_at is None:
+        return default
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+def send_slack_message(webhook_url, message, max_retries=SLACK_MAX_RETRIES, deadline=None):
+    """
+    Slack 웹훅을 통해 메시지 1건을 전송합니다.
+    429 응답은 Retry-After 헤더만큼, 5xx 응답과 연결 오류는 지수 백오프로 기다린 뒤 재시도합니다.
+    deadline이 있으면 마감 시각을 넘겨 기다리거나 요청하지 않고 실패로 처리합니다. (Lambda 제한 시간에 강제 종료되지 않도록)
     
     Args:
         webhook_url (str): Slack 웹훅 URL
         message (str): 전송할 메시지
+        max_retries (int): 최대 재시도 횟수
+        deadline (float): 전송 마감 시각 (time.monotonic() 기준, None이면 제한 없음)
     
     Returns:
         bool: 메시지 전송 성공 여부
     """
-    payload = {"text": message}
-    response = requests.post(webhook_url, json=payload)
-    return response.status_code == 200
+    body = json.dumps({"text": message}).encode('utf-8')
+    for attempt in range(max_retries + 1):
+        backoff = min(2 ** attempt, SLACK_MAX_RETRY_WAIT)
+        timeout = SLACK_REQUEST_TIMEOUT
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+            if timeout <= 0:
+                print("[ERROR] Slack 전송 실패: 제한 시간 부족으로 전송하지 않음")
+                return False
+        try:
+            response = post_webhook(webhook_url, body, timeout)
+        except (http.client.HTTPException, OSError) as e:
+            print(f"[WARN] Slack 전송 실패 (시도 {attempt + 1}/{max_retries + 1}): {e}")
+        else:
+            if response.status == 200:
+                return True
+            if response.status == 429:
+                # Slack 레이트 리밋: Retry-After(초)만큼 대기
+                backoff = min(parse_retry_after(response.getheader('Retry-After'), backoff), SLACK_MAX_RETRY_WAIT)
+            elif response.status < 500:
+                # 재시도해도 성공할 수 없는 요청 (잘못된 URL, 메시지 형식 오류 등)
+                print(f"[ERROR] Slack 전송 거부: HTTP {response.status}")
+                return False
+            print(f"[WARN] Slack 전송 지연: HTTP {response.status} (시도 {attempt + 1}/{max_retries + 1})")
+        if attempt < max_retries:
+            if deadline is not None and time.monotonic() + backoff >= deadline:
+                print(f"[ERROR] Slack 전송 실패: 재시도 대기({backoff:.0f}s)가 제한 시간을 넘어 재시도 중단")
+                return False
+            time.sleep(backoff)
+    return False
+
+def iter_message_chunks(header, lines, max_bytes=SLACK_MAX_MESSAGE_BYTES):
+    """
+    메시지 줄을 순서대로 이어 붙이며 max_bytes 이하의 메시지 단위로 나눕니다.
+    줄 목록을 한 번에 합치지 않고 스트림으로 처리하며, 두 번째 메시지부터는 머리말에 순번을 붙입니다.
+    
+    Args:
+        header (str): 각 메시지의 머리말
+        lines (iterable): 메시지 본문 줄 (제너레이터 가능)
+        max_bytes (int): 메시지 1건의 최대 UTF-8 바이트
+    
+    Yields:
+        str: 크기 제한 이하의 메시지
+    """
+    chunk = [header]
+    size = len(header.encode('utf-8'))
+    count = 1
+    for line in lines:
+        line_size = len(line.encode('utf-8')) + 1
+        if size + line_size > max_bytes and len(chunk) > 1:
+            yield "\n".join(chunk)
+            count += 1
+            chunk = [f"{header} ({count})"]
+            size = len(chunk[0].encode('utf-8'))
+        # 한 줄이 제한보다 긴 경우 잘라서 전송
+        if size + line_size > max_bytes:
+            line = line.encode('utf-8')[:max_bytes - size - 4].decode('utf-8', 'ignore') + '…'
+            line_size = len(line.encode('utf-8')) + 1
+        chunk.append(line)
+        size += line_size
+    if len(chunk) > 1:
+        yield "\n".join(chunk)
+
+def deliver_slack_messages(webhook_url, header, lines, deadline=None):
+    """
+    메시지 줄을 크기 제한 단위로 나누어 하나의 keep-alive 커넥션으로 순서대로 전송합니다.
+    
+    Args:
+        webhook_url (str): Slack 웹훅 URL
+        header (str): 각 메시지의 머리말
+        lines (iterable): 메시지 본문 줄
+        deadline (float): 전송 마감 시각 (time.monotonic() 기준, 넘으면 남은 메시지는 실패로 집계)
+    
+    Returns:
+        dict: 전송 성공 메시지 수(messages), 전송 바이트(bytes), 실패 메시지 수(failed)
+    """
+    result = {"messages": 0, "bytes": 0, "failed": 0}
+    for message in iter_message_chunks(header, lines):
+        if send_slack_message(webhook_url, message, deadline=deadline):
+            result["messages"] += 1
+            result["bytes"] += len(message.encode('utf-8'))
+        else:
+            result["failed"] += 1
+    return result
+
+# 감시 모드 (full: 매번 전체 목록 전송, changes: 이전 실행 대비 변경 사항만 전송)
+SSM_WATCH_MODE = os.environ.get('SSM_WATCH_MODE', 'full')
+
+# 변경 감시 상태 저장 위치 (파일 경로 또는 s3://bucket/key)
+SSM_STATE_URI = os.environ.get('SSM_STATE_URI', '/tmp/ssm_watch_state.json')
+
+# 마지막 핑이 이 시간(초) 이내인 Online 인스턴스는 실행 중으로 간주하여 EC2 재조회 생략
+SSM_PING_FRESH_SECONDS = int(os.environ.get('SSM_PING_FRESH_SECONDS', 600))
+
+# 새로 생성된 (SSM 미등록) 인스턴스 발견을 위한 EC2 전체 조회 주기(초)
+SSM_FULL_SWEEP_SECONDS = int(os.environ.get('SSM_FULL_SWEEP_SECONDS', 3600))
+
+class FileStateStore:
+    """
+    감시 상태를 로컬 JSON 파일에 저장합니다. (Lambda에서는 /tmp, 컨테이너가 바뀌면 초기화됨)
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, state):
+        # 임시 파일에 쓴 뒤 교체하여 중간에 중단되어도 이전 상태 유지
+        temp_path = self.path + '.tmp'
+        # json.dump는 순수 파이썬 인코더를 사용하므로 C 인코더를 쓰는 json.dumps로 한 번에 기록
+        with open(temp_path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps(state))
+        os.replace(temp_path, self.path)
+
+class S3StateStore:
+    """
+    감시 상태를 S3 객체(JSON)에 저장합니다. (컨테이너가 바뀌어도 상태 유지)
+    """
+
+    def __init__(self, bucket, key, region_name=None):
+        self.bucket = bucket
+        self.key = key
+        self.region_name = region_name
+
+    def load(self):
+        s3 = get_client('s3', self.region_name)
+        try:
+            return json.loads(s3.get_object(Bucket=self.bucket, Key=self.key)['Body'].read())
+        except s3.exceptions.NoSuchKey:
+            return {}
+
+    def save(self, state):
+        get_client('s3', self.region_name).put_object(
+            Bucket=self.bucket, Key=self.key, Body=json.dumps(state).encode('utf-8'), ContentType='application/json')
+
+def open_state_store(uri):
+    """
+    상태 저장 위치 URI에 맞는 상태 저장소를 생성합니다.
+    
+    Args:
+        uri (str): 파일 경로(file:// 생략 가능) 또는 s3://bucket/key
+    
+    Returns:
+        FileStateStore | S3StateStore: load()/save(state)를 제공하는 상태 저장소
+    """
+    url = urlsplit(uri)
+    if url.scheme == 's3':
+        return S3StateStore(url.netloc, url.path.lstrip('/'))
+    return FileStateStore(url.path if url.scheme == 'file' else uri)
+
+def watch_changes(region, previous, now):
+    """
+    이전 실행의 인스턴스별 PingStatus와 현재 상태를 비교하여 변경 사항을 계산합니다.
+    마지막 핑이 신선한 기존 Online 인스턴스는 EC2를 다시 조회하지 않고, 그 외 기존 인스턴스와
+    새로 SSM에 나타난 인스턴스만 ID로 조회합니다. (SSM_FULL_SWEEP_SECONDS마다 EC2 전체 조회)
+    
+    Args:
+        region (str): AWS 리전명
+        previous (dict): 이전 실행의 리전 상태 (None이면 첫 실행)
+        now (datetime): 현재 시각 (UTC)
+    
+    Returns:
+        tuple: (새 리전 상태, 변경 사항 리스트, EC2 조회 방식)
+               변경 사항은 (종류, 인스턴스ID, 이름, 이전 상태, 현재 상태) 튜플 (종류: new, changed, gone)
+    """
+    ssm_infos = get_ssm_instance_info(region)
+    known = (previous or {}).get('instances', {})
+    full_sweep_at = (previous or {}).get('full_sweep_at')
+    full_sweep = (previous is None or full_sweep_at is None
+                  or now - datetime.fromisoformat(full_sweep_at) >= timedelta(seconds=SSM_FULL_SWEEP_SECONDS))
+
+    if not full_sweep:
+        fresh = {instance_id for instance_id, info in ssm_infos.items()
+                 if info['PingStatus'] == 'Online' and info['LastPingDateTime']
+                 and now - info['LastPingDateTime'] <= timedelta(seconds=SSM_PING_FRESH_SECONDS)}
+        recheck_ids = (known.keys() - fresh) | (fresh - known.keys())
+        # ID 조회(200개/호출)가 전체 조회(1000개/페이지)보다 호출 수가 많으면 전체 조회
+        full_sweep = -(-len(recheck_ids) // 200) >= -(-len(known) // 1000)
+
+    if full_sweep:
+        instances = get_running_instances(region)
+        full_sweep_at = now.isoformat()
+    else:
+        # 신선한 핑이 있는 기존 인스턴스는 실행 중으로 간주 (이름은 이전 상태 사용)
+        instances = [{'InstanceId': instance_id, 'Name': known[instance_id]['name']}
+                     for instance_id in fresh & known.keys()]
+        instances += get_running_instances_by_ids(recheck_ids, region)
+
+    current = {}
+    for inst in instances:
+        info = ssm_infos.get(inst['InstanceId'], {})
+        last_ping = info.get('LastPingDateTime')
+        current[inst['InstanceId']] = {'name': inst['Name'], 'ping': info.get('PingStatus'),
+                                       'last_ping': last_ping.isoformat() if last_ping else None,
+                                       'last_seen': now.isoformat()}
+
+    changes = []
+    for instance_id, entry in current.items():
+        before = known.get(instance_id)
+        if before is None:
+            # 첫 실행은 기준선이므로 연결 가능한 인스턴스만 알림
+            if previous is not None or entry['ping'] == 'Online':
+                changes.append(('new', instance_id, entry['name'], None, entry['ping']))
+        elif before['ping'] != entry['ping']:
+            changes.append(('changed', instance_id, entry['name'], before['ping'], entry['ping']))
+    for instance_id in known.keys() - current.keys():
+        changes.append(('gone', instance_id, known[instance_id]['name'], known[instance_id]['ping'], None))
+
+    region_state = {'instances': current, 'full_sweep_at': full_sweep_at, 'updated_at': now.isoformat()}
+    return region_state, changes, 'full' if full_sweep else 'incremental'
+
+def format_change(change):
+    """
+    변경 사항을 Slack 메시지 한 줄로 만듭니다.
+    """
+    kind, instance_id, name, before, after = change
+    if kind == 'new':
+        return f"🆕 {instance_id} ({name}): {after or 'SSM 미등록'}"
+    if kind == 'gone':
+        return f"⚫ {instance_id} ({name}): 실행 중 목록에서 사라짐 (중지/종료)"
+    icon = '🟢' if after == 'Online' else '🔴'
+    return f"{icon} {instance_id} ({name}): {before or 'SSM 미등록'} → {after or 'SSM 미등록'}"
+
+# 변경 감시 상태 저장소 (컨테이너 단위로 한 번 생성)
+_state_store = None
+
+def get_state_store():
+    global _state_store
+    if _state_store is None:
+        _state_store = open_state_store(SSM_STATE_URI)
+    return _state_store
+
+# 검사할 리전 목록 (쉼표로 구분, 이벤트의 regions 값이 있으면 우선)
+SSM_REGIONS = [region.strip() for region in os.environ.get('SSM_REGIONS', 'ap-northeast-2').split(',')
+               if region.strip()]
+
+# 동시에 검사할 최대 리전 수
+SSM_MAX_WORKERS = int(os.environ.get('SSM_MAX_WORKERS', 4))
+
+# 제한 시간 전에 Slack 전송/상태 저장을 마칠 수 있도록 남겨 둘 시간(ms)
+SSM_DEADLINE_MARGIN_MS = int(os.environ.get('SSM_DEADLINE_MARGIN_MS', 10000))
+
+def check_region(region, previous, now):
+    """
+    리전 하나의 SSM 연결 상태를 검사합니다. (리전별 작업 스레드에서 실행)
+    
+    Args:
+        region (str): AWS 리전명
+        previous (dict): 변경 감시 모드의 이전 리전 상태 (None이면 첫 실행)
+        now (datetime): 현재 시각 (UTC)
+    
+    Returns:
+        dict: Slack 머리말(header)/본문 줄(lines), 확인/온라인 인스턴스 수, 변경 감시 모드의 새 리전 상태(state)
+    """
+    if SSM_WATCH_MODE == 'changes':
+        # 이전 상태와 비교하여 변경 사항만 전송
+        region_state, changes, sweep = watch_changes(region, previous, now)
+        return {
+            "header": f"🔄 Session Manager 연결 상태 변경 ({region}):",
+            "lines": [format_change(change) for change in changes],
+            "state": region_state,
+            "checked": len(region_state['instances']),
+            "online": sum(1 for entry in region_state['instances'].values() if entry['ping'] == 'Online'),
+            "changes": len(changes),
+            "sweep": sweep,
+        }
+
+    # 실행 중인 모든 인스턴스 조회
+    instances = get_running_instances(region)
+    # SSM 관리형 인스턴스 정보를 일괄 조회한 뒤 메모리에서 조인
+    ping_status_map = get_ssm_ping_status_map(region)
+    online_instances = [inst for inst in instances if ping_status_map.get(inst['InstanceId']) == 'Online']
+    return {
+        "header": f"🟢 Session Manager 연결 가능한 EC2 인스턴스 목록 ({region}):",
+        "lines": [f"- {inst['InstanceId']} ({inst['Name']})" for inst in online_instances],
+        "checked": len(instances),
+        "online": len(online_instances),
+    }
+
+def sweep_regions(regions, context, check, on_complete, estimates=None,
+                  max_workers=SSM_MAX_WORKERS, margin_ms=SSM_DEADLINE_MARGIN_MS):
+    """
+    리전들을 동시에 검사하면서 Lambda 남은 실행 시간을 확인하여, 제한 시간 전에 끝낼 수 없는 리전은 시작하지 않습니다.
+    리전 예상 소요 시간은 이전 실행의 소요 시간(estimates)과 이번 실행에서 가장 오래 걸린 리전 중 큰 값을 사용합니다.
+    
+    Args:
+        regions (list): 검사할 리전 목록 (앞에서부터 시작)
+        context: Lambda 컨텍스트 객체 (get_remaining_time_in_millis 사용)
+        check (callable): 리전을 받아 검사 결과를 반환하는 함수 (작업 스레드에서 실행)
+        on_complete (callable): (리전, 결과, 예외, 소요 시간 ms)를 받는 함수 (완료되는 순서대로 호출 스레드에서 실행)
+        estimates (dict): 리전별 예상 소요 시간(ms)
+        max_workers (int): 동시에 검사할 최대 리전 수
+        margin_ms (int): 제한 시간 전에 남겨 둘 시간(ms)
+    
+    Returns:
+        list: 시작하지 못했거나 제한 시간 안에 끝나지 않은 리전 목록
+    """
+    estimates = estimates or {}
+    queue = list(regions)
+    running = {}
+    observed_ms = 0
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(queue))))
+    try:
+        while queue or running:
+            # 남은 시간 안에 끝낼 수 있는 리전만 빈 작업 스레드에 배정
+            while queue and len(running) < max_workers:
+                budget_ms = context.get_remaining_time_in_millis() - margin_ms
+                if budget_ms <= max(estimates.get(queue[0], 0), observed_ms):
+                    break
+                region = queue.pop(0)
+                running[executor.submit(check, region)] = (region, time.monotonic())
+            if not running:
+                break
+
+            budget_ms = context.get_remaining_time_in_millis() - margin_ms
+            done, _ = wait(running, timeout=max(0, budget_ms) / 1000, return_when=FIRST_COMPLETED)
+            if not done:
+                # 제한 시간 도달: 검사 중인 리전의 결과는 기다리지 않음
+                break
+            for future in done:
+                region, started = running.pop(future)
+                duration_ms = int((time.monotonic() - started) * 1000)
+                observed_ms = max(observed_ms, duration_ms)
+                error = future.exception()
+                on_complete(region, None if error else future.result(), error, duration_ms)
+    finally:
+        # 대기 중인 작업은 취소하고 검사 중인 작업은 기다리지 않음
+        executor.shutdown(wait=False, cancel_futures=True)
+    return [region for region, _ in running.values()] + queue
 
 def lambda_handler(event, context):
     """
     AWS Lambda 함수의 메인 핸들러입니다.
-    SSM에 연결 가능한 인스턴스 목록을 Slack으로 전송합니다.
+    SSM_REGIONS의 리전들을 동시에 검사하여 SSM에 연결 가능한 인스턴스 목록을 리전별로 Slack에 전송합니다.
+    SSM_WATCH_MODE=changes이면 이전 실행 대비 변경 사항(새 인스턴스, 상태 변경, 중지/종료)만 전송합니다.
+    
+    남은 실행 시간이 부족하면 새 리전 검사를 시작하지 않고 완료된 리전까지의 결과를 반환합니다.
+    리전별 완료 시각은 상태 저장소에 기록하여, 다음 실행에서 가장 오래전에 완료된(또는 미완료) 리전부터 검사합니다.
     
     Args:
-        event: Lambda 이벤트 객체
+        event: Lambda 이벤트 객체 (regions 값으로 검사할 리전 지정 가능)
         context: Lambda 컨텍스트 객체
     
     Returns:
-        dict: 확인된 인스턴스 수와 온라인 인스턴스 수를 포함한 응답
+        dict: 확인된 인스턴스 수와 온라인 인스턴스 수, 리전별 완료 여부, Slack 전송 결과를 포함한 응답
     """
     # 검사할 AWS 리전 설정
-    region = 'ap-northeast-2'
+    regions = (event or {}).get('regions') or SSM_REGIONS
     
     # 환경변수에서 Slack 웹훅 URL 가져오기
     slack_url = os.environ.get('SLACK_WEBHOOK_URL')
     if not slack_url:
         raise RuntimeError("SLACK_WEBHOOK_URL 환경변수가 필요합니다.")
 
-    # 실행 중인 모든 인스턴스 조회
-    instances = get_running_instances(region)
-    online_instances = []
-    
-    # 각 인스턴스의 SSM 연결 상태 확인
-    for inst in instances:
-        if is_ssm_online(inst['InstanceId'], region):
-            online_instances.append(inst)
+    # 리전별 진행 상황 (완료 시각, 소요 시간)과 변경 감시 상태 불러오기
+    store = get_state_store()
+    state = store.load()
+    progress = state.setdefault('progress', {})
+    region_states = state.setdefault('regions', {})
+    now = datetime.now(timezone.utc)
+
+    # 이전 실행에서 완료하지 못한 리전, 가장 오래전에 완료된 리전 순서로 검사 (설정 순서 유지)
+    regions = sorted(regions, key=lambda region: progress.get(region, {}).get('completed_at') or '')
+    estimates = {region: entry['duration_ms'] for region, entry in progress.items() if 'duration_ms' in entry}
+
+    result = {"checked": 0, "online": 0, "regions_completed": [], "regions_failed": []}
+    if SSM_WATCH_MODE == 'changes':
+        result.update({"changes": 0, "sweep": {}})
+    delivery = {"messages": 0, "bytes": 0, "failed": 0}
+    # Slack 전송 마감 시각 (재시도 대기가 Lambda 제한 시간을 넘지 않도록, 상태 저장 시간은 남겨 둠)
+    slack_deadline = time.monotonic() + (context.get_remaining_time_in_millis() - SLACK_DEADLINE_RESERVE_MS) / 1000
+
+    def on_complete(region, region_result, error, duration_ms):
+        # 리전 검사가 끝나는 순서대로 Slack 전송 후 진행 상황 저장 (호출 스레드에서 실행)
+        if error is not None:
+            print(f"[ERROR] {region} 검사 실패: {error}")
+            result["regions_failed"].append(region)
+            return
+        sent = deliver_slack_messages(slack_url, region_result["header"], region_result["lines"], slack_deadline)
+        for key in delivery:
+            delivery[key] += sent[key]
+        result["checked"] += region_result["checked"]
+        result["online"] += region_result["online"]
+        if SSM_WATCH_MODE == 'changes':
+            result["changes"] += region_result["changes"]
+            result["sweep"][region] = region_result["sweep"]
+        # 알림을 모두 전송한 경우에만 완료로 기록 (실패 시 다음 실행에서 먼저 다시 검사)
+        if sent["failed"]:
+            return
+        if "state" in region_result:
+            region_states[region] = region_result["state"]
+        progress[region] = {"completed_at": datetime.now(timezone.utc).isoformat(), "duration_ms": duration_ms}
+        store.save(state)
+        result["regions_completed"].append(region)
 
-    # SSM 연결 가능한 인스턴스가 있으면 Slack 메시지 전송
-    if online_instances:
-        msg_lines = ["🟢 Session Manager 연결 가능한 EC2 인스턴스 목록:"]
-        for inst in online_instances:
-            msg_lines.append(f"- {inst['InstanceId']} ({inst['Name']})")
-        message = "\n".join(msg_lines)
-        send_slack_message(slack_url, message)
+    result["regions_pending"] = sweep_regions(
+        regions, context, lambda region: check_region(region, region_states.get(region), now), on_complete, estimates)
+    result["partial"] = bool(result["regions_pending"] or result["regions_failed"])
+
+    # 일부 리전만 완료된 경우 미완료 리전 알림 (남겨 둔 시간 안에 전송)
+    if result["partial"]:
+        lines = [f"- 미검사 (제한 시간): {region}" for region in result["regions_pending"]]
+        lines += [f"- 검사 실패: {region}" for region in result["regions_failed"]]
+        sent = deliver_slack_messages(
+            slack_url, f"⏱ 일부 리전 미완료 (완료 {len(result['regions_completed'])}/{len(regions)}, 다음 실행에서 먼저 검사):",
+            lines, slack_deadline)
+        for key in delivery:
+            delivery[key] += sent[key]
+
+    # 호출별 API 비용 로그 (CloudWatch Logs Insights에서 type=aws_api_cost로 집계)
+    if _metrics_enabled:
+        log_api_cost(context)
+
+    # 전송에 실패한 메시지가 있으면 호출을 실패로 처리 (성공으로 보고하지 않음)
+    if delivery["failed"]:
+        raise RuntimeError(f"Slack 메시지 {delivery['failed']}건 전송 실패 "
+                           f"(성공 {delivery['messages']}건, {delivery['bytes']} bytes)")
 
     # 실행 결과 반환
-    return {
-        "checked": len(instances),
-        "online": len(online_instances)
-    }
\ No newline at end of file
+    result["slack_messages"] = delivery["messages"]
+    result["slack_bytes"] = delivery["bytes"]
+    return result
@@ -1,13 +1,15 @@
-import boto3
 import os
+import sys
 
-# 환경변수에서 AWS 프로필 읽기
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.aws_session import get_client
+from common.ec2_inventory import scan_instances
+from common.inventory_snapshot import InventorySnapshot
+
+# 환경변수에서 AWS 프로필 읽기 (cli/aws_report.py ssm --profile로 실행하면 해당 프로필로 대체)
 profile = os.environ.get("AWS_PROFILE")
-if not profile:
-    raise RuntimeError("AWS_PROFILE 환경변수가 설정되어 있지 않습니다.")
 
-# AWS 세션 생성
-session = boto3.Session(profile_name=profile)
 
 def get_running_instances(region='ap-northeast-2'):
     """
@@ -19,24 +21,12 @@ def get_running_instances(region='ap-northeast-2'):
     Returns:
         list: 인스턴스 ID와 Name 태그를 포함한 딕셔너리 리스트
     """
-    ec2 = session.client('ec2', region_name=region)
+    ec2 = get_client('ec2', profile, region)
     instances = []
     
-    # 페이지네이션을 사용하여 모든 실행 중인 인스턴스 조회
-    paginator = ec2.get_paginator('describe_instances')
-    for page in paginator.paginate(Filters=[{'Name': 'instance-state-name', 'Values': ['running']}]):
-        for reservation in page['Reservations']:
-            for instance in reservation['Instances']:
-                instance_id = instance['InstanceId']
-                name = None
-                
-                # 인스턴스의 Name 태그 추출
-                for tag in instance.get('Tags', []):
-                    if tag['Key'] == 'Name':
-                        name = tag['Value']
-                        break
-                
-                instances.append({'InstanceId': instance_id, 'Name': name})
+    # 페이지네이션을 사용하여 모든 실행 중인 인스턴스 조회 (EC2_SCAN_PARTITIONS가 설정되면 분할 병렬 조회)
+    for instance in scan_instances(ec2, [{'Name': 'instance-state-name', 'Values': ['running']}], f"{profile}|{region}"):
+        instances.append({'InstanceId': instance['InstanceId'], 'Name': instance['Name']})
     return instances
 
 def is_ssm_online(instance_id, region='ap-northeast-2'):
@@ -50,7 +40,7 @@ def is_ssm_online(instance_id, region='ap-northeast-2'):
     Returns:
         bool: SSM 온라인 상태 여부
     """
-    ssm = session.client('ssm', region_name=region)
+    ssm = get_client('ssm', profile, region)
     try:
         # SSM에서 해당 인스턴스 정보 조회
         response = ssm.describe_instance_information(
@@ -66,23 +56,56 @@ def is_ssm_online(instance_id, region='ap-northeast-2'):
         pass
     return False
 
-def run_check(region='ap-northeast-2'):
+def get_ssm_ping_status_map(region='ap-northeast-2'):
+    """
+    리전의 SSM 관리형 인스턴스 정보를 한 번에 페이지 단위로 조회하여
+    인스턴스 ID별 PingStatus 조회용 딕셔너리를 만듭니다.
+    (인스턴스마다 describe_instance_information을 호출하지 않도록 일괄 조회)
+    조회 실패(권한 부족, 재시도 후에도 스로틀링 등) 시 모든 인스턴스가 연결 불가로 잘못 보고되지 않도록
+    예외를 그대로 전달합니다.
+    
+    Args:
+        region (str): AWS 리전명 (기본값: ap-northeast-2)
+    
+    Returns:
+        dict: {인스턴스ID: PingStatus} 딕셔너리
+    
+    Raises:
+        botocore.exceptions.ClientError: SSM 조회 실패 (AccessDeniedException, ThrottlingException 등)
+    """
+    ssm = get_client('ssm', profile, region)
+    ping_status_map = {}
+    # 페이지네이션을 사용하여 모든 관리형 인스턴스 정보 조회 (페이지당 최대 50건)
+    paginator = ssm.get_paginator('describe_instance_information')
+    for page in paginator.paginate(PaginationConfig={'PageSize': 50}):
+        for info in page.get('InstanceInformationList', []):
+            ping_status_map[info['InstanceId']] = info.get('PingStatus')
+    return ping_status_map
+
+def run_check(region='ap-northeast-2', snapshot=None):
     """
     지정된 리전의 모든 실행 중인 인스턴스에 대해 SSM 연결 상태를 확인합니다.
     
     Args:
         region (str): AWS 리전명 (기본값: ap-northeast-2)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 조회)
     
     Returns:
         list: (인스턴스ID, 이름, 상태) 튜플의 리스트
     """
-    instances = get_running_instances(region)
+    if snapshot is not None:
+        instances = snapshot.iter_instances(profile, region, ['running'])
+        ping_status_map = snapshot.get_ssm_ping_status_map(profile, region)
+    else:
+        instances = get_running_instances(region)
+        # SSM 관리형 인스턴스 정보를 일괄 조회 (API 호출 수: 인스턴스 수 -> 페이지 수)
+        ping_status_map = get_ssm_ping_status_map(region)
     results = []
     
     for inst in instances:
         instance_id = inst['InstanceId']
         name = inst['Name']
-        ssm_online = is_ssm_online(instance_id, region)
+        ssm_online = ping_status_map.get(instance_id) == 'Online'
         
         # 연결 상태에 따른 시각적 표시
         if ssm_online:
@@ -94,11 +117,17 @@ def run_check(region='ap-northeast-2'):
     return results
 
 if __name__ == '__main__':
+    if not profile:
+        raise RuntimeError("AWS_PROFILE 환경변수가 설정되어 있지 않습니다.")
+    
     # 기본 리전 설정
     region = 'ap-northeast-2'
     
+    # 인벤토리 스냅샷 사용 여부 (USE_INVENTORY_SNAPSHOT=1이면 수집된 스냅샷에서 API 호출 없이 조회)
+    snapshot = InventorySnapshot() if os.environ.get("USE_INVENTORY_SNAPSHOT") == "1" else None
+    
     # SSM 연결 상태 확인 실행
-    ssm_status = run_check(region)
+    ssm_status = run_check(region, snapshot)
     
     # 결과 출력
     for iid, name, stat in ssm_status:
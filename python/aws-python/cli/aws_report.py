@@ -0,0 +1,319 @@
+import argparse
+import os
+import shlex
+import sys
+
+# 공통 모듈(python/aws-python/common) 및 스크립트 경로
+# (boto3 등 무거운 모듈은 서브커맨드 실행 시점에만 import 하므로 --help와 인자 오류는 즉시 반환)
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+# 서브커맨드별 스크립트 경로 (python/aws-python 기준)
+SCRIPTS = {
+    "al2": "ec2/check_al2.py",
+    "ebs": "ebs/check_ebs_encryption.py",
+    "ami-usage": "ami/check_ami_to_ec2.py",
+    "ami-usage-multi": "ami/check_ami_to_ec2_mult_account.py",
+    "ec2-list": "ami/filtered_ec2_list.py",
+    "ssm": "ck-ssm/ck-ssm.py",
+    "iam-keys-expire": "awsIamControlCmd/accesskeyexpir_ck.py",
+    "iam-keys-last-used": "awsIamControlCmd/accesskeylastused_ck.py",
+    "iam-groups": "awsIamControlCmd/grouppolicyuser.py",
+    "iam-users": "awsIamControlCmd/userlist-nsmform.py",
+    "diff": "snapshot/diff_reports.py",
+}
+
+# 한 프로세스에서 로드한 스크립트 모듈 캐시 (여러 보고서를 연속 실행할 때 모듈/세션 재사용)
+_modules = {}
+
+
+def load_script(name):
+    """
+    서브커맨드에 해당하는 스크립트를 모듈로 로드합니다. (파일명에 '-'가 있어도 로드 가능, 한 번만 로드)
+
+    Args:
+        name (str): SCRIPTS의 키
+
+    Returns:
+        module: 로드된 스크립트 모듈
+    """
+    module = _modules.get(name)
+    if module is None:
+        import importlib.util
+
+        path = os.path.join(BASE_DIR, SCRIPTS[name])
+        module_name = "aws_report_" + os.path.splitext(os.path.basename(path))[0].replace("-", "_")
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _modules[name] = module
+    return module
+
+
+def parse_profiles(values):
+    """
+    --profile 인자 목록을 {프로필명: 별칭} 딕셔너리로 변환합니다. (profile=alias 형식, 별칭 생략 시 프로필명)
+
+    Args:
+        values (list): --profile 인자 목록
+
+    Returns:
+        dict: 프로필명과 별칭의 매핑 딕셔너리 (입력 순서 유지)
+    """
+    profiles = {}
+    for value in values or []:
+        profile, _, alias = value.partition("=")
+        profiles[profile.strip()] = alias.strip() or profile.strip()
+    return profiles
+
+
+def resolve_profiles(args):
+    """
+    --profile 인자와 --accounts 계정 목록(Organizations 또는 계정 파일)을 합쳐 {프로필명: 별칭} 딕셔너리로 반환합니다.
+    --accounts 계정은 common/account_broker.py가 AssumeRole 한 임시 자격 증명(디스크 캐시 재사용)으로 조회합니다.
+    """
+    profiles = parse_profiles(args.profile)
+    if args.accounts:
+        from common.account_broker import discover_accounts
+
+        profiles.update(discover_accounts(args.accounts))
+    if not profiles:
+        raise SystemExit("[ERROR] -p/--profile 또는 --accounts 중 하나 이상이 필요합니다.")
+    return profiles
+
+
+def parse_tag_filter(value):
+    """
+    --tag 인자(key=value)를 태그 필터 딕셔너리로 변환합니다.
+    """
+    key, sep, tag_value = value.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"태그 조건은 key=value 형식이어야 합니다: {value}")
+    return {"key": key, "value": tag_value}
+
+
+def open_snapshot(args):
+    """
+    --snapshot 옵션이 있으면 인벤토리 스냅샷을 엽니다.
+    """
+    if not getattr(args, "snapshot", False):
+        return None
+    from common.inventory_snapshot import InventorySnapshot
+
+    return InventorySnapshot(args.snapshot_path)
+
+
+def history_name(args):
+    """
+    보고서 이력 이름을 반환합니다. (--no-history면 None, 기본값은 서브커맨드명)
+    """
+    return None if args.no_history else args.command
+
+
+def run_al2(args):
+    module = load_script("al2")
+    module.print_os_distribution(resolve_profiles(args), args.region or ["ap-northeast-2"],
+                                 args.workers, args.timeout, open_snapshot(args), history_name(args))
+
+
+def run_ebs(args):
+    module = load_script("ebs")
+    module.get_ebs_encryption_status(resolve_profiles(args), args.region, args.workers, args.timeout,
+                                     open_snapshot(args), history_name(args))
+
+
+def run_ami_usage(args):
+    from common.ec2_inventory import parse_image_ids
+
+    ami_ids = parse_image_ids(args.ami)
+    if not ami_ids:
+        raise SystemExit("[ERROR] AMI ID가 비어 있습니다.")
+    profiles = list(resolve_profiles(args))
+
+    # 단일 계정/기본 리전은 기존 단일 계정 보고서 형식, 그 외에는 다중 계정 보고서 형식
+    if len(profiles) == 1 and not args.region and not args.snapshot:
+        module = load_script("ami-usage")
+        if len(ami_ids) == 1:
+            module.find_ec2_instances_with_ami(profiles[0], ami_ids[0], args.output, history_name(args))
+        else:
+            module.find_ec2_instances_with_amis(profiles[0], ami_ids, args.output, history_name(args))
+    else:
+        module = load_script("ami-usage-multi")
+        module.find_ec2_instances_with_ami(profiles, ami_ids, args.output, args.region, args.workers,
+                                           args.timeout, open_snapshot(args), history_name(args))
+
+
+def run_ec2_list(args):
+    module = load_script("ec2-list")
+    # filtered_ec2_list는 {별칭: 프로필명} 매핑을 사용
+    aws_profiles = {alias: profile for profile, alias in resolve_profiles(args).items()}
+    module.export_filtered_ec2_list(aws_profiles, args.region or ["ap-northeast-2"], args.keyword, args.tag,
+                                    args.state or ["running"], args.output, args.workers, args.timeout,
+                                    open_snapshot(args), not args.skip_ami_names, history_name(args))
+
+
+def run_ssm(args):
+    module = load_script("ssm")
+    module.profile = args.profile or os.environ.get("AWS_PROFILE")
+    if not module.profile:
+        raise SystemExit("[ERROR] --profile 또는 AWS_PROFILE 환경변수가 필요합니다.")
+    for iid, name, stat in module.run_check(args.region, open_snapshot(args)):
+        print(f"{stat}: {iid} ({name})")
+
+
+def run_iam_keys(args):
+    if args.last_used:
+        module = load_script("iam-keys-last-used")
+    else:
+        module = load_script("iam-keys-expire")
+        module.expir = args.expire_days
+        module.exceptusers = args.exclude or []
+    module.init(args.profile)
+    module.run()
+
+
+def run_iam_groups(args):
+    module = load_script("iam-groups")
+    module.init(args.profile)
+    module.run()
+
+
+def run_iam_users(args):
+    module = load_script("iam-users")
+    module.init(args.profile)
+    if args.user:
+        module.selectrun(args.user)
+    else:
+        module.run()
+
+
+def run_diff(args):
+    module = load_script("diff")
+    counts = module.print_report_diff(args.report, args.old, args.new, args.output)
+    if counts is None:
+        raise SystemExit(2)
+    # 변경이 있으면 종료 코드 1 (알림 연동용)
+    if args.exit_code and sum(counts.values()):
+        raise SystemExit(1)
+
+
+def run_batch(args):
+    # 파일의 각 줄을 하나의 보고서 명령으로 실행 (같은 프로세스에서 Session/Client/모듈 재사용)
+    source = sys.stdin if args.file == "-" else open(args.file, encoding="utf-8")
+    with source:
+        commands = [shlex.split(line, comments=True) for line in source]
+    parser = build_parser()
+    for argv in filter(None, commands):
+        if argv[0] == "batch":
+            parser.error("batch 파일 안에서 batch 명령은 사용할 수 없습니다.")
+        print(f"\n### {' '.join(argv)}")
+        command_args = parser.parse_args(argv)
+        command_args.func(command_args)
+
+
+def build_parser():
+    """
+    서브커맨드별 인자 파서를 생성합니다.
+    """
+    parser = argparse.ArgumentParser(
+        prog="aws_report.py",
+        description="python/aws-python 보고서 스크립트 통합 실행기",
+    )
+    parser.add_argument("--metrics", choices=("summary", "json", "prometheus"),
+                        help="API 호출 계측 보고서 형식 (종료 시 stderr 또는 --metrics-file에 출력)")
+    parser.add_argument("--metrics-file", help="API 호출 계측 보고서 출력 파일")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    # 여러 계정/리전 대상 공통 옵션
+    targets = argparse.ArgumentParser(add_help=False)
+    targets.add_argument("-p", "--profile", action="append", metavar="PROFILE[=ALIAS]",
+                         help="조회할 AWS 프로필 (여러 번 지정 가능, 별칭 생략 시 프로필명)")
+    targets.add_argument("--accounts", metavar="SOURCE",
+                         help="대상 계정 목록: organizations 또는 계정 파일 경로 (계정마다 AssumeRole, 자격 증명 디스크 캐시)")
+    targets.add_argument("-r", "--region", action="append", metavar="REGION",
+                         help="조회할 AWS 리전 (여러 번 지정 가능)")
+    targets.add_argument("--workers", type=int, default=8, help="최대 동시 조회 수 (기본값: 8)")
+    targets.add_argument("--timeout", type=float, help="(계정, 리전)별 조회 제한 시간(초)")
+
+    # 인벤토리 스냅샷 옵션
+    snapshot = argparse.ArgumentParser(add_help=False)
+    snapshot.add_argument("--snapshot", action="store_true",
+                          help="snapshot/collect_snapshot.py로 수집한 스냅샷에서 API 호출 없이 조회")
+    snapshot.add_argument("--snapshot-path", help="스냅샷 DB 경로 (기본값: INVENTORY_SNAPSHOT_PATH 또는 기본 경로)")
+
+    # 보고서 이력 옵션 (실행 결과를 키 순서로 저장하여 diff 명령으로 비교)
+    history = argparse.ArgumentParser(add_help=False)
+    history.add_argument("--no-history", action="store_true",
+                         help="보고서 이력을 저장하지 않음 (기본값: 서브커맨드명으로 REPORT_HISTORY_DIR에 저장)")
+
+    # 단일 계정 옵션
+    account = argparse.ArgumentParser(add_help=False)
+    account.add_argument("-p", "--profile", help="AWS 프로필 (생략 시 기본 자격 증명 체인)")
+
+    command = subparsers.add_parser("al2", parents=[targets, snapshot, history],
+                                    help="EC2 OS 분포 및 Amazon Linux 2 사용률 (기본 리전: ap-northeast-2)")
+    command.set_defaults(func=run_al2)
+
+    command = subparsers.add_parser("ebs", parents=[targets, snapshot, history], help="EBS 볼륨 암호화 상태")
+    command.set_defaults(func=run_ebs)
+
+    command = subparsers.add_parser("ami-usage", parents=[targets, snapshot, history], help="AMI를 사용하는 EC2 인스턴스 검색")
+    command.add_argument("--ami", required=True, help="AMI ID (쉼표로 구분 또는 AMI ID 목록 파일 경로)")
+    command.add_argument("-o", "--output", default="output.csv", help="결과 CSV 파일 (기본값: output.csv)")
+    command.set_defaults(func=run_ami_usage)
+
+    command = subparsers.add_parser("ec2-list", parents=[targets, snapshot, history],
+                                    help="키워드/태그/상태 조건으로 EC2 목록 조회 (기본 리전: ap-northeast-2)")
+    command.add_argument("--keyword", help="인스턴스명 또는 AMI명에 포함된 키워드")
+    command.add_argument("--tag", action="append", type=parse_tag_filter, metavar="KEY=VALUE",
+                         help="태그 조건 (여러 번 지정 시 하나라도 맞으면 포함)")
+    command.add_argument("--state", action="append", metavar="STATE", help="인스턴스 상태 (기본값: running)")
+    command.add_argument("-o", "--output", default="filtered_ec2_list.csv",
+                         help="결과 CSV 파일 (기본값: filtered_ec2_list.csv)")
+    command.add_argument("--skip-ami-names", action="store_true",
+                         help="인스턴스 필드로 OS가 판별된 인스턴스(Windows, RHEL, SUSE 등)의 AMI 이름 조회 생략")
+    command.set_defaults(func=run_ec2_list)
+
+    command = subparsers.add_parser("ssm", parents=[snapshot], help="SSM Session Manager 연결 상태")
+    command.add_argument("-p", "--profile", help="AWS 프로필 (생략 시 AWS_PROFILE 환경변수)")
+    command.add_argument("-r", "--region", default="ap-northeast-2", help="AWS 리전 (기본값: ap-northeast-2)")
+    command.set_defaults(func=run_ssm)
+
+    command = subparsers.add_parser("iam-keys", parents=[account], help="IAM Access Key 만료/마지막 사용일")
+    command.add_argument("--last-used", action="store_true", help="만료 대신 Active Access Key 마지막 사용일 출력")
+    command.add_argument("--expire-days", type=int, default=90, help="만료 기준 일수 (기본값: 90)")
+    command.add_argument("--exclude", action="append", metavar="USER", help="만료 검사 제외 사용자 (여러 번 지정 가능)")
+    command.set_defaults(func=run_iam_keys)
+
+    command = subparsers.add_parser("iam-groups", parents=[account], help="IAM 그룹별 정책 및 사용자")
+    command.set_defaults(func=run_iam_groups)
+
+    command = subparsers.add_parser("iam-users", parents=[account], help="Company 태그가 없는 IAM 사용자 목록")
+    command.add_argument("--user", help="지정한 IAM 사용자만 조회")
+    command.set_defaults(func=run_iam_users)
+
+    command = subparsers.add_parser("diff", help="보고서 이력 비교 (추가/삭제/변경된 행만 출력, 기본값: 마지막 실행과 조회 조건이 같은 직전 실행)")
+    command.add_argument("report", choices=("al2", "ebs", "ami-usage", "ec2-list"), help="비교할 보고서")
+    command.add_argument("--old", help="이전 이력 파일 경로 (--new와 함께 지정)")
+    command.add_argument("--new", help="새 이력 파일 경로 (--old와 함께 지정)")
+    command.add_argument("-o", "--output", help="변경 내역 CSV 파일")
+    command.add_argument("--exit-code", action="store_true", help="변경이 있으면 종료 코드 1로 종료")
+    command.set_defaults(func=run_diff)
+
+    command = subparsers.add_parser("batch", help="파일의 각 줄을 보고서 명령으로 연속 실행 ('-'이면 표준 입력)")
+    command.add_argument("file", help="명령 파일 (한 줄에 하나, 예: al2 -p profile01=alias01)")
+    command.set_defaults(func=run_batch)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.metrics:
+        from common import api_metrics
+
+        api_metrics.enable(args.metrics, args.metrics_file)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
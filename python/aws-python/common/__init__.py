@@ -0,0 +1,3 @@
+"""
+python/aws-python 스크립트들이 공유하는 공통 모듈 패키지입니다.
+"""
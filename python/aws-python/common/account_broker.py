@@ -0,0 +1,234 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+import boto3
+import botocore.session
+from botocore.credentials import RefreshableCredentials
+
+# 브로커가 관리하는 계정을 나타내는 프로필명 접두사 (예: account:123456789012)
+ACCOUNT_PROFILE_PREFIX = "account:"
+
+# 임시 자격 증명/계정 목록 캐시 디렉토리 (환경변수 AWS_CREDENTIAL_CACHE_DIR로 변경 가능)
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aws-python", "credentials")
+
+# 각 계정에서 AssumeRole 할 기본 역할 이름 (환경변수 AWS_ACCOUNT_ROLE_NAME으로 변경 가능)
+DEFAULT_ROLE_NAME = "OrganizationAccountAccessRole"
+
+# AssumeRole 임시 자격 증명 유효 시간(초)
+ASSUME_ROLE_DURATION_SECONDS = 3600
+
+# 만료까지 이 시간(초)보다 적게 남은 캐시 자격 증명은 다시 AssumeRole
+# (botocore 자동 갱신 기준(15분)과 같게 두어, 캐시에서 꺼낸 자격 증명이 곧바로 갱신 대상이 되지 않도록 함)
+REFRESH_MARGIN_SECONDS = 15 * 60
+
+# Organizations 계정 목록 캐시 유지 시간(초)
+ACCOUNT_LIST_TTL_SECONDS = 24 * 60 * 60
+
+# AssumeRole 세션 이름 (CloudTrail에서 보고서 스크립트 호출 구분용)
+ROLE_SESSION_NAME = "aws-python-report"
+
+# 계정별 역할 ARN (계정 파일에서 역할을 지정한 경우)
+_role_arns = {}
+
+# 역할별 AssumeRole 잠금 (같은 계정의 여러 리전 대상이 동시에 AssumeRole 하지 않도록)
+_role_locks = {}
+_lock = threading.Lock()
+
+
+def _cache_dir():
+    return os.environ.get("AWS_CREDENTIAL_CACHE_DIR") or DEFAULT_CACHE_DIR
+
+
+def _source_profile():
+    # 계정 목록 조회와 AssumeRole에 사용할 원본 자격 증명 프로필 (None이면 기본 자격 증명 체인)
+    return os.environ.get("AWS_ACCOUNT_SOURCE_PROFILE") or None
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    """
+    소유자만 읽을 수 있는 파일(0600)에 임시 파일을 거쳐 원자적으로 기록합니다. (여러 프로세스가 동시에 기록해도 안전)
+    """
+    os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as file:
+        file.write(json.dumps(data))
+    os.replace(temp_path, path)
+
+
+def account_profile(account_id):
+    """
+    계정 ID를 브로커 프로필명으로 변환합니다. (aws_session.get_client 등에 프로필명 대신 전달)
+    """
+    return f"{ACCOUNT_PROFILE_PREFIX}{account_id}"
+
+
+def is_account_profile(profile_name):
+    return bool(profile_name) and profile_name.startswith(ACCOUNT_PROFILE_PREFIX)
+
+
+def role_arn_for(account_id):
+    """
+    계정에서 AssumeRole 할 역할 ARN을 반환합니다. (계정 파일에 지정된 역할 또는 AWS_ACCOUNT_ROLE_NAME)
+    """
+    role_arn = _role_arns.get(account_id)
+    if role_arn is None:
+        role_name = os.environ.get("AWS_ACCOUNT_ROLE_NAME") or DEFAULT_ROLE_NAME
+        role_arn = f"arn:aws:iam::{account_id}:role/{role_name}"
+    return role_arn
+
+
+def _role_lock(role_arn):
+    with _lock:
+        return _role_locks.setdefault(role_arn, threading.Lock())
+
+
+def _fetch_credentials(role_arn):
+    """
+    디스크 캐시의 임시 자격 증명이 충분히 남아 있으면 재사용하고, 아니면 AssumeRole 후 캐시에 저장합니다.
+
+    Args:
+        role_arn (str): AssumeRole 할 역할 ARN
+
+    Returns:
+        dict: botocore RefreshableCredentials 메타데이터 (access_key, secret_key, token, expiry_time)
+    """
+    cache_path = os.path.join(_cache_dir(), re.sub(r"[^A-Za-z0-9_.-]", "_", role_arn) + ".json")
+    with _role_lock(role_arn):
+        cached = _read_json(cache_path)
+        if cached and (datetime.fromisoformat(cached["expiry_time"]) - datetime.now(timezone.utc)
+                       > timedelta(seconds=REFRESH_MARGIN_SECONDS)):
+            return cached
+
+        # 순환 import 방지 (aws_session이 이 모듈을 import)
+        from common.aws_session import get_client
+
+        response = get_client("sts", _source_profile()).assume_role(
+            RoleArn=role_arn, RoleSessionName=ROLE_SESSION_NAME, DurationSeconds=ASSUME_ROLE_DURATION_SECONDS)
+        credentials = response["Credentials"]
+        metadata = {
+            "access_key": credentials["AccessKeyId"],
+            "secret_key": credentials["SecretAccessKey"],
+            "token": credentials["SessionToken"],
+            "expiry_time": credentials["Expiration"].astimezone(timezone.utc).isoformat(),
+        }
+        _write_json(cache_path, metadata)
+        return metadata
+
+
+def get_credentials(profile_name):
+    """
+    브로커 프로필의 임시 자격 증명을 준비합니다. (디스크 캐시 또는 AssumeRole, 만료 전 자동 갱신)
+    aws_session.get_session이 전역 잠금 밖에서 호출하므로 계정별 AssumeRole은 병렬로 실행됩니다.
+
+    Args:
+        profile_name (str): 브로커 프로필명 (account:계정ID)
+
+    Returns:
+        botocore.credentials.RefreshableCredentials: 자동 갱신되는 자격 증명
+    """
+    role_arn = role_arn_for(profile_name[len(ACCOUNT_PROFILE_PREFIX):])
+    return RefreshableCredentials.create_from_metadata(
+        _fetch_credentials(role_arn), refresh_using=lambda: _fetch_credentials(role_arn), method="assume-role")
+
+
+def create_session(credentials):
+    """
+    임시 자격 증명을 사용하는 boto3 Session을 생성합니다.
+    리전 등 설정은 원본 프로필에서 읽고 자격 증명만 교체합니다. (aws_session 잠금 안에서 호출되므로 다른 Session을 조회하지 않음)
+    """
+    botocore_session = botocore.session.Session(profile=_source_profile())
+    botocore_session._credentials = credentials
+    return boto3.Session(botocore_session=botocore_session)
+
+
+def _list_organization_accounts():
+    """
+    Organizations의 활성 계정 목록을 조회합니다. (ACCOUNT_LIST_TTL_SECONDS 동안 디스크 캐시 사용)
+
+    Returns:
+        list: (계정 ID, 계정 이름) 튜플 리스트
+    """
+    source_profile = _source_profile()
+    cache_path = os.path.join(_cache_dir(), f"organizations-{source_profile or 'default'}.json")
+    cached = _read_json(cache_path)
+    if cached and datetime.now(timezone.utc) - datetime.fromisoformat(cached["listed_at"]) \
+            < timedelta(seconds=ACCOUNT_LIST_TTL_SECONDS):
+        return [tuple(account) for account in cached["accounts"]]
+
+    from common.aws_session import get_client
+
+    paginator = get_client("organizations", source_profile).get_paginator("list_accounts")
+    accounts = [(account["Id"], account["Name"])
+                for page in paginator.paginate() for account in page["Accounts"]
+                if account["Status"] == "ACTIVE"]
+    _write_json(cache_path, {"listed_at": datetime.now(timezone.utc).isoformat(), "accounts": accounts})
+    return accounts
+
+
+def _read_account_file(path):
+    """
+    계정 파일을 읽습니다. (한 줄에 '계정ID [별칭] [역할 이름 또는 ARN]', 쉼표/공백 구분, # 이후는 주석)
+
+    Returns:
+        list: (계정 ID, 별칭, 역할 ARN 또는 None) 튜플 리스트
+    """
+    accounts = []
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            fields = line.split("#", 1)[0].replace(",", " ").split()
+            if not fields:
+                continue
+            account_id = fields[0]
+            alias = fields[1] if len(fields) > 1 else account_id
+            role = fields[2] if len(fields) > 2 else None
+            if role and not role.startswith("arn:"):
+                role = f"arn:aws:iam::{account_id}:role/{role}"
+            accounts.append((account_id, alias, role))
+    return accounts
+
+
+def discover_accounts(source=None):
+    """
+    대상 계정을 Organizations 또는 계정 파일에서 조회하여 보고서 함수에 전달할 프로필 딕셔너리로 반환합니다.
+
+    Args:
+        source (str): 'organizations' 또는 계정 파일 경로 (None이면 AWS_ACCOUNT_SOURCE 환경변수)
+
+    Returns:
+        dict: 브로커 프로필명(account:계정ID)과 별칭의 매핑 딕셔너리 (aws_profiles와 같은 형태)
+    """
+    source = source or os.environ.get("AWS_ACCOUNT_SOURCE")
+    if not source:
+        raise ValueError("계정 목록 원본(organizations 또는 계정 파일 경로)이 필요합니다.")
+
+    if source == "organizations":
+        return {account_profile(account_id): name for account_id, name in _list_organization_accounts()}
+
+    profiles = {}
+    for account_id, alias, role_arn in _read_account_file(source):
+        if role_arn:
+            _role_arns[account_id] = role_arn
+        profiles[account_profile(account_id)] = alias
+    return profiles
+
+
+def target_profiles(aws_profiles):
+    """
+    AWS_ACCOUNT_SOURCE 환경변수가 있으면 조회한 계정 목록을, 없으면 전달된 프로필 딕셔너리를 그대로 반환합니다.
+    (스크립트의 하드코딩된 aws_profiles 대신 계정 목록을 자동으로 사용)
+    """
+    if os.environ.get("AWS_ACCOUNT_SOURCE"):
+        return discover_accounts()
+    return aws_profiles
@@ -0,0 +1,191 @@
+import os
+import sqlite3
+import time
+
+# 캐시 DB 경로 (환경변수 AMI_CACHE_PATH로 변경 가능)
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "aws-python", "ami_cache.sqlite3")
+
+# 조회되지 않은(등록 해제/접근 불가) AMI를 다시 조회하기 전까지 유지하는 시간(초)
+# (접근 가능 여부는 계정마다 다르므로 없음 캐시는 (범위, 리전)별로 저장)
+NEGATIVE_TTL_SECONDS = 24 * 60 * 60
+
+# describe_images 필터 값 최대 개수
+DESCRIBE_IMAGES_CHUNK_SIZE = 200
+
+# 캐시에 저장하는 AMI 필드
+IMAGE_FIELDS = ("Name", "Description", "Platform", "PlatformDetails")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    image_id TEXT PRIMARY KEY,
+    found INTEGER NOT NULL,
+    name TEXT,
+    description TEXT,
+    platform TEXT,
+    platform_details TEXT,
+    fetched_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS missing_images (
+    scope TEXT NOT NULL,
+    image_id TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (scope, image_id)
+);
+CREATE TABLE IF NOT EXISTS image_os (
+    image_id TEXT NOT NULL,
+    classifier TEXT NOT NULL,
+    os_type TEXT NOT NULL,
+    PRIMARY KEY (image_id, classifier)
+);
+"""
+
+
+def _connect(cache_path):
+    """
+    캐시 DB에 연결합니다. (동시 쓰기를 위해 WAL 모드와 잠금 대기 시간 설정)
+
+    Args:
+        cache_path (str): 캐시 DB 파일 경로
+
+    Returns:
+        sqlite3.Connection: DB 연결 객체
+    """
+    directory = os.path.dirname(cache_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(cache_path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _chunks(items, size):
+    """
+    리스트를 size 단위로 나눕니다.
+    """
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _fetch_images(ec2, image_ids):
+    """
+    describe_images를 API 제한 단위로 나누어 호출합니다.
+    ImageIds 대신 image-id 필터를 사용하므로 존재하지 않는 AMI가 섞여 있어도 오류 없이 생략됩니다.
+
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        image_ids (list): 조회할 AMI ID 리스트
+
+    Returns:
+        dict: {AMI ID: describe_images 응답의 Image 항목}
+    """
+    images = {}
+    paginator = ec2.get_paginator("describe_images")
+    for chunk in _chunks(image_ids, DESCRIBE_IMAGES_CHUNK_SIZE):
+        for page in paginator.paginate(Filters=[{"Name": "image-id", "Values": chunk}], IncludeDeprecated=True):
+            for image in page["Images"]:
+                images[image["ImageId"]] = image
+    return images
+
+
+def get_images(ec2, image_ids, classify=None, classifier=None, cache_path=None, negative_ttl=NEGATIVE_TTL_SECONDS,
+               scope=None):
+    """
+    AMI 메타데이터를 로컬 캐시에서 조회하고, 캐시에 없는 AMI만 describe_images로 조회합니다.
+    AMI 메타데이터는 게시 후 변경되지 않으므로 조회된 AMI는 모든 계정이 만료 없이 재사용하며,
+    조회되지 않은 AMI는 조회한 (scope, 리전)에서만 negative_ttl 동안 '없음'으로 캐시합니다.
+    (비공개/공유 AMI를 볼 수 없는 계정의 없음 캐시가 AMI를 소유한 계정의 조회를 가리지 않도록)
+
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        image_ids (iterable): 조회할 AMI ID 목록
+        classify (callable): AMI 정보(dict)를 받아 OS 타입을 반환하는 함수 (None이면 분류 생략)
+        classifier (str): 분류 결과 캐시 키 (분류 규칙이 바뀌면 다른 값을 사용)
+        cache_path (str): 캐시 DB 경로 (None이면 AMI_CACHE_PATH 환경변수 또는 기본 경로)
+        negative_ttl (float): 조회되지 않은 AMI의 캐시 유지 시간(초)
+        scope (str): 없음 캐시 범위 (AWS 프로필명 등, None이면 없음 캐시를 사용하지 않음)
+
+    Returns:
+        dict: {AMI ID: {"ImageId", "Name", "Description", "Platform", "PlatformDetails", "OsType"}}
+              (조회되지 않은 AMI는 포함되지 않음)
+    """
+    cache_path = cache_path or os.environ.get("AMI_CACHE_PATH") or DEFAULT_CACHE_PATH
+    image_ids = sorted(set(image_ids))
+    if not image_ids:
+        return {}
+
+    now = time.time()
+    images = {}
+    missing = []
+    negative_scope = None if scope is None else f"{scope}|{ec2.meta.region_name or ''}"
+
+    conn = _connect(cache_path)
+    try:
+        # 캐시 조회 (SQLite 변수 개수 제한을 고려하여 나누어 조회)
+        # (이전 버전이 images 테이블에 범위 없이 저장한 없음 캐시(found = 0)는 사용하지 않음)
+        cached = {}
+        negative = {}
+        for chunk in _chunks(image_ids, 500):
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT image_id, name, description, platform, platform_details "
+                f"FROM images WHERE found = 1 AND image_id IN ({placeholders})", chunk)
+            for row in rows:
+                cached[row[0]] = row
+            if negative_scope is not None:
+                negative.update(conn.execute(
+                    f"SELECT image_id, fetched_at FROM missing_images WHERE scope = ? AND image_id IN ({placeholders})",
+                    [negative_scope] + chunk))
+
+        for image_id in image_ids:
+            row = cached.get(image_id)
+            if row is not None:
+                images[image_id] = dict(zip(("ImageId",) + IMAGE_FIELDS, row))
+            elif image_id not in negative or now - negative[image_id] >= negative_ttl:
+                # 캐시에 없거나 없음 캐시가 만료된 AMI는 다시 조회
+                missing.append(image_id)
+
+        # 캐시에 없는 AMI만 API로 조회 후 저장 (조회되지 않은 AMI는 없음으로 저장)
+        if missing:
+            fetched = _fetch_images(ec2, missing)
+            rows = []
+            missing_rows = []
+            for image_id in missing:
+                image = fetched.get(image_id)
+                if image is None:
+                    if negative_scope is not None:
+                        missing_rows.append((negative_scope, image_id, now))
+                    continue
+                record = {"ImageId": image_id}
+                record.update({field: image.get(field, "") for field in IMAGE_FIELDS})
+                images[image_id] = record
+                rows.append((image_id, 1) + tuple(record[field] for field in IMAGE_FIELDS) + (now,))
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+                conn.executemany("INSERT OR REPLACE INTO missing_images VALUES (?, ?, ?)", missing_rows)
+
+        # OS 분류 결과 조회 (캐시에 없으면 분류 후 저장)
+        if classify is not None:
+            classifier = classifier or getattr(classify, "__name__", "default")
+            found_ids = sorted(images)
+            os_types = {}
+            for chunk in _chunks(found_ids, 500):
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT image_id, os_type FROM image_os WHERE classifier = ? AND image_id IN ({placeholders})",
+                    [classifier] + chunk)
+                os_types.update(rows)
+
+            new_rows = []
+            for image_id in found_ids:
+                if image_id not in os_types:
+                    os_types[image_id] = classify(images[image_id])
+                    new_rows.append((image_id, classifier, os_types[image_id]))
+                images[image_id]["OsType"] = os_types[image_id]
+            if new_rows:
+                with conn:
+                    conn.executemany("INSERT OR REPLACE INTO image_os VALUES (?, ?, ?)", new_rows)
+    finally:
+        conn.close()
+
+    return images
@@ -0,0 +1,277 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+
+# 계측 활성화 환경변수 (summary | json | prometheus, 그 밖의 값(예: 1)은 summary, 비어 있으면 비활성화)
+METRICS_ENV = "AWS_API_METRICS"
+
+# 보고서 출력 파일 환경변수 (비어 있으면 stderr)
+METRICS_FILE_ENV = "AWS_API_METRICS_FILE"
+
+METRICS_FORMATS = ("summary", "json", "prometheus")
+
+# 지연 시간 히스토그램 버킷 상한(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# 스로틀링으로 분류하는 오류 코드
+THROTTLE_ERROR_CODES = frozenset((
+    "Throttling", "ThrottlingException", "ThrottledException", "RequestThrottledException",
+    "TooManyRequestsException", "ProvisionedThroughputExceededException", "RequestLimitExceeded",
+    "RequestThrottled", "BandwidthLimitExceeded", "LimitExceededException", "SlowDown",
+    "EC2ThrottledException", "PriorRequestNotComplete",
+))
+
+_CONTEXT_KEY = "api_metrics_started"
+
+_stats = {}
+_instrumented = set()
+_lock = threading.Lock()
+_config = {"format": None, "path": None}
+
+
+def _new_stats():
+    return {"calls": 0, "errors": 0, "retries": 0, "throttles": 0, "bytes": 0,
+            "seconds": 0.0, "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+
+
+def _record(key, **values):
+    with _lock:
+        stats = _stats.get(key)
+        if stats is None:
+            stats = _stats[key] = _new_stats()
+        for field, value in values.items():
+            if field == "latency":
+                stats["seconds"] += value
+                index = next((i for i, bound in enumerate(LATENCY_BUCKETS) if value <= bound), len(LATENCY_BUCKETS))
+                stats["buckets"][index] += 1
+            else:
+                stats[field] += value
+
+
+def enabled():
+    """
+    계측이 활성화되어 있는지 반환합니다.
+    """
+    return _config["format"] is not None
+
+
+def enable(fmt="summary", path=None, report_at_exit=True):
+    """
+    API 호출 계측을 활성화합니다. 이후 common.aws_session.get_client로 얻는 Client가 계측됩니다.
+
+    Args:
+        fmt (str): 보고서 형식 (summary | json | prometheus)
+        path (str): 보고서 출력 파일 경로 (None이면 stderr)
+        report_at_exit (bool): 프로세스 종료 시 보고서 출력 여부
+    """
+    if fmt not in METRICS_FORMATS:
+        raise ValueError(f"지원하지 않는 계측 보고서 형식입니다: {fmt} (가능한 값: {', '.join(METRICS_FORMATS)})")
+    first = not enabled()
+    _config["format"], _config["path"] = fmt, path
+    if first and report_at_exit:
+        atexit.register(write_report)
+
+
+def instrument(client, account=None):
+    """
+    Client의 botocore 이벤트에 계측 핸들러를 연결합니다. (같은 Client는 한 번만 연결)
+    (계정, 리전, 서비스, 오퍼레이션)별로 호출 수, 오류 수, 재시도 수, 스로틀링 수,
+    응답 바이트, 지연 시간 히스토그램을 기록합니다.
+
+    Args:
+        client (botocore.client.BaseClient): 계측할 Client
+        account (str): 보고서에 표시할 계정 이름 (프로필명 등, None이면 default)
+
+    Returns:
+        botocore.client.BaseClient: 계측된 Client
+    """
+    with _lock:
+        if id(client) in _instrumented:
+            return client
+        _instrumented.add(id(client))
+
+    labels = (account or "default", client.meta.region_name or "", client.meta.service_model.service_name)
+
+    def before_call(model, context, **kwargs):
+        context[_CONTEXT_KEY] = time.perf_counter()
+
+    def after_call(model, context, parsed=None, exception=None, **kwargs):
+        started = context.pop(_CONTEXT_KEY, None)
+        if started is None:
+            return
+        attempt = context.get("retries", {}).get("attempt", 1)
+        failed = exception is not None or "Error" in (parsed or {})
+        _record(labels + (model.name,), calls=1, errors=int(failed), retries=attempt - 1, latency=time.perf_counter() - started)
+
+    def after_call_error(context, exception, **kwargs):
+        started = context.pop(_CONTEXT_KEY, None)
+        if started is None:
+            return
+        operation = context.get("api_metrics_operation", "unknown")
+        attempt = context.get("retries", {}).get("attempt", 1)
+        _record(labels + (operation,), calls=1, errors=1, retries=attempt - 1,
+                latency=time.perf_counter() - started)
+
+    def before_call_operation(model, context, **kwargs):
+        # after-call-error 이벤트에는 오퍼레이션 모델이 없으므로 이름을 컨텍스트에 보관
+        context["api_metrics_operation"] = model.name
+
+    def needs_retry(operation, response=None, **kwargs):
+        # 재시도 여부 판단 전 매 시도마다 호출됨 (재시도 판단에는 관여하지 않도록 None 반환)
+        if response is None:
+            return None
+        http_response, parsed = response
+        code = parsed.get("Error", {}).get("Code")
+        _record(labels + (operation.name,), bytes=len(http_response.content or b""),
+                throttles=int(code in THROTTLE_ERROR_CODES))
+        return None
+
+    events = client.meta.events
+    events.register("before-call.*.*", before_call_operation)
+    events.register_last("before-call.*.*", before_call)
+    events.register("after-call.*.*", after_call)
+    events.register("after-call-error.*.*", after_call_error)
+    events.register_first("needs-retry.*.*", needs_retry)
+    return client
+
+
+def get_stats():
+    """
+    기록된 계측 결과를 반환합니다.
+
+    Returns:
+        list: {"account", "region", "service", "operation", "calls", "errors", "retries",
+               "throttles", "bytes", "seconds", "buckets"} 리스트 (키 순서로 정렬)
+    """
+    with _lock:
+        items = sorted(_stats.items())
+        return [dict(zip(("account", "region", "service", "operation"), key),
+                     **{field: (list(value) if field == "buckets" else value) for field, value in stats.items()})
+                for key, stats in items]
+
+
+def reset():
+    """
+    기록된 계측 결과를 초기화합니다. (Lambda 호출 단위 집계 등)
+    """
+    with _lock:
+        _stats.clear()
+
+
+def cost_line():
+    """
+    한 줄로 기록할 수 있는 호출 비용 요약을 반환합니다. (Lambda 호출별 구조화 로그용)
+
+    Returns:
+        dict: 전체 합계와 오퍼레이션별 호출 수
+    """
+    rows = get_stats()
+    return {
+        "type": "aws_api_cost",
+        "calls": sum(row["calls"] for row in rows),
+        "errors": sum(row["errors"] for row in rows),
+        "retries": sum(row["retries"] for row in rows),
+        "throttles": sum(row["throttles"] for row in rows),
+        "bytes": sum(row["bytes"] for row in rows),
+        "api_seconds": round(sum(row["seconds"] for row in rows), 3),
+        "operations": {f"{row['service']}:{row['operation']}": row["calls"] for row in rows},
+    }
+
+
+def render_summary(rows=None):
+    """
+    계측 결과를 표 형태 문자열로 만듭니다.
+    """
+    rows = get_stats() if rows is None else rows
+    lines = ["Account | Region | Service | Operation | Calls | Errors | Retries | Throttles | Bytes | Total(s) | Avg(ms)",
+             "-" * 105]
+    for row in rows:
+        average = row["seconds"] / row["calls"] * 1000 if row["calls"] else 0.0
+        lines.append(f"{row['account']} | {row['region']} | {row['service']} | {row['operation']} | {row['calls']} | "
+                     f"{row['errors']} | {row['retries']} | {row['throttles']} | {row['bytes']} | "
+                     f"{row['seconds']:.3f} | {average:.1f}")
+    return "\n".join(lines) + "\n"
+
+
+def render_json(rows=None):
+    """
+    계측 결과를 JSON 문자열로 만듭니다. (버킷 상한은 latency_buckets, 마지막 버킷은 +Inf)
+    """
+    rows = get_stats() if rows is None else rows
+    return json.dumps({"latency_buckets": list(LATENCY_BUCKETS), "operations": rows}, indent=2, ensure_ascii=False) + "\n"
+
+
+def render_prometheus(rows=None):
+    """
+    계측 결과를 Prometheus 텍스트 형식으로 만듭니다.
+    """
+    rows = get_stats() if rows is None else rows
+    counters = (("calls", "aws_api_calls_total", "API 호출 수"),
+                ("errors", "aws_api_errors_total", "오류 응답 수"),
+                ("retries", "aws_api_retries_total", "재시도 수"),
+                ("throttles", "aws_api_throttles_total", "스로틀링 응답 수"),
+                ("bytes", "aws_api_response_bytes_total", "응답 바이트"))
+    lines = []
+
+    def label(row, extra=""):
+        labels = ",".join(f'{name}="{row[name]}"' for name in ("account", "region", "service", "operation"))
+        return "{" + labels + extra + "}"
+
+    for field, metric, description in counters:
+        lines += [f"# HELP {metric} {description}", f"# TYPE {metric} counter"]
+        lines += [f"{metric}{label(row)} {row[field]}" for row in rows]
+
+    metric = "aws_api_latency_seconds"
+    lines += [f"# HELP {metric} API 호출 지연 시간 (재시도 포함)", f"# TYPE {metric} histogram"]
+    for row in rows:
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), row["buckets"]):
+            cumulative += count
+            bucket_label = label(row, ',le="%s"' % bound)
+            lines.append(f"{metric}_bucket{bucket_label} {cumulative}")
+        lines.append(f"{metric}_sum{label(row)} {row['seconds']:.6f}")
+        lines.append(f"{metric}_count{label(row)} {row['calls']}")
+    return "\n".join(lines) + "\n"
+
+
+def write_report(fmt=None, path=None):
+    """
+    계측 보고서를 파일 또는 stderr에 출력합니다. (기록된 호출이 없으면 출력하지 않음)
+
+    Args:
+        fmt (str): 보고서 형식 (None이면 enable 시 지정한 형식)
+        path (str): 출력 파일 경로 (None이면 enable 시 지정한 경로 또는 stderr)
+    """
+    fmt = fmt or _config["format"] or "summary"
+    path = path or _config["path"]
+    rows = get_stats()
+    if not rows:
+        return
+    text = {"summary": render_summary, "json": render_json, "prometheus": render_prometheus}[fmt](rows)
+    if path:
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+    else:
+        sys.stderr.write(text)
+
+
+def format_from_env(value):
+    """
+    AWS_API_METRICS 환경변수 값을 보고서 형식으로 변환합니다.
+    형식 이름이 아닌 값(예: 1, true)은 활성화 플래그로 보고 summary를 사용합니다. (import 시점에 예외를 내지 않도록)
+
+    Returns:
+        str: 보고서 형식 (값이 비어 있으면 None)
+    """
+    value = (value or "").strip().lower()
+    if not value:
+        return None
+    return value if value in METRICS_FORMATS else "summary"
+
+
+# 환경변수로 활성화 (설정하지 않으면 Client에 핸들러를 연결하지 않으므로 호출 비용 없음)
+if format_from_env(os.environ.get(METRICS_ENV)):
+    enable(format_from_env(os.environ.get(METRICS_ENV)), os.environ.get(METRICS_FILE_ENV) or None)
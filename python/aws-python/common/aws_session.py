@@ -0,0 +1,86 @@
+import threading
+
+import boto3
+from botocore.config import Config
+
+from common import account_broker, api_metrics
+
+# 동시 호출을 고려한 urllib3 커넥션 풀 크기 (botocore 기본값: 10)
+MAX_POOL_CONNECTIONS = 50
+
+# 프로필별 Session, (프로필, 리전, 서비스)별 Client 캐시
+_sessions = {}
+_clients = {}
+_lock = threading.Lock()
+
+
+def get_session(profile_name=None):
+    """
+    프로필별로 하나의 boto3 Session을 생성하여 재사용합니다.
+    boto3.setup_default_session처럼 전역 상태를 변경하지 않습니다.
+    
+    Args:
+        profile_name (str): AWS 프로필명 (None이면 기본 자격 증명 체인 사용, account:계정ID이면 계정 브로커 사용)
+    
+    Returns:
+        boto3.Session: 캐시된 세션 객체
+    """
+    session = _sessions.get(profile_name)
+    if session is None:
+        # 계정 브로커 프로필(account:계정ID)은 임시 자격 증명(디스크 캐시 또는 AssumeRole)을
+        # 잠금 밖에서 준비하여 계정별 AssumeRole이 병렬로 실행되도록 함
+        credentials = None
+        if account_broker.is_account_profile(profile_name):
+            credentials = account_broker.get_credentials(profile_name)
+        with _lock:
+            session = _sessions.get(profile_name)
+            if session is None:
+                if credentials is not None:
+                    session = account_broker.create_session(credentials)
+                else:
+                    session = boto3.Session(profile_name=profile_name)
+                _sessions[profile_name] = session
+    return session
+
+
+def get_client(service_name, profile_name=None, region_name=None):
+    """
+    (프로필, 리전, 서비스)별로 하나의 boto3 Client를 생성하여 재사용합니다.
+    Client 생성 시 엔드포인트/서비스 JSON 로딩 비용이 크므로 한 번만 생성하며,
+    생성된 Client는 스레드 간에 공유해도 안전합니다.
+    
+    Args:
+        service_name (str): AWS 서비스명 (예: ec2, ssm, iam)
+        profile_name (str): AWS 프로필명 (None이면 기본 자격 증명 체인 사용)
+        region_name (str): AWS 리전명 (None이면 프로필 기본 리전 사용)
+    
+    Returns:
+        botocore.client.BaseClient: 캐시된 클라이언트 객체
+    """
+    key = (profile_name, region_name, service_name)
+    client = _clients.get(key)
+    if client is None:
+        session = get_session(profile_name)
+        with _lock:
+            client = _clients.get(key)
+            if client is None:
+                # boto3 Session은 스레드 안전하지 않으므로 Client 생성은 잠금 안에서 수행
+                client = session.client(
+                    service_name,
+                    region_name=region_name,
+                    config=Config(max_pool_connections=MAX_POOL_CONNECTIONS),
+                )
+                # 계측이 켜져 있을 때만 이벤트 핸들러 연결 (꺼져 있으면 호출당 비용 없음)
+                if api_metrics.enabled():
+                    api_metrics.instrument(client, profile_name)
+                _clients[key] = client
+    return client
+
+
+def clear_cache():
+    """
+    캐시된 Session과 Client를 모두 제거합니다. (자격 증명 갱신 시 사용)
+    """
+    with _lock:
+        _sessions.clear()
+        _clients.clear()
@@ -0,0 +1,345 @@
+import json
+import os
+import queue
+import re
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+# describe_instances 페이지당 최대 조회 건수 (API 허용 범위: 5 ~ 1000)
+DESCRIBE_INSTANCES_PAGE_SIZE = 1000
+
+# 분할 조회 이력 파일 경로 (환경변수 EC2_PARTITION_HISTORY_PATH로 변경 가능)
+DEFAULT_PARTITION_HISTORY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "aws-python", "ec2_partitions.json")
+
+# 분할 조회 시 인스턴스 타입 와일드카드 접두사에 쓰는 문자 (타입명은 모두 소문자/숫자/'-'/'.'로 구성)
+_TYPE_FIRST_CHARS = "abcdefghijklmnopqrstuvwxyz"
+_TYPE_NEXT_CHARS = "0123456789abcdefghijklmnopqrstuvwxyz-."
+
+# 분할 이력이 없을 때 가정하는 인스턴스 타입 접두사(2자)별 비중 (일반적인 범용/컴퓨팅/메모리 계열 위주 분포)
+DEFAULT_TYPE_WEIGHTS = {"t2": 5, "t3": 20, "t4": 5, "m5": 10, "m6": 10, "m7": 5, "c5": 8, "c6": 8, "c7": 4,
+                        "r5": 8, "r6": 7, "r7": 3, "g4": 2, "g5": 2, "i3": 2, "i4": 1}
+
+# 필터 값 최대 개수
+FILTER_VALUE_LIMIT = 200
+
+# 분할 조회 결과 큐 크기(페이지 수) (소비가 늦으면 조회 스레드가 대기하여 메모리 사용량 제한)
+PARTITION_QUEUE_PAGES = 8
+
+# image-id 필터 값 최대 개수 (이보다 많은 AMI는 필터 없이 한 번 전체 조회)
+IMAGE_ID_FILTER_LIMIT = 200
+
+
+def to_instance_record(instance):
+    """
+    describe_instances 응답의 인스턴스 정보를 보고서에 필요한 필드만 남긴
+    가벼운 딕셔너리로 변환합니다.
+
+    Args:
+        instance (dict): describe_instances 응답의 Instance 항목
+
+    Returns:
+        dict: InstanceId, Name, ImageId, InstanceType, State, Tags 등을 포함한 딕셔너리
+    """
+    tags = {tag["Key"]: tag["Value"] for tag in instance.get("Tags", [])}
+    return {
+        "InstanceId": instance["InstanceId"],
+        "Name": tags.get("Name"),
+        "ImageId": instance.get("ImageId"),
+        "InstanceType": instance.get("InstanceType"),
+        "State": instance.get("State", {}).get("Name"),
+        "Platform": instance.get("Platform"),
+        "PlatformDetails": instance.get("PlatformDetails"),
+        "UsageOperation": instance.get("UsageOperation"),
+        "AvailabilityZone": instance.get("Placement", {}).get("AvailabilityZone"),
+        "Tags": tags,
+    }
+
+
+def iter_instances(ec2, filters=None, page_size=DESCRIBE_INSTANCES_PAGE_SIZE):
+    """
+    describe_instances 페이지네이터로 모든 페이지를 순회하며 인스턴스 레코드를 하나씩 반환합니다.
+    전체 응답을 메모리에 올리지 않으므로 인스턴스 수와 관계없이 메모리 사용량이 일정합니다.
+
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        filters (list): describe_instances Filters (None이면 모든 인스턴스)
+        page_size (int): 페이지당 조회 건수 (기본값: 1000)
+
+    Yields:
+        dict: to_instance_record 형태의 인스턴스 레코드
+    """
+    paginate_kwargs = {"PaginationConfig": {"PageSize": page_size}}
+    if filters:
+        paginate_kwargs["Filters"] = filters
+
+    paginator = ec2.get_paginator("describe_instances")
+    for page in paginator.paginate(**paginate_kwargs):
+        for reservation in page["Reservations"]:
+            for instance in reservation["Instances"]:
+                yield to_instance_record(instance)
+
+
+def _partition_history_path():
+    return os.environ.get("EC2_PARTITION_HISTORY_PATH") or DEFAULT_PARTITION_HISTORY_PATH
+
+
+_history_lock = threading.Lock()
+
+
+def _load_partition_counts(key):
+    try:
+        with open(_partition_history_path(), encoding="utf-8") as file:
+            return json.load(file).get(key)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_partition_counts(key, counts):
+    """
+    이번 조회의 (타입 접두사 2자, 가용 영역)별 인스턴스 수를 저장합니다. (다음 조회의 분할 기준)
+    """
+    path = _partition_history_path()
+    with _history_lock:
+        try:
+            with open(path, encoding="utf-8") as file:
+                history = json.load(file)
+        except (OSError, ValueError):
+            history = {}
+        history[key] = counts
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps(history))
+        os.replace(tmp_path, path)
+
+
+def plan_partitions(counts, partitions, zones=None):
+    """
+    이전 조회의 분할별 인스턴스 수로 조회를 partitions개의 비슷한 크기로 나눕니다.
+    인스턴스 타입 첫 글자 -> 두 글자 -> 가용 영역 순으로, 목표 크기(전체 / partitions)보다 큰 분할만 더 잘게 나눕니다.
+    (모든 접두사/가용 영역을 빠짐없이 포함하므로 분할들의 합은 항상 전체 조회와 같음)
+
+    Args:
+        counts (dict): {"타입 접두사 2자|가용 영역": 인스턴스 수} (None이면 DEFAULT_TYPE_WEIGHTS 분포로 가정)
+        partitions (int): 분할 수 (동시 조회 수)
+        zones (list): 리전의 모든 가용 영역 (None이면 가용 영역으로 나누지 않음)
+
+    Returns:
+        list: 분할 목록 (분할마다 순서대로 조회할 추가 Filters 목록)
+    """
+    if counts is None:
+        counts = DEFAULT_TYPE_WEIGHTS
+
+    first, second, zoned = Counter(), Counter(), Counter()
+    for key, count in counts.items():
+        prefix, _, zone = key.partition("|")
+        first[prefix[:1]] += count
+        second[prefix[:2]] += count
+        zoned[(prefix[:2], zone)] += count
+    target = sum(counts.values()) / partitions
+
+    # (타입 패턴, 가용 영역 목록 또는 None, 예상 인스턴스 수)
+    units, empty = [], []
+    for char in _TYPE_FIRST_CHARS:
+        if first[char] == 0:
+            empty.append(f"{char}*")
+            continue
+        if first[char] <= target:
+            units.append((f"{char}*", None, first[char]))
+            continue
+        for next_char in _TYPE_NEXT_CHARS:
+            prefix = char + next_char
+            if second[prefix] == 0:
+                empty.append(f"{prefix}*")
+            elif second[prefix] <= target or not zones:
+                units.append((f"{prefix}*", None, second[prefix]))
+            else:
+                unseen = [zone for zone in zones if zoned[(prefix, zone)] == 0]
+                units.extend((f"{prefix}*", [zone], zoned[(prefix, zone)])
+                             for zone in zones if zoned[(prefix, zone)])
+                if unseen:
+                    units.append((f"{prefix}*", unseen, 0))
+
+    # 큰 분할부터 가장 작은 묶음에 배정 (같은 묶음의 패턴/가용 영역은 한 요청의 필터 값으로 합쳐 호출 수를 줄임)
+    bins = [{"weight": 0, "patterns": [], "zoned": {}} for _ in range(partitions)]
+    for pattern, zone_values, weight in sorted(units, key=lambda unit: -unit[2]):
+        target_bin = min(bins, key=lambda item: item["weight"])
+        target_bin["weight"] += weight
+        if zone_values is None:
+            target_bin["patterns"].append(pattern)
+        else:
+            target_bin["zoned"].setdefault(pattern, []).extend(zone_values)
+    # 지난 조회에서 인스턴스가 없던 접두사도 빠짐없이 조회 (요청을 늘리지 않도록 패턴 요청이 있는 묶음에 나누어 추가)
+    spare = [item for item in bins if item["patterns"]] or [min(bins, key=lambda item: item["weight"])]
+    for index, pattern in enumerate(empty):
+        spare[index % len(spare)]["patterns"].append(pattern)
+
+    plan = []
+    for item in bins:
+        requests = [[{"Name": "instance-type", "Values": item["patterns"][i:i + FILTER_VALUE_LIMIT]}]
+                    for i in range(0, len(item["patterns"]), FILTER_VALUE_LIMIT)]
+        requests += [[{"Name": "instance-type", "Values": [pattern]},
+                      {"Name": "availability-zone", "Values": zone_values}]
+                     for pattern, zone_values in item["zoned"].items()]
+        if requests:
+            plan.append(requests)
+    return plan
+
+
+def iter_instances_partitioned(ec2, filters=None, partitions=4, history_key=None, page_size=DESCRIBE_INSTANCES_PAGE_SIZE):
+    """
+    describe_instances를 서로 겹치지 않는 서버 측 필터(인스턴스 타입 접두사, 가용 영역)로 나누어 동시에 페이지네이션합니다.
+    NextToken 때문에 한 줄로만 진행되는 페이지 조회를 분할 수만큼 병렬로 진행하므로, 큰 (계정, 리전)의 조회 지연이 줄어듭니다.
+    분할 크기는 이전 조회의 분할별 인스턴스 수(history_key별 저장)에 맞추어 조정되며, 이력이 없으면 일반적인 타입 분포를 가정합니다.
+
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        filters (list): describe_instances Filters (None이면 모든 인스턴스)
+        partitions (int): 분할 수 (동시 조회 수)
+        history_key (str): 분할 이력 키 (예: "프로필|리전", None이면 이력 없이 일반적인 타입 분포로 나눔)
+        page_size (int): 페이지당 조회 건수 (기본값: 1000)
+
+    Yields:
+        dict: to_instance_record 형태의 인스턴스 레코드 (InstanceId 중복 제거, 순서는 분할 조회 완료 순)
+    """
+    filters = list(filters or [])
+    if history_key is not None:
+        history_key = f"{history_key}|{json.dumps(filters, sort_keys=True)}"
+    counts = _load_partition_counts(history_key) if history_key is not None else None
+    zones = None
+    prefix_counts = Counter()
+    for key, count in (counts or {}).items():
+        prefix_counts[key[:2]] += count
+    if prefix_counts and max(prefix_counts.values()) > sum(prefix_counts.values()) / partitions:
+        # 한 타입 접두사가 목표 크기보다 크면 가용 영역으로도 나눔 (빠짐없이 나누도록 리전의 모든 영역 조회)
+        response = ec2.describe_availability_zones(AllAvailabilityZones=True)
+        zones = [zone["ZoneName"] for zone in response["AvailabilityZones"]]
+    plan = plan_partitions(counts, partitions, zones)
+
+    pages = queue.Queue(maxsize=PARTITION_QUEUE_PAGES)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        # 소비자가 중단하면 (예외, 반복 중단) 조회 스레드도 대기하지 않고 종료
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def scan(requests):
+        try:
+            paginator = ec2.get_paginator("describe_instances")
+            for partition_filters in requests:
+                for page in paginator.paginate(Filters=filters + partition_filters,
+                                               PaginationConfig={"PageSize": page_size}):
+                    records = [to_instance_record(instance)
+                               for reservation in page["Reservations"] for instance in reservation["Instances"]]
+                    if not put(records):
+                        return
+        except Exception as error:
+            put(error)
+        finally:
+            put(done)
+
+    executor = ThreadPoolExecutor(max_workers=partitions)
+    try:
+        for requests in plan:
+            executor.submit(scan, requests)
+        seen = set()
+        shard_counts = Counter()
+        remaining = len(plan)
+        while remaining:
+            item = pages.get()
+            if item is done:
+                remaining -= 1
+                continue
+            if isinstance(item, Exception):
+                raise item
+            for record in item:
+                # 조회 중 타입이 바뀐 인스턴스는 두 분할에서 조회될 수 있으므로 중복 제거
+                if record["InstanceId"] in seen:
+                    continue
+                seen.add(record["InstanceId"])
+                shard_counts[f"{(record['InstanceType'] or '')[:2]}|{record['AvailabilityZone'] or ''}"] += 1
+                yield record
+        if history_key is not None:
+            _save_partition_counts(history_key, dict(shard_counts))
+    finally:
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def scan_instances(ec2, filters=None, history_key=None):
+    """
+    EC2_SCAN_PARTITIONS 환경변수가 2 이상이면 분할 병렬 조회(iter_instances_partitioned), 아니면 단일 페이지네이션(iter_instances)으로
+    인스턴스 레코드를 반환합니다. (instance-id/instance-type 필터가 있으면 항상 단일 페이지네이션)
+
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        filters (list): describe_instances Filters (None이면 모든 인스턴스)
+        history_key (str): 분할 이력 키 (예: "프로필|리전")
+
+    Yields:
+        dict: to_instance_record 형태의 인스턴스 레코드
+    """
+    partitions = int(os.environ.get("EC2_SCAN_PARTITIONS") or 0)
+    if partitions > 1 and not any(item["Name"] in ("instance-id", "instance-type") for item in filters or []):
+        return iter_instances_partitioned(ec2, filters, partitions, history_key)
+    return iter_instances(ec2, filters)
+
+
+def find_instances_by_image(ec2, image_ids, filter_limit=IMAGE_ID_FILTER_LIMIT):
+    """
+    여러 AMI ID를 사용하는 인스턴스를 AMI 개수와 관계없이 한 번의 페이지네이션 조회로 찾습니다.
+    - AMI가 filter_limit개 이하: image-id 필터로 해당 인스턴스만 조회
+    - AMI가 더 많음: 필터 없이 한 번 전체 조회하며 AMI ID -> 인스턴스 역색인 생성
+    (모든 인스턴스 상태 포함)
+
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        image_ids (iterable): 검색할 AMI ID 목록
+        filter_limit (int): image-id 필터로 조회할 최대 AMI 개수 (기본값: 200)
+
+    Returns:
+        dict: {AMI ID: 인스턴스 레코드 리스트} (입력 순서 유지, 사용 인스턴스가 없으면 빈 리스트)
+    """
+    index = {image_id: [] for image_id in image_ids}
+    if not index:
+        return index
+
+    if len(index) <= filter_limit:
+        instances = iter_instances(ec2, [{"Name": "image-id", "Values": list(index)}])
+    else:
+        instances = iter_instances(ec2)
+
+    for instance in instances:
+        matches = index.get(instance["ImageId"])
+        if matches is not None:
+            matches.append(instance)
+    return index
+
+
+def parse_image_ids(source):
+    """
+    쉼표/공백으로 구분된 AMI ID 문자열 또는 AMI ID 목록 파일 경로에서 AMI ID를 읽습니다.
+    (파일은 한 줄에 하나 이상, '#' 이후는 주석)
+
+    Args:
+        source (str): AMI ID 문자열 또는 파일 경로
+
+    Returns:
+        list: 중복을 제거한 AMI ID 리스트 (입력 순서 유지)
+    """
+    if os.path.isfile(source):
+        with open(source, encoding="utf-8") as file:
+            text = "\n".join(line.split("#", 1)[0] for line in file)
+    else:
+        text = source
+    return list(dict.fromkeys(token for token in re.split(r"[\s,]+", text) if token))
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# 동시에 처리할 기본 (계정, 리전) 대상 수
+DEFAULT_MAX_WORKERS = 8
+
+# 대상별 실행 결과 (error가 None이 아니면 result는 None)
+TargetResult = namedtuple("TargetResult", ["target", "result", "error", "elapsed"])
+
+
+def fan_out(func, targets, max_workers=DEFAULT_MAX_WORKERS, timeout=None):
+    """
+    (계정, 리전) 등 대상별 함수를 스레드 풀에서 병렬로 실행하고 결과를 스트리밍합니다.
+
+    - 동시 실행 수는 max_workers로 제한됩니다.
+    - 한 대상의 예외/타임아웃은 해당 대상의 TargetResult.error로만 전달되고
+      다른 대상의 처리에는 영향을 주지 않습니다.
+    - 결과는 targets 순서대로 반환되며, 앞선 대상이 끝나는 즉시 반환되므로
+      전체 완료를 기다리지 않고 출력/CSV 저장을 시작할 수 있습니다.
+
+    Args:
+        func (callable): 대상별로 실행할 함수 (func(*target) 형태로 호출)
+        targets (list): 함수 인자 튜플 리스트 (예: [(profile, region), ...])
+        max_workers (int): 최대 동시 실행 수 (기본값: 8)
+        timeout (float): 대상별 실행 제한 시간(초), 실행 시작 시점부터 측정 (None이면 무제한)
+
+    Yields:
+        TargetResult: (대상, 결과, 예외, 소요시간) 튜플
+    """
+    targets = [target if isinstance(target, tuple) else (target,) for target in targets]
+    started = {}
+    finished = {}
+    started_lock = threading.Lock()
+
+    def _run(index, target):
+        with started_lock:
+            started[index] = time.monotonic()
+        try:
+            return func(*target)
+        finally:
+            finished[index] = time.monotonic()
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(targets) or 1)))
+    futures = [executor.submit(_run, index, target) for index, target in enumerate(targets)]
+    try:
+        for index, (target, future) in enumerate(zip(targets, futures)):
+            try:
+                result = _wait_result(future, index, started, timeout)
+                error = None
+            except Exception as e:
+                result = None
+                error = e
+            start = started.get(index)
+            end = finished.get(index, time.monotonic())
+            elapsed = end - start if start is not None else 0.0
+            yield TargetResult(target, result, error, elapsed)
+    finally:
+        # 타임아웃된 작업은 기다리지 않고, 아직 시작하지 않은 작업은 취소
+        for future in futures:
+            future.cancel()
+        executor.shutdown(wait=False)
+
+
+def _wait_result(future, index, started, timeout):
+    """
+    대상별 제한 시간을 고려하여 Future의 결과를 기다립니다.
+
+    Args:
+        future (Future): 대기할 Future
+        index (int): 대상 순번 (실행 시작 시각 조회용)
+        started (dict): 대상 순번별 실행 시작 시각
+        timeout (float): 대상별 실행 제한 시간(초)
+
+    Returns:
+        object: 대상 함수의 반환값
+    """
+    if timeout is None:
+        return future.result()
+
+    while True:
+        if future.done():
+            return future.result()
+
+        start = started.get(index)
+        if start is None:
+            # 아직 실행 대기 중인 경우 (동시 실행 수 제한) 잠시 후 다시 확인
+            wait([future], timeout=0.1)
+            continue
+
+        remaining = start + timeout - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"대상 실행 시간이 {timeout}초를 초과했습니다.")
+        wait([future], timeout=remaining)
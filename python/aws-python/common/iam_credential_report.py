@@ -0,0 +1,94 @@
+import csv
+import io
+import time
+from datetime import datetime
+
+# 자격 증명 보고서 생성 대기 설정 (초)
+REPORT_POLL_INTERVAL = 2
+REPORT_TIMEOUT = 120
+
+# 보고서에서 루트 계정을 나타내는 사용자명
+ROOT_ACCOUNT_USER = "<root_account>"
+
+
+def get_credential_report(iam, poll_interval=REPORT_POLL_INTERVAL, timeout=REPORT_TIMEOUT):
+    """
+    IAM 자격 증명 보고서를 생성하고, 생성이 완료될 때까지 기다린 뒤 CSV 내용을 반환합니다.
+    (사용자 수와 관계없이 generate/get 몇 번의 호출로 전체 사용자 Access Key 정보를 조회)
+
+    Args:
+        iam (botocore.client.IAM): IAM 클라이언트
+        poll_interval (float): 생성 상태 확인 간격(초)
+        timeout (float): 최대 대기 시간(초)
+
+    Returns:
+        str: 자격 증명 보고서 CSV 내용
+    """
+    deadline = time.monotonic() + timeout
+    while True:
+        state = iam.generate_credential_report()["State"]
+        if state == "COMPLETE":
+            break
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"자격 증명 보고서 생성이 {timeout}초 안에 완료되지 않았습니다.")
+        time.sleep(poll_interval)
+
+    return iam.get_credential_report()["Content"].decode("utf-8")
+
+
+def iter_credential_report(iam, include_root=False):
+    """
+    자격 증명 보고서 CSV를 한 번 순회하며 사용자별 행을 반환합니다.
+
+    Args:
+        iam (botocore.client.IAM): IAM 클라이언트
+        include_root (bool): 루트 계정 행 포함 여부 (기본값: False)
+
+    Yields:
+        dict: 보고서 한 행 (user, access_key_1_active, access_key_1_last_rotated 등)
+    """
+    for row in csv.DictReader(io.StringIO(get_credential_report(iam))):
+        if row["user"] == ROOT_ACCOUNT_USER and not include_root:
+            continue
+        yield row
+
+
+def iter_access_keys(row):
+    """
+    보고서 한 행에서 Access Key 슬롯(1, 2)별 정보를 반환합니다.
+
+    Args:
+        row (dict): 자격 증명 보고서 행
+
+    Yields:
+        dict: {"slot", "active", "last_rotated", "last_used_date", "last_used_service"}
+              (날짜는 datetime, 값이 없으면 None)
+    """
+    for slot in (1, 2):
+        prefix = f"access_key_{slot}_"
+        last_rotated = parse_report_date(row.get(prefix + "last_rotated"))
+        if last_rotated is None:
+            # 해당 슬롯에 Access Key가 없음
+            continue
+        yield {
+            "slot": slot,
+            "active": row.get(prefix + "active") == "true",
+            "last_rotated": last_rotated,
+            "last_used_date": parse_report_date(row.get(prefix + "last_used_date")),
+            "last_used_service": row.get(prefix + "last_used_service") or "N/A",
+        }
+
+
+def parse_report_date(value):
+    """
+    보고서의 ISO 8601 날짜 문자열을 datetime으로 변환합니다.
+
+    Args:
+        value (str): 날짜 문자열 (예: 2015-06-16T22:45:00+00:00, N/A, no_information)
+
+    Returns:
+        datetime: 변환된 날짜 (값이 없으면 None)
+    """
+    if not value or value in ("N/A", "not_supported", "no_information"):
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
@@ -0,0 +1,209 @@
+import json
+import os
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+# 디렉토리 파일 기본 경로 (환경변수 IAM_USER_DIRECTORY_PATH로 변경 가능, 실제 파일은 프로필별로 분리)
+DEFAULT_DIRECTORY_PATH = os.path.join(os.path.expanduser("~"), ".cache", "aws-python", "iam_user_directory.json")
+
+# 이 시간(초) 안에 갱신된 디렉토리는 API 호출 없이 사용
+FRESH_SECONDS = 60 * 60
+
+# 이 시간(초)이 지나면 증분 갱신 대신 전체 갱신 (태그/그룹 변경 반영)
+FULL_REFRESH_SECONDS = 24 * 60 * 60
+
+# 인덱스를 만드는 사용자 태그
+INDEXED_TAGS = ("Company", "Team", "Name")
+
+
+def directory_path(profile_name=None):
+    """
+    프로필별 디렉토리 파일 경로를 반환합니다. (예: iam_user_directory.prod.json)
+
+    Args:
+        profile_name (str): AWS 프로필명 (None이면 기본 자격 증명 체인, '@default'로 표시)
+
+    Returns:
+        str: 디렉토리 파일 경로
+    """
+    root, ext = os.path.splitext(os.environ.get("IAM_USER_DIRECTORY_PATH") or DEFAULT_DIRECTORY_PATH)
+    suffix = quote(profile_name, safe="") if profile_name else "@default"
+    return f"{root}.{suffix}{ext}"
+
+
+class IamUserDirectory:
+    """
+    IAM 사용자 정보(태그, 그룹)를 로컬 파일에 저장하고 사용자명/태그/그룹 인덱스로 조회하는 디렉토리입니다.
+
+    - 전체 갱신: 페이지네이션된 get_account_authorization_details(Filter: User) 한 번으로 모든 사용자 조회
+    - 증분 갱신: list_users 결과와 저장된 목록을 비교하여 새로 생성(재생성)된 사용자만 조회, 삭제된 사용자 제거
+    - 저장된 디렉토리가 FRESH_SECONDS 안에 갱신되었다면 API를 호출하지 않음
+    - 디렉토리는 프로필별로 저장하며, 다른 프로필로 저장된 파일은 사용하지 않음 (다른 계정의 사용자를 반환하지 않도록)
+    """
+
+    def __init__(self, iam, path=None, fresh_seconds=FRESH_SECONDS, full_refresh_seconds=FULL_REFRESH_SECONDS,
+                 profile_name=None):
+        """
+        Args:
+            iam (botocore.client.IAM): IAM 클라이언트
+            path (str): 디렉토리 파일 경로 (None이면 directory_path(profile_name))
+            fresh_seconds (float): API 호출 없이 사용하는 최대 경과 시간(초)
+            full_refresh_seconds (float): 전체 갱신 주기(초)
+            profile_name (str): iam 클라이언트의 AWS 프로필명 (None이면 기본 자격 증명 체인)
+        """
+        self.iam = iam
+        self.profile = profile_name or ""
+        self.path = path or directory_path(profile_name)
+        self.fresh_seconds = fresh_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self.users = {}
+        self.refreshed_at = 0
+        self.full_refreshed_at = 0
+        self._tag_index = {}
+        self._group_index = {}
+        self._load()
+
+    def _load(self):
+        """
+        저장된 디렉토리 파일을 읽습니다. (없거나 손상되었거나 다른 프로필의 파일이면 빈 디렉토리)
+        """
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError):
+            return
+        if data.get("profile") != self.profile:
+            return
+        self.users = data.get("users", {})
+        self.refreshed_at = data.get("refreshed_at", 0)
+        self.full_refreshed_at = data.get("full_refreshed_at", 0)
+        self._build_indexes()
+
+    def _save(self):
+        """
+        디렉토리를 임시 파일에 쓴 뒤 교체하여 저장합니다.
+        """
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({
+                "profile": self.profile,
+                "refreshed_at": self.refreshed_at,
+                "full_refreshed_at": self.full_refreshed_at,
+                "users": self.users,
+            }, file, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def _build_indexes(self):
+        """
+        태그(Company/Team/Name)와 그룹 인덱스를 만듭니다.
+        """
+        self._tag_index = {tag: {} for tag in INDEXED_TAGS}
+        self._group_index = {}
+        for username, user in self.users.items():
+            for tag in INDEXED_TAGS:
+                self._tag_index[tag].setdefault(user["Tags"].get(tag, ""), []).append(username)
+            for groupname in user["Groups"]:
+                self._group_index.setdefault(groupname, []).append(username)
+
+    @staticmethod
+    def _to_record(user, groups):
+        """
+        IAM 사용자 응답을 저장용 딕셔너리로 변환합니다.
+        """
+        create_date = user["CreateDate"]
+        return {
+            "UserName": user["UserName"],
+            "UserId": user["UserId"],
+            "CreateDate": create_date.isoformat() if isinstance(create_date, datetime) else create_date,
+            "Tags": {tag["Key"]: tag["Value"] for tag in user.get("Tags", [])},
+            "Groups": list(groups),
+        }
+
+    def full_refresh(self):
+        """
+        get_account_authorization_details로 모든 사용자의 태그와 그룹을 한 번에 조회합니다.
+        """
+        users = {}
+        paginator = self.iam.get_paginator("get_account_authorization_details")
+        for page in paginator.paginate(Filter=["User"]):
+            for user in page["UserDetailList"]:
+                users[user["UserName"]] = self._to_record(user, user.get("GroupList", []))
+        self.users = users
+        self.refreshed_at = self.full_refreshed_at = time.time()
+        self._build_indexes()
+        self._save()
+
+    def incremental_refresh(self):
+        """
+        list_users 결과와 비교하여 새로 생성된(또는 같은 이름으로 재생성된) 사용자만 조회하고,
+        삭제된 사용자는 디렉토리에서 제거합니다.
+        """
+        current = {}
+        paginator = self.iam.get_paginator("list_users")
+        for page in paginator.paginate():
+            for user in page["Users"]:
+                current[user["UserName"]] = user
+
+        users = {}
+        for username, user in current.items():
+            cached = self.users.get(username)
+            if cached and cached["UserId"] == user["UserId"] and cached["CreateDate"] == user["CreateDate"].isoformat():
+                users[username] = cached
+                continue
+            # 새 사용자만 태그/그룹 조회
+            detail = self.iam.get_user(UserName=username)["User"]
+            groups = []
+            for group_page in self.iam.get_paginator("list_groups_for_user").paginate(UserName=username):
+                groups.extend(group["GroupName"] for group in group_page["Groups"])
+            users[username] = self._to_record(detail, groups)
+
+        self.users = users
+        self.refreshed_at = time.time()
+        self._build_indexes()
+        self._save()
+
+    def refresh(self, force=False):
+        """
+        디렉토리 상태에 따라 필요한 만큼만 갱신합니다.
+
+        Args:
+            force (bool): True면 경과 시간과 관계없이 전체 갱신
+        """
+        now = time.time()
+        if force or not self.users or now - self.full_refreshed_at >= self.full_refresh_seconds:
+            self.full_refresh()
+        elif now - self.refreshed_at >= self.fresh_seconds:
+            self.incremental_refresh()
+
+    def get(self, username):
+        """
+        사용자명으로 사용자 정보를 조회합니다.
+
+        Returns:
+            dict: 사용자 정보 (UserName, UserId, CreateDate, Tags, Groups) 또는 None
+        """
+        return self.users.get(username)
+
+    def find_by_tag(self, key, value):
+        """
+        태그 값으로 사용자를 조회합니다. (Company/Team/Name 태그는 인덱스 사용, 태그가 없으면 빈 문자열)
+
+        Returns:
+            list: 사용자 정보 리스트
+        """
+        if key in self._tag_index:
+            return [self.users[username] for username in self._tag_index[key].get(value, [])]
+        return [user for user in self.users.values() if user["Tags"].get(key, "") == value]
+
+    def find_by_group(self, groupname):
+        """
+        그룹에 속한 사용자를 조회합니다.
+
+        Returns:
+            list: 사용자 정보 리스트
+        """
+        return [self.users[username] for username in self._group_index.get(groupname, [])]
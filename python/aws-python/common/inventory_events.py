@@ -0,0 +1,354 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+from common.ami_cache import get_images
+from common.aws_session import get_client
+from common.ec2_inventory import iter_instances
+from common.inventory_snapshot import (_INSTANCE_COLUMNS, _connect, _key, _snapshot_path, _volume_attachments,
+                                       collect_snapshot)
+from common.os_classifier import CLASSIFIER_KEY, classify_os
+
+# 이벤트 반영과 관계없이 전체 재수집하는 주기(초) (환경변수 INVENTORY_RESYNC_SECONDS로 변경 가능)
+DEFAULT_RESYNC_SECONDS = 24 * 60 * 60
+
+# CloudTrail 이벤트가 lookup_events로 조회되기까지의 최대 지연(초) (이 시간 이전까지만 반영 위치를 옮김)
+CLOUDTRAIL_DELIVERY_DELAY_SECONDS = 15 * 60
+
+# instance-id/attachment.instance-id 필터 값 최대 개수
+FILTER_CHUNK_SIZE = 200
+
+# EventBridge EC2 인스턴스 상태 변경 알림 (detail-type)
+STATE_CHANGE_EVENT = "EC2 Instance State-change Notification"
+
+# 반영하는 CloudTrail 이벤트 (ec2.amazonaws.com)
+CLOUDTRAIL_EVENT_NAMES = ("RunInstances", "StartInstances", "StopInstances", "TerminateInstances",
+                          "CreateTags", "DeleteTags", "CreateVolume", "AttachVolume", "DetachVolume", "DeleteVolume")
+
+# CloudTrail에는 전이 완료 이벤트가 없으므로 API 호출 직후의 전이 상태는 완료 상태로 기록
+# (EventBridge 상태 변경 알림을 함께 받으면 알림의 상태가 그대로 반영됨)
+SETTLED_STATES = {"pending": "running", "stopping": "stopped", "shutting-down": "terminated"}
+
+
+class _UnknownResource(LookupError):
+    """
+    스냅샷에 없는 리소스를 변경하는 이벤트 (놓친 이벤트가 있다는 뜻이므로 전체 재수집)
+    """
+
+
+def _epoch(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def _items(container, key):
+    # CloudTrail 요청/응답의 목록 필드 ({"xxxSet": {"items": [...]}})
+    return ((container or {}).get(key) or {}).get("items") or []
+
+
+def normalize_event(event):
+    """
+    EventBridge 이벤트, CloudTrail 레코드, lookup_events 항목을 같은 형태로 변환합니다.
+
+    Args:
+        event (dict): EC2 상태 변경 알림, 'AWS API Call via CloudTrail' 이벤트, CloudTrail 레코드 또는 lookup_events 항목
+
+    Returns:
+        tuple: (발생 시각(epoch 초), 이벤트명, 상세) 또는 None (반영하지 않는 이벤트, 실패한 API 호출)
+    """
+    if "CloudTrailEvent" in event:
+        event = json.loads(event["CloudTrailEvent"])
+    detail_type = event.get("detail-type")
+    if detail_type == STATE_CHANGE_EVENT:
+        return _epoch(event["time"]), STATE_CHANGE_EVENT, event["detail"]
+    if detail_type == "AWS API Call via CloudTrail":
+        event = event["detail"]
+    if (event.get("eventName") not in CLOUDTRAIL_EVENT_NAMES or event.get("errorCode")
+            or event.get("eventSource", "ec2.amazonaws.com") != "ec2.amazonaws.com"):
+        return None
+    return _epoch(event["eventTime"]), event["eventName"], event
+
+
+def load_events(path):
+    """
+    이벤트 파일을 읽습니다. (JSON 배열, CloudTrail 로그 파일({"Records": [...]}) 또는 한 줄에 하나의 JSON)
+    """
+    with open(path, encoding="utf-8") as file:
+        text = file.read()
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+    if isinstance(data, dict):
+        return data.get("Records", [data])
+    return data
+
+
+def fetch_cloudtrail_events(profile_name, region_name, since, until):
+    """
+    CloudTrail 이벤트 기록(lookup_events)에서 기간 내 EC2 변경 이벤트를 조회합니다. (읽기 전용 API 호출 제외)
+
+    Args:
+        since (float): 조회 시작 시각 (epoch 초)
+        until (float): 조회 종료 시각 (epoch 초)
+
+    Yields:
+        dict: lookup_events 항목 (CloudTrailEvent에 레코드 JSON 포함)
+    """
+    paginator = get_client("cloudtrail", profile_name, region_name).get_paginator("lookup_events")
+    pages = paginator.paginate(LookupAttributes=[{"AttributeKey": "ReadOnly", "AttributeValue": "false"}],
+                               StartTime=datetime.fromtimestamp(since, timezone.utc),
+                               EndTime=datetime.fromtimestamp(until, timezone.utc))
+    for page in pages:
+        for event in page["Events"]:
+            if event.get("EventSource") == "ec2.amazonaws.com" and event.get("EventName") in CLOUDTRAIL_EVENT_NAMES:
+                yield event
+
+
+class _EventApplier:
+    """
+    정규화된 이벤트를 하나의 트랜잭션 안에서 스냅샷 테이블에 반영합니다.
+    """
+
+    def __init__(self, conn, profile_key, region_key):
+        self.conn = conn
+        self.key = (profile_key, region_key)
+        self.new_instances = set()
+        self.new_images = set()
+        self.terminated = set()
+        self.next_seq = {table: conn.execute(f"SELECT COALESCE(MAX(seq), -1) + 1 FROM {table} "
+                                             "WHERE profile = ? AND region = ?", self.key).fetchone()[0]
+                         for table in ("instances", "volumes")}
+
+    def _seq(self, table):
+        seq = self.next_seq[table]
+        self.next_seq[table] += 1
+        return seq
+
+    def upsert_instance(self, record):
+        row = self.conn.execute("SELECT seq FROM instances WHERE profile = ? AND region = ? AND instance_id = ?",
+                                self.key + (record["InstanceId"],)).fetchone()
+        seq = row[0] if row else self._seq("instances")
+        self.conn.execute("INSERT OR REPLACE INTO instances VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                          self.key + (seq,) + tuple(record[column] for column in _INSTANCE_COLUMNS)
+                          + (json.dumps(record["Tags"], ensure_ascii=False),))
+        if record["ImageId"] and record["InstanceId"] in self.new_instances:
+            self.new_images.add(record["ImageId"])
+
+    def upsert_volume(self, volume_id, encrypted, attachments):
+        row = self.conn.execute("SELECT seq FROM volumes WHERE profile = ? AND region = ? AND volume_id = ?",
+                                self.key + (volume_id,)).fetchone()
+        seq = row[0] if row else self._seq("volumes")
+        self.conn.execute("INSERT OR REPLACE INTO volumes VALUES (?, ?, ?, ?, ?, ?)",
+                          self.key + (seq, volume_id, int(encrypted), json.dumps(attachments)))
+
+    def _volume(self, volume_id):
+        row = self.conn.execute("SELECT encrypted, attachments FROM volumes "
+                                "WHERE profile = ? AND region = ? AND volume_id = ?", self.key + (volume_id,)).fetchone()
+        if row is None:
+            raise _UnknownResource(volume_id)
+        return bool(row[0]), json.loads(row[1])
+
+    def set_state(self, instance_id, state):
+        updated = self.conn.execute("UPDATE instances SET state = ? WHERE profile = ? AND region = ? AND instance_id = ?",
+                                    (state,) + self.key + (instance_id,)).rowcount
+        if not updated:
+            raise _UnknownResource(instance_id)
+        if state == "terminated":
+            self.terminated.add(instance_id)
+
+    def release_volumes(self):
+        """
+        종료된 인스턴스의 볼륨 중 함께 삭제되는 볼륨은 삭제하고 나머지는 연결 해제합니다.
+        (종료 이벤트마다 볼륨 테이블을 훑지 않도록 모든 이벤트 반영 후 한 번만 확인)
+        """
+        if not self.terminated:
+            return
+        rows = self.conn.execute("SELECT volume_id, encrypted, attachments FROM volumes "
+                                 "WHERE profile = ? AND region = ? AND attachments != '[]'", self.key).fetchall()
+        for volume_id, encrypted, attachments in rows:
+            attachments = json.loads(attachments)
+            released = [attachment for attachment in attachments if attachment["InstanceId"] in self.terminated]
+            if not released:
+                continue
+            if any(attachment.get("DeleteOnTermination") for attachment in released):
+                self.conn.execute("DELETE FROM volumes WHERE profile = ? AND region = ? AND volume_id = ?",
+                                  self.key + (volume_id,))
+            else:
+                self.upsert_volume(volume_id, encrypted,
+                                   [attachment for attachment in attachments if attachment not in released])
+
+    def apply(self, name, detail):
+        if name == STATE_CHANGE_EVENT:
+            self.set_state(detail["instance-id"], detail["state"])
+            return
+        request = detail.get("requestParameters") or {}
+        response = detail.get("responseElements") or {}
+
+        if name == "RunInstances":
+            # 요청의 태그 지정(TagSpecifications)과 응답의 태그를 함께 반영
+            request_tags = {tag["key"]: tag.get("value", "")
+                            for spec in _items(request, "tagSpecificationSet")
+                            if spec.get("resourceType") == "instance" for tag in spec.get("tags", [])}
+            for item in _items(response, "instancesSet"):
+                tags = dict(request_tags)
+                tags.update({tag["key"]: tag.get("value", "") for tag in _items(item, "tagSet")})
+                state = (item.get("instanceState") or {}).get("name", "pending")
+                self.new_instances.add(item["instanceId"])
+                self.upsert_instance({
+                    "InstanceId": item["instanceId"], "Name": tags.get("Name"), "ImageId": item.get("imageId"),
+                    "InstanceType": item.get("instanceType"), "State": SETTLED_STATES.get(state, state),
+                    "Platform": item.get("platform"), "PlatformDetails": None, "UsageOperation": None,
+                    "AvailabilityZone": (item.get("placement") or {}).get("availabilityZone"), "Tags": tags,
+                })
+        elif name in ("StartInstances", "StopInstances", "TerminateInstances"):
+            for item in _items(response, "instancesSet"):
+                state = item["currentState"]["name"]
+                self.set_state(item["instanceId"], SETTLED_STATES.get(state, state))
+        elif name in ("CreateTags", "DeleteTags"):
+            changes = _items(request, "tagSet")
+            for resource in _items(request, "resourcesSet"):
+                instance_id = resource["resourceId"]
+                if not instance_id.startswith("i-"):
+                    continue
+                row = self.conn.execute("SELECT tags FROM instances WHERE profile = ? AND region = ? AND instance_id = ?",
+                                        self.key + (instance_id,)).fetchone()
+                if row is None:
+                    raise _UnknownResource(instance_id)
+                tags = json.loads(row[0])
+                for tag in changes:
+                    if name == "CreateTags":
+                        tags[tag["key"]] = tag.get("value", "")
+                    elif "value" not in tag or tags.get(tag["key"]) == tag["value"]:
+                        tags.pop(tag["key"], None)
+                self.conn.execute("UPDATE instances SET name = ?, tags = ? "
+                                  "WHERE profile = ? AND region = ? AND instance_id = ?",
+                                  (tags.get("Name"), json.dumps(tags, ensure_ascii=False)) + self.key + (instance_id,))
+        elif name == "CreateVolume":
+            # 수집 시작 이후의 이벤트를 다시 적용하는 경우 이미 반영된 연결 정보를 유지
+            try:
+                self._volume(response["volumeId"])
+            except _UnknownResource:
+                self.upsert_volume(response["volumeId"], response.get("encrypted") in (True, "true"), [])
+        elif name == "AttachVolume":
+            encrypted, attachments = self._volume(response["volumeId"])
+            # 다시 적용되는 이벤트(synced_through 경계, 수집 중 발생한 이벤트)는 같은 연결을 중복 추가하지 않음
+            device = response.get("device", "")
+            if any(attachment["InstanceId"] == response["instanceId"] and attachment.get("Device", "") == device
+                   for attachment in attachments):
+                return
+            attachments.append({"InstanceId": response["instanceId"], "Device": device,
+                                "DeleteOnTermination": response.get("deleteOnTermination") in (True, "true")})
+            self.upsert_volume(response["volumeId"], encrypted, attachments)
+        elif name == "DetachVolume":
+            encrypted, attachments = self._volume(response["volumeId"])
+            self.upsert_volume(response["volumeId"], encrypted,
+                               [attachment for attachment in attachments
+                                if attachment["InstanceId"] != response.get("instanceId")])
+        elif name == "DeleteVolume":
+            self.conn.execute("DELETE FROM volumes WHERE profile = ? AND region = ? AND volume_id = ?",
+                              self.key + (request["volumeId"],))
+
+    def enrich(self, ec2):
+        """
+        새 인스턴스는 이벤트에 없는 필드(PlatformDetails, UsageOperation 등)와 함께 생성된 루트 볼륨,
+        스냅샷에 없는 AMI를 새 인스턴스 ID로만 조회하여 채웁니다. (전체 조회 대신 200개 단위 필터 조회)
+        """
+        instance_ids = sorted(self.new_instances)
+        for start in range(0, len(instance_ids), FILTER_CHUNK_SIZE):
+            chunk = instance_ids[start:start + FILTER_CHUNK_SIZE]
+            for record in iter_instances(ec2, [{"Name": "instance-id", "Values": chunk}]):
+                self.upsert_instance(record)
+            paginator = ec2.get_paginator("describe_volumes")
+            for page in paginator.paginate(Filters=[{"Name": "attachment.instance-id", "Values": chunk}]):
+                for volume in page["Volumes"]:
+                    self.upsert_volume(volume["VolumeId"], volume["Encrypted"], _volume_attachments(volume))
+
+        known_images = {row[0] for row in self.conn.execute("SELECT image_id FROM images WHERE profile = ? AND region = ?",
+                                                            self.key)}
+        missing_images = self.new_images - known_images
+        if missing_images:
+            images = get_images(ec2, missing_images, classify_os, CLASSIFIER_KEY, scope=self.key[0])
+            self.conn.executemany("INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  [self.key + (image_id, image.get("Name"), image.get("Description"),
+                                               image.get("Platform"), image.get("PlatformDetails"), image["OsType"])
+                                   for image_id, image in images.items()])
+
+
+def sync_inventory(profile_name, region_name=None, events=None, since=None, until=None, path=None,
+                   resync_seconds=None):
+    """
+    (계정, 리전) 스냅샷에 마지막 반영 위치 이후의 EC2 변경 이벤트만 반영합니다.
+    다음 경우에는 이벤트를 반영하지 않고 collect_snapshot으로 전체 재수집합니다.
+    - 스냅샷이 없거나, 마지막 전체 수집 후 resync_seconds가 지난 경우
+    - 이벤트 구간의 시작(since)이 마지막 반영 위치보다 뒤인 경우 (구간 사이의 이벤트 누락)
+    - 스냅샷에 없는 리소스를 변경하는 이벤트가 있는 경우 (이벤트 누락)
+
+    Args:
+        profile_name (str): AWS 프로필명
+        region_name (str): AWS 리전명 (None이면 프로필 기본 리전)
+        events (iterable): 반영할 이벤트 (None이면 마지막 반영 위치부터 CloudTrail lookup_events로 조회)
+        since (float): events가 포함하는 구간의 시작 시각 (epoch 초, None이면 구간 누락을 확인하지 않음)
+        until (float): events가 포함하는 구간의 끝 시각 (epoch 초, None이면 마지막 이벤트 시각)
+        path (str): 스냅샷 DB 경로 (None이면 INVENTORY_SNAPSHOT_PATH 환경변수 또는 기본 경로)
+        resync_seconds (float): 전체 재수집 주기(초) (None이면 INVENTORY_RESYNC_SECONDS 환경변수 또는 1일)
+
+    Returns:
+        dict: {"mode": "incremental" | "resync", "reason", "events", "applied", "new_instances"}
+    """
+    path = _snapshot_path(path)
+    if resync_seconds is None:
+        resync_seconds = float(os.environ.get("INVENTORY_RESYNC_SECONDS") or DEFAULT_RESYNC_SECONDS)
+    key = _key(profile_name, region_name)
+    now = time.time()
+
+    conn = _connect(path)
+    try:
+        scan = conn.execute("SELECT scanned_at FROM scans WHERE profile = ? AND region = ?", key).fetchone()
+        cursor = conn.execute("SELECT synced_through, applied FROM event_sync WHERE profile = ? AND region = ?",
+                              key).fetchone()
+    finally:
+        conn.close()
+
+    reason = None
+    if scan is None:
+        reason = "no_snapshot"
+    elif now - scan[0] >= resync_seconds:
+        reason = "period"
+    else:
+        # 마지막 반영 위치 (전체 수집 직후에는 수집 시작 시각)
+        synced_through = cursor[0] if cursor else scan[0]
+        if events is None:
+            # CloudTrail 전달 지연 구간은 다음 실행에서 다시 조회
+            since, until = synced_through, max(synced_through, now - CLOUDTRAIL_DELIVERY_DELAY_SECONDS)
+            events = fetch_cloudtrail_events(profile_name, region_name, since, until) if until > since else []
+        if since is not None and since > synced_through:
+            reason = "gap"
+
+    if reason is None:
+        normalized = sorted((item for item in map(normalize_event, events) if item is not None),
+                            key=lambda item: item[0])
+        pending = [item for item in normalized if item[0] >= synced_through]
+        conn = _connect(path)
+        try:
+            with conn:
+                applier = _EventApplier(conn, *key)
+                for _, name, detail in pending:
+                    applier.apply(name, detail)
+                applier.release_volumes()
+                if applier.new_instances:
+                    applier.enrich(get_client("ec2", profile_name, region_name))
+                through = max([synced_through] + ([until] if until is not None else [])
+                              + [item[0] for item in pending])
+                conn.execute("INSERT OR REPLACE INTO event_sync VALUES (?, ?, ?, ?)",
+                             key + (through, (cursor[1] if cursor else 0) + len(pending)))
+            return {"mode": "incremental", "reason": None, "events": len(normalized), "applied": len(pending),
+                    "new_instances": len(applier.new_instances)}
+        except _UnknownResource as error:
+            # 트랜잭션은 롤백되므로 스냅샷은 변경되지 않음
+            reason = f"unknown_resource:{error}"
+        finally:
+            conn.close()
+
+    counts = collect_snapshot(profile_name, region_name, path)
+    return {"mode": "resync", "reason": reason, "events": None, "applied": 0, "new_instances": None, **counts}
@@ -0,0 +1,313 @@
+import json
+import os
+import sqlite3
+import time
+
+from botocore.exceptions import BotoCoreError
+
+from common.ami_cache import get_images
+from common.aws_session import get_client, get_session
+from common.ec2_inventory import iter_instances
+from common.os_classifier import CLASSIFIER_KEY, classify_os
+
+# 스냅샷 DB 경로 (환경변수 INVENTORY_SNAPSHOT_PATH로 변경 가능)
+DEFAULT_SNAPSHOT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "aws-python", "inventory_snapshot.sqlite3")
+
+# describe_volumes 페이지당 최대 조회 건수 (API 허용 범위: 5 ~ 500)
+DESCRIBE_VOLUMES_PAGE_SIZE = 500
+
+# describe_instance_information 페이지당 최대 조회 건수 (API 허용 범위: 5 ~ 50)
+DESCRIBE_INSTANCE_INFORMATION_PAGE_SIZE = 50
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scans (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    PRIMARY KEY (profile, region)
+);
+CREATE TABLE IF NOT EXISTS instances (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    instance_id TEXT NOT NULL,
+    name TEXT,
+    image_id TEXT,
+    instance_type TEXT,
+    state TEXT,
+    platform TEXT,
+    platform_details TEXT,
+    usage_operation TEXT,
+    availability_zone TEXT,
+    tags TEXT NOT NULL,
+    PRIMARY KEY (profile, region, instance_id)
+);
+CREATE TABLE IF NOT EXISTS images (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    image_id TEXT NOT NULL,
+    name TEXT,
+    description TEXT,
+    platform TEXT,
+    platform_details TEXT,
+    os_type TEXT,
+    PRIMARY KEY (profile, region, image_id)
+);
+CREATE TABLE IF NOT EXISTS volumes (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    volume_id TEXT NOT NULL,
+    encrypted INTEGER NOT NULL,
+    attachments TEXT NOT NULL,
+    PRIMARY KEY (profile, region, volume_id)
+);
+CREATE TABLE IF NOT EXISTS ssm (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    instance_id TEXT NOT NULL,
+    ping_status TEXT,
+    PRIMARY KEY (profile, region, instance_id)
+);
+CREATE TABLE IF NOT EXISTS event_sync (
+    profile TEXT NOT NULL,
+    region TEXT NOT NULL,
+    synced_through REAL NOT NULL,
+    applied INTEGER NOT NULL,
+    PRIMARY KEY (profile, region)
+);
+"""
+
+# 전체 수집 시 (계정, 리전)별로 교체하는 테이블 (이벤트 반영 위치도 수집 시각부터 다시 시작)
+_TABLES = ("instances", "images", "volumes", "ssm", "scans", "event_sync")
+
+_INSTANCE_COLUMNS = ("InstanceId", "Name", "ImageId", "InstanceType", "State", "Platform",
+                     "PlatformDetails", "UsageOperation", "AvailabilityZone")
+
+
+def _connect(path):
+    """
+    스냅샷 DB에 연결합니다. (동시 쓰기를 위해 WAL 모드와 잠금 대기 시간 설정)
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def _key(profile_name, region_name):
+    """
+    (프로필, 리전) 저장 키를 만듭니다. (None 프로필은 기본 프로필을 뜻하는 빈 문자열로 저장)
+    리전이 None이면 실시간 조회와 같이 프로필 기본 리전으로 바꾸어, 리전을 지정한 수집과 지정하지 않은 보고서가 같은 키를 사용합니다.
+    (프로필 기본 리전을 알 수 없으면 빈 문자열)
+    """
+    if region_name is None:
+        try:
+            region_name = get_session(profile_name).region_name
+        except BotoCoreError:
+            region_name = None
+    return profile_name or "", region_name or ""
+
+
+def _snapshot_path(path):
+    return path or os.environ.get("INVENTORY_SNAPSHOT_PATH") or DEFAULT_SNAPSHOT_PATH
+
+
+def _volume_attachments(volume):
+    """
+    describe_volumes 응답의 Attachments 중 EBS 보고서와 이벤트 반영(종료 시 함께 삭제 여부)에 필요한 필드만 남깁니다.
+    """
+    return [{"InstanceId": attachment["InstanceId"], "Device": attachment.get("Device", ""),
+             "DeleteOnTermination": attachment.get("DeleteOnTermination", False)}
+            for attachment in volume.get("Attachments", [])]
+
+
+def collect_snapshot(profile_name, region_name=None, path=None):
+    """
+    (계정, 리전)의 인스턴스(모든 상태), AMI, EBS 볼륨, SSM 관리형 인스턴스 정보를 한 번씩 조회하여
+    스냅샷 DB에 저장합니다. 같은 (계정, 리전)의 이전 스냅샷은 교체됩니다.
+
+    Args:
+        profile_name (str): AWS 프로필명
+        region_name (str): AWS 리전명 (None이면 프로필 기본 리전 사용)
+        path (str): 스냅샷 DB 경로 (None이면 INVENTORY_SNAPSHOT_PATH 환경변수 또는 기본 경로)
+
+    Returns:
+        dict: 저장된 항목 수 {"instances", "images", "volumes", "ssm"}
+    """
+    ec2 = get_client("ec2", profile_name, region_name)
+    ssm = get_client("ssm", profile_name, region_name)
+    profile_key, region_key = _key(profile_name, region_name)
+    # 수집 중에 발생한 변경도 이후 이벤트 반영(inventory_events.sync_inventory)에서 다시 적용되도록 시작 시각을 기록
+    started_at = time.time()
+
+    # 인스턴스: 보고서별 상태 조건은 조회 시 적용하므로 모든 상태를 한 번에 수집
+    instance_rows = []
+    for seq, record in enumerate(iter_instances(ec2)):
+        instance_rows.append((profile_key, region_key, seq)
+                             + tuple(record[column] for column in _INSTANCE_COLUMNS)
+                             + (json.dumps(record["Tags"], ensure_ascii=False),))
+
+    # AMI: 공용 AMI 캐시를 거쳐 캐시에 없는 AMI만 describe_images 호출
+    image_ids = {row[5] for row in instance_rows if row[5]}
+    images = get_images(ec2, image_ids, classify_os, CLASSIFIER_KEY, scope=profile_key)
+    image_rows = [(profile_key, region_key, image_id, image.get("Name"), image.get("Description"),
+                   image.get("Platform"), image.get("PlatformDetails"), image["OsType"])
+                  for image_id, image in images.items()]
+
+    # EBS 볼륨: 암호화 보고서에 필요한 필드만 저장
+    volume_rows = []
+    paginator = ec2.get_paginator("describe_volumes")
+    seq = 0
+    for page in paginator.paginate(PaginationConfig={"PageSize": DESCRIBE_VOLUMES_PAGE_SIZE}):
+        for volume in page["Volumes"]:
+            volume_rows.append((profile_key, region_key, seq, volume["VolumeId"],
+                                int(volume["Encrypted"]), json.dumps(_volume_attachments(volume))))
+            seq += 1
+
+    # SSM: 조회 실패 시 (권한 부족 등) 모든 인스턴스를 연결 불가로 처리 (ck-ssm.py와 동일)
+    ssm_rows = []
+    try:
+        paginator = ssm.get_paginator("describe_instance_information")
+        for page in paginator.paginate(PaginationConfig={"PageSize": DESCRIBE_INSTANCE_INFORMATION_PAGE_SIZE}):
+            for info in page.get("InstanceInformationList", []):
+                ssm_rows.append((profile_key, region_key, info["InstanceId"], info.get("PingStatus")))
+    except Exception:
+        ssm_rows = []
+
+    conn = _connect(_snapshot_path(path))
+    try:
+        with conn:
+            for table in _TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE profile = ? AND region = ?", (profile_key, region_key))
+            conn.executemany("INSERT INTO instances VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", instance_rows)
+            conn.executemany("INSERT INTO images VALUES (?, ?, ?, ?, ?, ?, ?, ?)", image_rows)
+            conn.executemany("INSERT INTO volumes VALUES (?, ?, ?, ?, ?, ?)", volume_rows)
+            conn.executemany("INSERT OR REPLACE INTO ssm VALUES (?, ?, ?, ?)", ssm_rows)
+            conn.execute("INSERT INTO scans VALUES (?, ?, ?)", (profile_key, region_key, time.time()))
+            conn.execute("INSERT INTO event_sync VALUES (?, ?, ?, ?)", (profile_key, region_key, started_at, 0))
+    finally:
+        conn.close()
+
+    return {"instances": len(instance_rows), "images": len(image_rows),
+            "volumes": len(volume_rows), "ssm": len(ssm_rows)}
+
+
+class InventorySnapshot:
+    """
+    collect_snapshot으로 저장한 스냅샷을 API 호출 없이 조회합니다.
+    각 메서드는 실시간 조회 함수(iter_instances, get_images, describe_volumes,
+    describe_instance_information)와 같은 형태의 결과를 반환하므로, 보고서 로직을 그대로 사용할 수 있습니다.
+    """
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): 스냅샷 DB 경로 (None이면 INVENTORY_SNAPSHOT_PATH 환경변수 또는 기본 경로)
+        """
+        self.path = _snapshot_path(path)
+
+    def _query(self, sql, params):
+        conn = _connect(self.path)
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            conn.close()
+
+    def scanned_at(self, profile_name, region_name=None):
+        """
+        (계정, 리전) 스냅샷의 수집 시각을 반환합니다.
+
+        Returns:
+            float: 수집 시각 (epoch 초)
+
+        Raises:
+            LookupError: 해당 (계정, 리전)의 스냅샷이 없는 경우
+        """
+        rows = self._query("SELECT scanned_at FROM scans WHERE profile = ? AND region = ?",
+                           _key(profile_name, region_name))
+        if not rows:
+            raise LookupError(f"'{profile_name}' ({region_name or '기본 리전'}) 스냅샷이 없습니다. collect_snapshot을 먼저 실행하세요.")
+        return rows[0][0]
+
+    def iter_instances(self, profile_name, region_name=None, states=None):
+        """
+        인스턴스 레코드를 수집 순서대로 반환합니다. (common.ec2_inventory.iter_instances와 같은 형태)
+
+        Args:
+            states (list): 인스턴스 상태 조건 (None이면 모든 상태)
+
+        Yields:
+            dict: to_instance_record 형태의 인스턴스 레코드
+        """
+        self.scanned_at(profile_name, region_name)
+        sql = ("SELECT instance_id, name, image_id, instance_type, state, platform, platform_details, "
+               "usage_operation, availability_zone, tags FROM instances WHERE profile = ? AND region = ?")
+        params = list(_key(profile_name, region_name))
+        if states is not None:
+            sql += f" AND state IN ({','.join('?' * len(states))})"
+            params.extend(states)
+        for row in self._query(sql + " ORDER BY seq", params):
+            record = dict(zip(_INSTANCE_COLUMNS, row[:-1]))
+            record["Tags"] = json.loads(row[-1])
+            yield record
+
+    def get_images(self, profile_name, region_name=None, image_ids=None):
+        """
+        AMI 정보와 OS 분류 결과를 반환합니다. (common.ami_cache.get_images와 같은 형태)
+
+        Args:
+            image_ids (iterable): 조회할 AMI ID 목록 (None이면 스냅샷의 모든 AMI)
+
+        Returns:
+            dict: {AMI ID: {"ImageId", "Name", "Description", "Platform", "PlatformDetails", "OsType"}}
+        """
+        self.scanned_at(profile_name, region_name)
+        rows = self._query("SELECT image_id, name, description, platform, platform_details, os_type "
+                           "FROM images WHERE profile = ? AND region = ?", _key(profile_name, region_name))
+        wanted = None if image_ids is None else set(image_ids)
+        return {row[0]: dict(zip(("ImageId", "Name", "Description", "Platform", "PlatformDetails", "OsType"), row))
+                for row in rows if wanted is None or row[0] in wanted}
+
+    def find_instances_by_image(self, profile_name, region_name=None, image_ids=()):
+        """
+        여러 AMI를 사용하는 인스턴스를 반환합니다. (common.ec2_inventory.find_instances_by_image와 같은 형태)
+
+        Returns:
+            dict: {AMI ID: 인스턴스 레코드 리스트} (입력 순서 유지)
+        """
+        index = {image_id: [] for image_id in image_ids}
+        if not index:
+            return index
+        for instance in self.iter_instances(profile_name, region_name):
+            matches = index.get(instance["ImageId"])
+            if matches is not None:
+                matches.append(instance)
+        return index
+
+    def iter_volumes(self, profile_name, region_name=None):
+        """
+        EBS 볼륨을 수집 순서대로 반환합니다. (describe_volumes Volume 항목 중 VolumeId, Encrypted, Attachments)
+
+        Yields:
+            dict: {"VolumeId", "Encrypted", "Attachments": [{"InstanceId", "Device", "DeleteOnTermination"}]}
+        """
+        self.scanned_at(profile_name, region_name)
+        rows = self._query("SELECT volume_id, encrypted, attachments FROM volumes "
+                           "WHERE profile = ? AND region = ? ORDER BY seq", _key(profile_name, region_name))
+        for volume_id, encrypted, attachments in rows:
+            yield {"VolumeId": volume_id, "Encrypted": bool(encrypted), "Attachments": json.loads(attachments)}
+
+    def get_ssm_ping_status_map(self, profile_name, region_name=None):
+        """
+        SSM 관리형 인스턴스의 PingStatus를 반환합니다.
+
+        Returns:
+            dict: {인스턴스ID: PingStatus}
+        """
+        self.scanned_at(profile_name, region_name)
+        return dict(self._query("SELECT instance_id, ping_status FROM ssm WHERE profile = ? AND region = ?",
+                                _key(profile_name, region_name)))
@@ -0,0 +1,354 @@
+import hashlib
+import re
+from collections import Counter
+from functools import lru_cache
+
+# AMI 설명/이름에서 OS를 추출하는 규칙 (위에 있을수록 우선순위가 높음)
+# 예: "base-image:GI-amazonlinux2023-arm-V20240819-CyberArk..."
+OS_PATTERN_RULES = [
+    # Amazon Linux (al2023, EKS 노드 패턴 포함)
+    # 띄어 쓴 "amazon linux 2"는 골든/커스텀 AMI 설명(예: "Built from Amazon Linux 2 AMI")용 (AL2023 규칙 다음에 적용)
+    (("amazonlinux2023", "amazon-linux-2023", "amazon linux 2023", "al2023"), "Amazon Linux 2023"),
+    (("amazonlinux2", "amazon-linux-2", "amazon linux 2"), "Amazon Linux 2"),
+    (("amazonlinux", "amazon-linux"), "Amazon Linux 1"),  # 버전 번호가 없으면 Amazon Linux 1로 추정
+    # Ubuntu
+    (("ubuntu-22.04", "ubuntu22.04", "ubuntu-jammy"), "Ubuntu 22.04 LTS"),
+    (("ubuntu-20.04", "ubuntu20.04", "ubuntu-focal"), "Ubuntu 20.04 LTS"),
+    (("ubuntu-18.04", "ubuntu18.04", "ubuntu-bionic"), "Ubuntu 18.04 LTS"),
+    (("ubuntu",), "Ubuntu"),
+    # CentOS
+    (("centos-8", "centos8"), "CentOS 8"),
+    (("centos-7", "centos7"), "CentOS 7"),
+    (("centos-6", "centos6"), "CentOS 6"),
+    (("centos",), "CentOS"),
+    # RHEL
+    (("rhel-9", "rhel9"), "Red Hat Enterprise Linux 9"),
+    (("rhel-8", "rhel8"), "Red Hat Enterprise Linux 8"),
+    (("rhel-7", "rhel7"), "Red Hat Enterprise Linux 7"),
+    (("red-hat", "rhel"), "Red Hat Enterprise Linux"),
+    # Debian
+    (("debian-12", "debian12"), "Debian 12"),
+    (("debian-11", "debian11"), "Debian 11"),
+    (("debian-10", "debian10"), "Debian 10"),
+    (("debian",), "Debian"),
+    # Windows
+    (("windows-2022", "windows2022", "win2022"), "Windows Server 2022"),
+    (("windows-2019", "windows2019", "win2019"), "Windows Server 2019"),
+    (("windows-2016", "windows2016", "win2016"), "Windows Server 2016"),
+    (("windows", "win-"), "Windows"),
+]
+
+# OS_PATTERN_RULES로 판별되지 않은 AMI 이름에만 적용하는 추가 규칙
+# (amazonlinux, ubuntu, centos 등 OS_PATTERN_RULES 패턴을 포함하는 규칙은 이미 위에서 판별되므로 제외)
+NAME_FALLBACK_RULES = [
+    (("amzn2-ami",), "Amazon Linux 2"),
+    (("al2-ami",), "Amazon Linux 1"),
+    (("suse", "sles"), "SUSE Linux"),
+    (("alpine",), "Alpine Linux"),
+]
+
+# PlatformDetails에 linux가 없는 경우에만 적용하는 AMI 이름 규칙
+NON_LINUX_NAME_RULES = [
+    (("freebsd",), "FreeBSD"),
+    (("openbsd",), "OpenBSD"),
+    (("netbsd",), "NetBSD"),
+]
+
+# 메모이제이션 최대 항목 수
+CLASSIFY_CACHE_SIZE = 65536
+
+# 인스턴스 필드만으로 OS를 판별하는 단계 (앞의 단계부터 적용, 모두 판별되지 않으면 AMI 조회 단계)
+INSTANCE_TIERS = ("platform", "platform_details", "usage_operation")
+IMAGE_TIER = "image"
+
+# 인스턴스 PlatformDetails 규칙 (과금 플랫폼이므로 Linux/UNIX, Linux with SQL Server 등은 배포판을 알 수 없어 AMI 조회)
+PLATFORM_DETAILS_RULES = [
+    (("windows",), "Windows"),
+    (("red hat",), "Red Hat Enterprise Linux"),
+    (("suse",), "SUSE Linux"),
+    (("ubuntu pro",), "Ubuntu Pro"),
+]
+
+# PlatformDetails가 없는 경우 적용하는 인스턴스 UsageOperation(과금 코드) 규칙
+# (RunInstances, RunInstances:0004/0200/0400 등 Linux 공통 코드는 배포판을 알 수 없어 AMI 조회)
+USAGE_OPERATION_RULES = {
+    "RunInstances:0002": "Windows",
+    "RunInstances:0006": "Windows",
+    "RunInstances:0102": "Windows",
+    "RunInstances:0202": "Windows",
+    "RunInstances:0800": "Windows",
+    "RunInstances:0010": "Red Hat Enterprise Linux",
+    "RunInstances:0014": "Red Hat Enterprise Linux",
+    "RunInstances:0110": "Red Hat Enterprise Linux",
+    "RunInstances:0210": "Red Hat Enterprise Linux",
+    "RunInstances:1010": "Red Hat Enterprise Linux",
+    "RunInstances:1014": "Red Hat Enterprise Linux",
+    "RunInstances:1110": "Red Hat Enterprise Linux",
+    "RunInstances:00g0": "Red Hat Enterprise Linux",
+    "RunInstances:000g": "SUSE Linux",
+    "RunInstances:0g00": "Ubuntu Pro",
+}
+
+
+def _trie_pattern(words):
+    """
+    패턴 목록을 트라이 구조의 정규식 문자열로 변환합니다.
+    (예: amazonlinux, amazonlinux2 -> amazonlinux(?:2)?)
+    한 위치에서 여러 패턴이 겹치면 가장 긴 패턴이 선택됩니다.
+
+    Args:
+        words (iterable): 패턴 문자열 목록
+
+    Returns:
+        str: 정규식 문자열
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def _build(node):
+        terminal = "" in node
+        branches = [re.escape(char) + _build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            return "(?:" + body + ")?"
+        return body
+
+    return _build(trie)
+
+
+def _compile_rules(*rule_tables):
+    """
+    우선순위 순서의 규칙 테이블들을 하나의 정규식으로 컴파일합니다.
+    각 위치에서 lookahead로 가장 긴 패턴을 찾으므로, 한 번의 스캔으로
+    문자열에 포함된 패턴 중 최우선 규칙을 알 수 있습니다.
+
+    Args:
+        *rule_tables (list): (패턴 튜플, OS명) 리스트들 (앞의 테이블이 우선)
+
+    Returns:
+        tuple: (컴파일된 정규식, {패턴: (우선순위, OS명, 테이블 순번)})
+    """
+    priorities = {}
+    priority = 0
+    for table_index, rules in enumerate(rule_tables):
+        for patterns, os_name in rules:
+            for pattern in patterns:
+                priorities.setdefault(pattern, (priority, os_name, table_index))
+            priority += 1
+
+    # 같은 위치에서 겹치는 패턴(접두사 관계)은 긴 패턴이 선택되므로, 긴 패턴의 우선순위가 더 높아야 함
+    for short in priorities:
+        for long in priorities:
+            if long != short and long.startswith(short) and priorities[long][0] > priorities[short][0]:
+                raise ValueError(f"'{long}' 패턴은 접두사 패턴 '{short}'보다 우선순위가 높아야 합니다.")
+
+    regex = re.compile("(?=(" + _trie_pattern(priorities) + "))")
+    return regex, priorities
+
+
+_DESCRIPTION_REGEX, _DESCRIPTION_PRIORITIES = _compile_rules(OS_PATTERN_RULES)
+_NAME_REGEX, _NAME_PRIORITIES = _compile_rules(OS_PATTERN_RULES, NAME_FALLBACK_RULES, NON_LINUX_NAME_RULES)
+
+# ami_cache의 classify_os 분류 결과 캐시 키
+# (규칙 테이블의 해시를 포함하므로 규칙이 바뀌면 이전 규칙으로 저장된 분류 결과를 사용하지 않음)
+CLASSIFIER_KEY = "os_classifier:" + hashlib.sha1(
+    repr((OS_PATTERN_RULES, NAME_FALLBACK_RULES, NON_LINUX_NAME_RULES)).encode()).hexdigest()[:12]
+
+
+def _best_match(regex, priorities, text):
+    """
+    문자열을 한 번 스캔하여 가장 우선순위가 높은 규칙을 반환합니다.
+
+    Returns:
+        tuple: (OS명, 테이블 순번) 또는 (None, None)
+    """
+    best = None
+    for match in regex.finditer(text):
+        candidate = priorities[match.group(1)]
+        if best is None or candidate[0] < best[0]:
+            best = candidate
+            if best[0] == 0:
+                break
+    if best is None:
+        return None, None
+    return best[1], best[2]
+
+
+@lru_cache(maxsize=CLASSIFY_CACHE_SIZE)
+def _classify(name, description, platform, platform_details):
+    """
+    소문자로 변환된 AMI 필드로 OS 타입을 판별합니다. (필드별 1회 스캔)
+    """
+    desc_os, _ = _best_match(_DESCRIPTION_REGEX, _DESCRIPTION_PRIORITIES, description)
+
+    # AWS에서 제공하는 Platform 필드를 우선 확인 (가장 정확)
+    if platform == "windows":
+        # 설명에서 더 상세한 Windows 버전 찾기
+        if desc_os and desc_os.startswith("Windows"):
+            return desc_os
+        return "Windows"
+
+    # AMI 설명에서 OS 정보 추출 (우선순위 높음)
+    if desc_os:
+        return desc_os
+
+    # AMI 이름에서 OS 정보 추출 (이름 전용 규칙도 같은 스캔에서 함께 판별)
+    name_os, table_index = _best_match(_NAME_REGEX, _NAME_PRIORITIES, name)
+    if table_index == 0:
+        return name_os
+
+    # PlatformDetails 필드 확인 (더 상세한 정보)
+    if "windows" in platform_details:
+        return "Windows"
+    elif "linux" in platform_details:
+        # Linux 계열 상세 분류 (BSD 규칙은 적용하지 않음)
+        if table_index == 1:
+            return name_os
+        return "Linux (Other)"
+
+    # 이름 기반 분류 (Platform 정보가 없는 경우)
+    if name_os:
+        return name_os
+
+    # 기본적으로 Linux 계열로 추정 (대부분의 EC2 인스턴스가 Linux)
+    if platform_details:
+        return "Unknown"
+
+    return "Linux (Unknown Distribution)"
+
+
+def classify_os(image):
+    """
+    AMI 정보를 기반으로 OS 타입을 판별합니다.
+    규칙 테이블은 모듈 로드 시 한 번만 컴파일되며, 결과는
+    (이름, 설명, Platform, PlatformDetails) 기준으로 메모이제이션됩니다.
+
+    Args:
+        image (dict): AMI 정보 (Name, Description, Platform, PlatformDetails)
+
+    Returns:
+        str: OS 타입 (예: Amazon Linux 2, Ubuntu 22.04 LTS, Windows Server 2019)
+    """
+    return _classify(
+        (image.get("Name") or "").lower(),
+        (image.get("Description") or "").lower(),
+        (image.get("Platform") or "").lower(),
+        (image.get("PlatformDetails") or "").lower(),
+    )
+
+
+def classify_instance(instance):
+    """
+    AMI 조회 없이 인스턴스 필드(Platform, PlatformDetails, UsageOperation)만으로 OS 타입을 판별합니다.
+    Windows, RHEL, SUSE 등 과금 플랫폼이 구분되는 OS만 판별되며, Linux/UNIX 인스턴스는
+    AMI 이름으로 배포판을 판별해야 하므로 None을 반환합니다.
+
+    Args:
+        instance (dict): 인스턴스 레코드 (Platform, PlatformDetails, UsageOperation)
+
+    Returns:
+        tuple: (OS 타입 또는 None, 판별 단계 (INSTANCE_TIERS 중 하나 또는 IMAGE_TIER))
+    """
+    if (instance.get("Platform") or "").lower() == "windows":
+        return "Windows", "platform"
+
+    platform_details = (instance.get("PlatformDetails") or "").lower()
+    for patterns, os_name in PLATFORM_DETAILS_RULES:
+        if any(pattern in platform_details for pattern in patterns):
+            return os_name, "platform_details"
+
+    os_name = USAGE_OPERATION_RULES.get(instance.get("UsageOperation") or "")
+    if os_name:
+        return os_name, "usage_operation"
+    return None, IMAGE_TIER
+
+
+def refine_os(instance_os, image_os):
+    """
+    인스턴스 필드로 판별한 OS와 AMI로 판별한 OS 중 더 상세한 값을 선택합니다.
+    AMI 결과가 같은 계열이면 버전이 포함된 AMI 결과를 사용합니다. (예: Windows -> Windows Server 2019)
+
+    Args:
+        instance_os (str): classify_instance 결과 (None이면 AMI 결과 사용)
+        image_os (str): classify_os 결과 (None이면 AMI 정보 없음)
+
+    Returns:
+        str: OS 타입 (둘 다 없으면 None)
+    """
+    if instance_os is None or image_os is None:
+        return instance_os or image_os
+    if image_os.split()[0] == instance_os.split()[0]:
+        return image_os
+    return instance_os
+
+
+class OsTierStats:
+    """
+    인스턴스 필드 단계별 OS 판별 건수와, 그 덕분에 AMI 조회를 생략한 AMI 수를 집계합니다.
+    """
+
+    def __init__(self):
+        self.instances = Counter()  # 판별 단계별 인스턴스 수
+        self.image_tiers = {}  # AMI ID별 처음 판별된 단계
+        self.looked_up = set()  # 실제 조회를 요청한 AMI ID
+        self.merged_avoided = Counter()  # merge로 합산한 다른 (계정, 리전)의 단계별 생략 AMI 수
+        self.merged_lookups = 0  # merge로 합산한 다른 (계정, 리전)의 조회 AMI 수
+
+    def classify(self, instance):
+        """
+        classify_instance로 OS를 판별하고 단계별 건수를 기록합니다.
+
+        Returns:
+            str: OS 타입 (AMI 조회가 필요하면 None)
+        """
+        os_name, tier = classify_instance(instance)
+        self.instances[tier] += 1
+        if instance.get("ImageId"):
+            self.image_tiers.setdefault(instance["ImageId"], tier)
+        return os_name
+
+    def record_lookups(self, image_ids):
+        """
+        조회를 요청한 AMI ID를 기록합니다.
+        """
+        self.looked_up.update(image_ids)
+
+    def avoided(self):
+        """
+        Returns:
+            dict: {판별 단계: 조회하지 않은 고유 AMI 수}
+        """
+        counts = Counter(tier for image_id, tier in self.image_tiers.items() if image_id not in self.looked_up)
+        counts.update(self.merged_avoided)
+        return {tier: counts[tier] for tier in INSTANCE_TIERS}
+
+    def merge(self, other):
+        """
+        다른 (계정, 리전)의 집계를 합산합니다. (AMI ID는 계정/리전별로 구분)
+        """
+        self.instances.update(other.instances)
+        self.merged_avoided.update(other.avoided())
+        self.merged_lookups += other.lookups()
+
+    def lookups(self):
+        """
+        Returns:
+            int: 조회를 요청한 고유 AMI 수
+        """
+        return len(self.looked_up) + self.merged_lookups
+
+    def summary(self):
+        """
+        Returns:
+            str: 보고서용 한 줄 요약
+        """
+        avoided = self.avoided()
+        return (f"AMI 조회 {self.lookups()}개, 인스턴스 필드 판별로 생략 {sum(avoided.values())}개 "
+                f"(Platform {avoided['platform']}, PlatformDetails {avoided['platform_details']}, "
+                f"UsageOperation {avoided['usage_operation']})")
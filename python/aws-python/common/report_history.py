@@ -0,0 +1,338 @@
+import heapq
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from operator import itemgetter
+
+# 보고서 이력 디렉토리 (환경변수 REPORT_HISTORY_DIR로 변경 가능)
+DEFAULT_HISTORY_DIR = os.path.join(os.path.expanduser("~"), ".cache", "aws-python", "report_history")
+
+# 보고서별로 보관할 이력 수 (환경변수 REPORT_HISTORY_KEEP으로 변경 가능)
+DEFAULT_HISTORY_KEEP = 30
+
+# 메모리에서 한 번에 정렬하는 최대 행 수 (넘으면 정렬된 구간을 임시 파일로 내보낸 뒤 병합)
+SORT_RUN_ROWS = 50000
+
+HISTORY_SUFFIX = ".jsonl"
+
+# json.dumps는 기본값이 아닌 옵션을 주면 호출마다 인코더를 만들므로 하나를 재사용
+_ENCODER = json.JSONEncoder(ensure_ascii=False)
+
+
+def _history_dir(directory):
+    return directory or os.environ.get("REPORT_HISTORY_DIR") or DEFAULT_HISTORY_DIR
+
+
+def _key_func(columns, key_columns):
+    """
+    행(컬럼 순서의 값 리스트)에서 정렬/비교 키를 만드는 함수를 반환합니다. (값 타입과 관계없이 문자열로 비교)
+    """
+    indexes = [columns.index(column) for column in key_columns]
+    return lambda row: tuple("" if row[index] is None else str(row[index]) for index in indexes)
+
+
+def _write_run(entries):
+    """
+    키 순서로 정렬된 (키, JSON 행) 목록을 임시 파일에 한 줄씩 저장하고, 처음부터 읽을 수 있는 파일 객체를 반환합니다.
+    (한 줄은 "JSON 키<TAB>JSON 행", JSON 문자열 안의 탭은 이스케이프되므로 첫 탭으로 구분, 닫으면 삭제)
+    """
+    run = tempfile.TemporaryFile(mode="w+", encoding="utf-8")
+    for key, line in entries:
+        run.write(f"{_ENCODER.encode(key)}\t{line}\n")
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    """
+    _write_run으로 저장한 임시 파일에서 (키, JSON 행)을 순서대로 읽습니다. (행은 다시 파싱하지 않음)
+    """
+    for entry in run:
+        key, line = entry.rstrip("\n").split("\t", 1)
+        yield tuple(json.loads(key)), line
+
+
+def target_query(profiles, regions=None):
+    """
+    조회 대상 프로필/리전 목록을 조회 조건(query)에 넣을 정렬된 형태로 변환합니다.
+    (대상이 다른 실행이 대상 차이만큼 대량의 추가/삭제로 보이지 않도록 조회 조건에 포함)
+
+    Args:
+        profiles (iterable): 조회한 AWS 프로필명 목록
+        regions (list): 조회한 리전 목록 (None이면 프로필 기본 리전, ''로 표시)
+
+    Returns:
+        dict: {"profiles": 정렬된 프로필 목록, "regions": 정렬된 리전 목록}
+    """
+    return {"profiles": sorted(set(profiles)), "regions": sorted({region or "" for region in regions or [None]})}
+
+
+class ReportHistory:
+    """
+    보고서 결과 행을 키 순서로 정렬하여 보고서별 이력 파일(JSON Lines)로 저장합니다.
+    첫 줄은 헤더(컬럼, 키 컬럼, 비교 컬럼, 조회 조건, 조회 실패 범위), 이후 줄은 키 순서의 행입니다.
+    행이 SORT_RUN_ROWS를 넘으면 정렬된 구간을 임시 파일로 내보낸 뒤 병합하므로 메모리 사용량이 일정합니다.
+    report가 None이면 아무것도 저장하지 않습니다.
+    """
+
+    def __init__(self, report, columns, key_columns, diff_columns=None, directory=None, run_rows=SORT_RUN_ROWS,
+                 query=None):
+        """
+        Args:
+            report (str): 보고서 이름 (이력 파일 디렉토리명, None이면 저장하지 않음)
+            columns (list): 행의 컬럼명 목록
+            key_columns (list): 행을 구분하는 키 컬럼명 목록 (보고서 안에서 고유해야 함)
+            diff_columns (list): 변경 여부를 비교할 컬럼명 목록 (None이면 키를 제외한 모든 컬럼)
+            directory (str): 이력 디렉토리 (None이면 REPORT_HISTORY_DIR 환경변수 또는 기본 경로)
+            run_rows (int): 메모리에서 한 번에 정렬하는 최대 행 수
+            query (dict): 결과 범위를 바꾸는 조회 조건 (대상 프로필/리전, 키워드, 태그, 상태, AMI 목록 등, 조건이 다른 이력은 비교하지 않음)
+        """
+        self.report = report
+        self.columns = list(columns)
+        self.key_columns = list(key_columns)
+        self.diff_columns = list(diff_columns or [column for column in columns if column not in key_columns])
+        self.directory = _history_dir(directory)
+        self.run_rows = run_rows
+        # 헤더에서 다시 읽은 값과 그대로 비교할 수 있도록 JSON으로 변환 가능한 형태(튜플 -> 리스트)로 저장
+        self.query = json.loads(_ENCODER.encode(query or {}))
+        self.incomplete = []
+        self.path = None
+        self._key = _key_func(self.columns, self.key_columns)
+        self._buffer = []
+        self._runs = []
+
+    def add(self, row):
+        """
+        행을 추가합니다.
+
+        Args:
+            row (list | dict): 컬럼 순서의 값 리스트 또는 {컬럼명: 값} 딕셔너리
+        """
+        if self.report is None:
+            return
+        if isinstance(row, dict):
+            row = [row.get(column) for column in self.columns]
+        # 키와 JSON 행은 한 번만 만들고, 정렬/병합/저장에서는 그대로 사용
+        self._buffer.append((self._key(row), _ENCODER.encode(list(row))))
+        if len(self._buffer) >= self.run_rows:
+            self._buffer.sort(key=itemgetter(0))
+            self._runs.append(_write_run(self._buffer))
+            self._buffer = []
+
+    def mark_incomplete(self, *scope):
+        """
+        조회에 실패한 범위(키 컬럼 앞부분 값, 예: 계정 별칭, 리전)를 기록합니다.
+        diff_reports는 어느 한쪽에서라도 조회에 실패한 범위의 행을 비교하지 않습니다.
+        """
+        if self.report is not None:
+            self.incomplete.append(["" if value is None else str(value) for value in scope])
+
+    def close(self):
+        """
+        정렬된 이력 파일을 저장하고 보관 개수를 넘는 오래된 이력을 삭제합니다. (임시 파일에 쓴 뒤 교체)
+
+        Returns:
+            str: 저장한 이력 파일 경로 (report가 None이면 None)
+        """
+        if self.report is None:
+            return None
+        report_dir = os.path.join(self.directory, self.report)
+        os.makedirs(report_dir, exist_ok=True)
+        created_at = datetime.now(timezone.utc)
+        path = os.path.join(report_dir, created_at.strftime("%Y%m%dT%H%M%S.%fZ") + HISTORY_SUFFIX)
+
+        self._buffer.sort(key=itemgetter(0))
+        runs = self._runs
+        self._runs = []
+        try:
+            if runs:
+                runs.append(_write_run(self._buffer))
+                self._buffer = []
+                entries = heapq.merge(*[_read_run(run) for run in runs], key=itemgetter(0))
+            else:
+                entries = self._buffer
+            header = {"report": self.report, "created_at": created_at.isoformat(), "columns": self.columns,
+                      "key": self.key_columns, "diff": self.diff_columns, "query": self.query,
+                      "incomplete": self.incomplete}
+            tmp_path = f"{path}.tmp"
+            previous = None
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                file.write(_ENCODER.encode(header) + "\n")
+                for key, line in entries:
+                    # 키가 중복되면 먼저 추가된 행만 저장 (정렬과 병합은 추가 순서를 유지)
+                    if key == previous:
+                        continue
+                    previous = key
+                    file.write(line + "\n")
+            os.replace(tmp_path, path)
+            self.path = path
+        finally:
+            for run in runs:
+                run.close()
+            self._buffer = []
+
+        keep = int(os.environ.get("REPORT_HISTORY_KEEP") or DEFAULT_HISTORY_KEEP)
+        for old_path in list_history(self.report, self.directory)[:-keep]:
+            os.remove(old_path)
+        return path
+
+    def discard(self):
+        """
+        저장하지 않고 정렬 중인 임시 파일을 정리합니다.
+        """
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # 보고서가 중간에 실패하면 일부 행만 있는 이력이 남지 않도록 저장하지 않음
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+        return False
+
+
+def list_history(report, directory=None):
+    """
+    보고서의 이력 파일 경로를 오래된 순서로 반환합니다.
+
+    Args:
+        report (str): 보고서 이름
+        directory (str): 이력 디렉토리 (None이면 REPORT_HISTORY_DIR 환경변수 또는 기본 경로)
+
+    Returns:
+        list: 이력 파일 경로 리스트
+    """
+    report_dir = os.path.join(_history_dir(directory), report)
+    if not os.path.isdir(report_dir):
+        return []
+    return [os.path.join(report_dir, name) for name in sorted(os.listdir(report_dir)) if name.endswith(HISTORY_SUFFIX)]
+
+
+def read_history(path):
+    """
+    이력 파일의 헤더와 행 이터레이터를 반환합니다. (행은 파일에서 한 줄씩 읽음)
+
+    Args:
+        path (str): 이력 파일 경로
+
+    Returns:
+        tuple: (헤더 딕셔너리, 키 순서의 행 리스트 이터레이터)
+    """
+    with open(path, encoding="utf-8") as file:
+        header = json.loads(file.readline())
+
+    def rows():
+        with open(path, encoding="utf-8") as file:
+            file.readline()
+            for line in file:
+                yield json.loads(line)
+
+    return header, rows()
+
+
+def incompatible_reason(old_header, new_header):
+    """
+    두 이력을 비교할 수 없는 이유를 반환합니다. (키 컬럼 또는 조회 조건이 다르면 비교 결과가 대량의 추가/삭제가 되므로)
+
+    Returns:
+        str: 비교할 수 없는 이유 (비교할 수 있으면 None)
+    """
+    if old_header["key"] != new_header["key"]:
+        return f"키 컬럼이 다른 이력은 비교할 수 없습니다: {old_header['key']} != {new_header['key']}"
+    if old_header.get("query", {}) != new_header.get("query", {}):
+        return (f"조회 조건이 다른 이력은 비교할 수 없습니다: "
+                f"{old_header.get('query', {})} != {new_header.get('query', {})}")
+    return None
+
+
+def find_comparable(report, directory=None):
+    """
+    보고서의 마지막 실행과, 그 이전 실행 중 조회 조건이 같은 가장 최근 실행의 이력 파일을 찾습니다.
+    (조건이 다른 임시 실행이 중간에 있어도 같은 조건의 실행끼리 비교)
+
+    Args:
+        report (str): 보고서 이름
+        directory (str): 이력 디렉토리 (None이면 REPORT_HISTORY_DIR 환경변수 또는 기본 경로)
+
+    Returns:
+        tuple: (이전 이력 파일 경로 또는 None, 마지막 이력 파일 경로 또는 None)
+    """
+    history = list_history(report, directory)
+    if not history:
+        return None, None
+    new_header = read_history(history[-1])[0]
+    for path in reversed(history[:-1]):
+        if incompatible_reason(read_history(path)[0], new_header) is None:
+            return path, history[-1]
+    return None, history[-1]
+
+
+def diff_reports(old_path, new_path):
+    """
+    같은 보고서의 두 이력 파일을 키 순서로 한 번씩 읽으며(merge-join) 추가/삭제/변경된 행만 반환합니다.
+    두 파일을 메모리에 올리지 않으므로 행 수와 관계없이 메모리 사용량이 일정합니다.
+    어느 한쪽에서라도 조회에 실패한 범위(헤더의 incomplete)의 행은 비교하지 않으며,
+    키 컬럼이나 조회 조건(헤더의 query)이 다른 이력은 ValueError가 발생합니다.
+
+    Args:
+        old_path (str): 이전 이력 파일 경로
+        new_path (str): 새 이력 파일 경로
+
+    Yields:
+        tuple: (변경 종류("added", "removed", "changed"), 키 튜플, 이전 행 딕셔너리, 새 행 딕셔너리, 변경된 컬럼 리스트)
+               (추가된 행의 이전 행, 삭제된 행의 새 행은 None)
+    """
+    old_header, old_rows = read_history(old_path)
+    new_header, new_rows = read_history(new_path)
+    reason = incompatible_reason(old_header, new_header)
+    if reason:
+        raise ValueError(reason)
+
+    diff_columns = [column for column in new_header["diff"] if column in old_header["columns"]]
+    old_indexes = [old_header["columns"].index(column) for column in diff_columns]
+    new_indexes = [new_header["columns"].index(column) for column in diff_columns]
+    scopes = [tuple(scope) for scope in old_header["incomplete"] + new_header["incomplete"]]
+
+    def skipped(key):
+        return any(key[:len(scope)] == scope for scope in scopes)
+
+    def as_dict(header, row):
+        return dict(zip(header["columns"], row))
+
+    old_key = _key_func(old_header["columns"], old_header["key"])
+    new_key = _key_func(new_header["columns"], new_header["key"])
+    try:
+        old = next(old_rows, None)
+        new = next(new_rows, None)
+        old_current = old_key(old) if old is not None else None
+        new_current = new_key(new) if new is not None else None
+        while old is not None or new is not None:
+            if new is None or (old is not None and old_current < new_current):
+                if not skipped(old_current):
+                    yield "removed", old_current, as_dict(old_header, old), None, []
+                old = next(old_rows, None)
+                old_current = old_key(old) if old is not None else None
+            elif old is None or new_current < old_current:
+                if not skipped(new_current):
+                    yield "added", new_current, None, as_dict(new_header, new), []
+                new = next(new_rows, None)
+                new_current = new_key(new) if new is not None else None
+            else:
+                changed = [column for column, old_index, new_index in zip(diff_columns, old_indexes, new_indexes)
+                           if old[old_index] != new[new_index]]
+                if changed and not skipped(new_current):
+                    yield "changed", new_current, as_dict(old_header, old), as_dict(new_header, new), changed
+                old = next(old_rows, None)
+                new = next(new_rows, None)
+                old_current = old_key(old) if old is not None else None
+                new_current = new_key(new) if new is not None else None
+    finally:
+        old_rows.close()
+        new_rows.close()
@@ -1,85 +1,221 @@
-import boto3
+import os
+import sys
+import threading
 
-def get_ebs_encryption_status(profiles):
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.account_broker import target_profiles
+from common.aws_session import get_client
+from common.fanout import fan_out
+from common.inventory_snapshot import InventorySnapshot
+from common.report_history import ReportHistory, target_query
+
+# describe_volumes 페이지당 최대 조회 건수 (API 허용 범위: 5 ~ 500)
+DESCRIBE_VOLUMES_PAGE_SIZE = 500
+
+# Name 태그 조회 시 instance-id 필터 값 최대 개수
+INSTANCE_ID_CHUNK_SIZE = 200
+
+def iter_volumes(ec2, filters=None):
     """
-    여러 AWS 계정의 EBS 볼륨 암호화 상태를 조회하고 분석합니다.
+    describe_volumes 페이지네이터로 모든 페이지를 순회하며 볼륨을 하나씩 반환합니다.
     
     Args:
-        profiles (dict): AWS 프로필명과 별칭의 매핑 딕셔너리
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        filters (list): describe_volumes Filters (None이면 모든 볼륨)
+    
+    Yields:
+        dict: describe_volumes 응답의 Volume 항목
     """
-    for profile, alias in profiles.items():
-        print(f"\n=== AWS Profile: {profile} (Alias: {alias}) ===")
-        
-        # AWS 세션 설정 및 EC2 클라이언트 초기화
-        boto3.setup_default_session(profile_name=profile)
-        ec2 = boto3.client('ec2')
-
-        # 해당 계정의 모든 EBS 볼륨 조회
-        volumes = ec2.describe_volumes()['Volumes']
-        
-        # 분석 결과를 저장할 변수들 초기화
-        unattached_volumes = []  # 인스턴스에 연결되지 않은 볼륨 목록
-        root_encrypted_count = root_total_count = 0  # 루트 볼륨 암호화 통계
-        data_encrypted_count = data_total_count = 0  # 데이터 볼륨 암호화 통계
-        unencrypted_instances = {}  # 암호화되지 않은 볼륨을 가진 인스턴스 정보
-
-        # 각 볼륨을 순회하며 암호화 상태 분석
-        for volume in volumes:
-            attachments = volume.get('Attachments', [])  # 볼륨이 연결된 인스턴스 정보
-            is_encrypted = volume['Encrypted']  # 볼륨 암호화 여부
-            is_root = False  # 루트 볼륨 여부 판별 플래그
-
-            if attachments:  # 볼륨이 인스턴스에 연결된 경우
-                for attachment in attachments:
-                    instance_id = attachment['InstanceId']
-                    
-                    # 디바이스명을 통해 루트 볼륨 여부 판별
-                    # /dev/sda 또는 /dev/xvda로 끝나는 경우 루트 볼륨
-                    if attachment.get('Device', '').startswith('/dev/sd') or attachment.get('Device', '').startswith('/dev/xvd'):
-                        if attachment['Device'].endswith('a'):
-                            is_root = True
-                            break
-                
-                # 루트 볼륨과 데이터 볼륨 분류 및 암호화 통계 수집
-                if is_root:
-                    root_total_count += 1
-                    if is_encrypted:
-                        root_encrypted_count += 1
-                else:
-                    data_total_count += 1
-                    if is_encrypted:
-                        data_encrypted_count += 1
-                
-                # 암호화되지 않은 볼륨을 가진 인스턴스 정보 수집
-                if not is_encrypted:
-                    if instance_id not in unencrypted_instances:
-                        unencrypted_instances[instance_id] = []
-                    unencrypted_instances[instance_id].append(volume['VolumeId'])
-            else:
-                # 인스턴스에 연결되지 않은 볼륨 목록에 추가
-                unattached_volumes.append(volume['VolumeId'])
-
-        # 암호화율 계산 (0으로 나누기 방지)
-        root_encryption_rate = (root_encrypted_count / root_total_count * 100) if root_total_count else 0
-        data_encryption_rate = (data_encrypted_count / data_total_count * 100) if data_total_count else 0
-
-        # 분석 결과 출력
-        print(f"Unattached EBS Volumes: {unattached_volumes}")
-        print(f"Root Volume Encryption: {root_encrypted_count} / {root_total_count} ({root_encryption_rate:.2f}%)")
-        print(f"Non-Root Volume Encryption: {data_encrypted_count} / {data_total_count} ({data_encryption_rate:.2f}%)")
-
-        # 비암호화 EBS가 연결된 인스턴스 상세 정보 출력
-        if unencrypted_instances:
-            print("Instances with Unencrypted EBS:")
-            # 인스턴스 정보를 배치로 조회하여 API 호출 최적화
-            instances = ec2.describe_instances(InstanceIds=list(unencrypted_instances.keys()))['Reservations']
-            
-            for reservation in instances:
+    paginate_kwargs = {'PaginationConfig': {'PageSize': DESCRIBE_VOLUMES_PAGE_SIZE}}
+    if filters:
+        paginate_kwargs['Filters'] = filters
+    for page in ec2.get_paginator('describe_volumes').paginate(**paginate_kwargs):
+        for volume in page['Volumes']:
+            yield volume
+
+def get_instance_names(ec2, instance_ids):
+    """
+    인스턴스 ID 목록의 Name 태그를 중복 없이, 필터 값 제한 단위로 나누어 조회합니다.
+    (instance-id 필터를 사용하므로 종료된 인스턴스가 섞여 있어도 오류 없이 생략됨)
+    
+    Args:
+        ec2 (botocore.client.EC2): EC2 클라이언트
+        instance_ids (iterable): 인스턴스 ID 목록
+    
+    Returns:
+        list: (Name 태그, 인스턴스 ID) 튜플 리스트 (Name 태그가 없으면 'N/A')
+    """
+    instance_ids = list(dict.fromkeys(instance_ids))
+    instance_names = []
+    paginator = ec2.get_paginator('describe_instances')
+    for i in range(0, len(instance_ids), INSTANCE_ID_CHUNK_SIZE):
+        chunk = instance_ids[i:i + INSTANCE_ID_CHUNK_SIZE]
+        for page in paginator.paginate(Filters=[{'Name': 'instance-id', 'Values': chunk}]):
+            for reservation in page['Reservations']:
                 for instance in reservation['Instances']:
-                    instance_id = instance['InstanceId']
                     # 인스턴스의 Name 태그 조회 (없으면 'N/A')
                     name_tag = next((tag['Value'] for tag in instance.get('Tags', []) if tag['Key'] == 'Name'), 'N/A')
-                    print(f"Instance Name: {name_tag}, ID: {instance_id}, Unencrypted Volumes: {unencrypted_instances[instance_id]}")
+                    instance_names.append((name_tag, instance['InstanceId']))
+    return instance_names
+
+def analyze_ebs_encryption(profile, region=None, snapshot=None, on_volume=None):
+    """
+    단일 AWS 계정/리전의 EBS 볼륨 암호화 상태를 조회하고 분석합니다.
+
+    Args:
+        profile (str): AWS 프로필명
+        region (str): AWS 리전명 (None이면 프로필 기본 리전 사용)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 조회)
+        on_volume (callable): 볼륨마다 [볼륨 ID, 인스턴스 ID, 유형, 암호화 여부]로 호출할 함수
+                              (보고서 이력 기록용, 볼륨 목록을 보관하지 않도록 조회하는 즉시 호출)
+
+    Returns:
+        dict: 미연결 볼륨, 루트/데이터 볼륨 암호화 통계, 비암호화 인스턴스 정보
+    """
+    if snapshot is not None:
+        volumes = snapshot.iter_volumes(profile, region)
+    else:
+        # 공유 클라이언트 풀에서 EC2 클라이언트 획득 (전역 기본 세션을 변경하지 않음)
+        ec2 = get_client('ec2', profile, region)
+        volumes = iter_volumes(ec2)
+
+    # 분석 결과를 저장할 변수들 초기화
+    unattached_volumes = []  # 인스턴스에 연결되지 않은 볼륨 목록
+    root_encrypted_count = root_total_count = 0  # 루트 볼륨 암호화 통계
+    data_encrypted_count = data_total_count = 0  # 데이터 볼륨 암호화 통계
+    unencrypted_instances = {}  # 암호화되지 않은 볼륨을 가진 인스턴스 정보
+
+    # 해당 계정의 모든 EBS 볼륨을 페이지 단위로 스트리밍하며 암호화 통계 누적 (전체 볼륨 목록을 보관하지 않음)
+    for volume in volumes:
+        attachments = volume.get('Attachments', [])  # 볼륨이 연결된 인스턴스 정보
+        is_encrypted = volume['Encrypted']  # 볼륨 암호화 여부
+        is_root = False  # 루트 볼륨 여부 판별 플래그
+
+        if attachments:  # 볼륨이 인스턴스에 연결된 경우
+            for attachment in attachments:
+                instance_id = attachment['InstanceId']
+
+                # 디바이스명을 통해 루트 볼륨 여부 판별
+                # /dev/sda 또는 /dev/xvda로 끝나는 경우 루트 볼륨
+                if attachment.get('Device', '').startswith('/dev/sd') or attachment.get('Device', '').startswith('/dev/xvd'):
+                    if attachment['Device'].endswith('a'):
+                        is_root = True
+                        break
+
+            if on_volume is not None:
+                on_volume([volume['VolumeId'], instance_id, 'root' if is_root else 'data', is_encrypted])
+
+            # 루트 볼륨과 데이터 볼륨 분류 및 암호화 통계 수집
+            if is_root:
+                root_total_count += 1
+                if is_encrypted:
+                    root_encrypted_count += 1
+            else:
+                data_total_count += 1
+                if is_encrypted:
+                    data_encrypted_count += 1
+
+            # 암호화되지 않은 볼륨을 가진 인스턴스 정보 수집
+            if not is_encrypted:
+                if instance_id not in unencrypted_instances:
+                    unencrypted_instances[instance_id] = []
+                unencrypted_instances[instance_id].append(volume['VolumeId'])
+        else:
+            # 인스턴스에 연결되지 않은 볼륨 목록에 추가
+            unattached_volumes.append(volume['VolumeId'])
+            if on_volume is not None:
+                on_volume([volume['VolumeId'], None, 'unattached', is_encrypted])
+
+    # 비암호화 EBS가 연결된 인스턴스의 Name 태그를 배치로 조회하여 API 호출 최적화
+    unencrypted_instance_names = []
+    if unencrypted_instances and snapshot is not None:
+        unencrypted_instance_names = [(instance['Tags'].get('Name', 'N/A'), instance['InstanceId'])
+                                      for instance in snapshot.iter_instances(profile, region)
+                                      if instance['InstanceId'] in unencrypted_instances]
+    elif unencrypted_instances:
+        unencrypted_instance_names = get_instance_names(ec2, unencrypted_instances)
+
+    return {
+        'unattached_volumes': unattached_volumes,
+        'root_encrypted_count': root_encrypted_count,
+        'root_total_count': root_total_count,
+        'data_encrypted_count': data_encrypted_count,
+        'data_total_count': data_total_count,
+        'unencrypted_instances': unencrypted_instances,
+        'unencrypted_instance_names': unencrypted_instance_names,
+    }
+
+def print_ebs_encryption_result(result):
+    """
+    analyze_ebs_encryption의 분석 결과를 출력합니다.
+
+    Args:
+        result (dict): analyze_ebs_encryption 반환값
+    """
+    root_encrypted_count = result['root_encrypted_count']
+    root_total_count = result['root_total_count']
+    data_encrypted_count = result['data_encrypted_count']
+    data_total_count = result['data_total_count']
+
+    # 암호화율 계산 (0으로 나누기 방지)
+    root_encryption_rate = (root_encrypted_count / root_total_count * 100) if root_total_count else 0
+    data_encryption_rate = (data_encrypted_count / data_total_count * 100) if data_total_count else 0
+
+    # 분석 결과 출력
+    print(f"Unattached EBS Volumes: {result['unattached_volumes']}")
+    print(f"Root Volume Encryption: {root_encrypted_count} / {root_total_count} ({root_encryption_rate:.2f}%)")
+    print(f"Non-Root Volume Encryption: {data_encrypted_count} / {data_total_count} ({data_encryption_rate:.2f}%)")
+
+    # 비암호화 EBS가 연결된 인스턴스 상세 정보 출력
+    if result['unencrypted_instances']:
+        print("Instances with Unencrypted EBS:")
+        for name_tag, instance_id in result['unencrypted_instance_names']:
+            print(f"Instance Name: {name_tag}, ID: {instance_id}, Unencrypted Volumes: {result['unencrypted_instances'][instance_id]}")
+
+def get_ebs_encryption_status(profiles, regions=None, max_workers=8, timeout=None, snapshot=None, history="ebs"):
+    """
+    여러 AWS 계정의 EBS 볼륨 암호화 상태를 병렬로 조회하고 분석합니다.
+    결과는 입력 순서대로, 각 대상의 조회가 끝나는 즉시 출력됩니다.
+
+    Args:
+        profiles (dict): AWS 프로필명과 별칭의 매핑 딕셔너리
+        regions (list): 조회할 AWS 리전 목록 (None이면 프로필 기본 리전만 조회)
+        max_workers (int): 최대 동시 조회 수 (기본값: 8)
+        timeout (float): (계정, 리전)별 조회 제한 시간(초) (None이면 무제한)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 조회)
+        history (str): 볼륨별 결과를 저장할 보고서 이력 이름 (None이면 저장하지 않음, snapshot/diff_reports.py로 비교)
+    """
+    regions = regions or [None]
+    # 조회 대상(프로필, 리전)이 같은 이력끼리 비교
+    report_history = ReportHistory(history, ["Alias", "Region", "Volume ID", "Instance ID", "Volume Type", "Encrypted"],
+                                   ["Alias", "Region", "Volume ID"], query=target_query(profiles, regions))
+    history_lock = threading.Lock()
+
+    def volume_sink(alias, region):
+        # 워커 스레드에서 볼륨을 조회하는 즉시 이력에 기록 (대상별 볼륨 목록을 메모리에 보관하지 않음)
+        def add(volume_row):
+            with history_lock:
+                report_history.add([alias, region] + volume_row)
+        return add if history else None
+
+    targets = [(profile, region, snapshot, volume_sink(profiles[profile], region))
+               for profile in profiles for region in regions]
+
+    for target_result in fan_out(analyze_ebs_encryption, targets, max_workers, timeout):
+        profile, region = target_result.target[:2]
+        alias = profiles[profile]
+        region_label = f", Region: {region}" if region else ""
+        print(f"\n=== AWS Profile: {profile} (Alias: {alias}{region_label}) ===")
+
+        # 조회 실패 시 해당 계정/리전만 오류 출력 후 다음 대상 처리 (이미 기록된 일부 볼륨은 비교에서 제외됨)
+        if target_result.error:
+            print(f"[ERROR] 조회 중 오류 발생: {target_result.error}")
+            report_history.mark_incomplete(alias, region)
+            continue
+
+        print_ebs_encryption_result(target_result.result)
+    report_history.close()
 
 if __name__ == "__main__":
     # AWS 계정별 프로필과 별칭 매핑
@@ -89,6 +225,14 @@ if __name__ == "__main__":
         "profile02": "alias02",
         "profile03": "alias03"
     }
-    
+    # AWS_ACCOUNT_SOURCE 환경변수(organizations 또는 계정 파일)가 있으면 위 목록 대신 조회한 계정에 AssumeRole 하여 사용
+    aws_profiles = target_profiles(aws_profiles)
+
+    # 조회할 AWS 리전 목록 (None이면 프로필 기본 리전)
+    regions = None  # 예: ["ap-northeast-2", "us-east-1"]
+
+    # 인벤토리 스냅샷 사용 여부 (True면 snapshot/collect_snapshot.py로 수집한 스냅샷에서 API 호출 없이 조회)
+    use_snapshot = False
+
     # EBS 암호화 상태 조회 실행
-    get_ebs_encryption_status(aws_profiles)
\ No newline at end of file
+    get_ebs_encryption_status(aws_profiles, regions, snapshot=InventorySnapshot() if use_snapshot else None)
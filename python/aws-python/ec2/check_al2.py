@@ -1,86 +1,131 @@
-import boto3
-from collections import defaultdict
+from collections import Counter, defaultdict
+import os
+import sys
 
-def get_ec2_os_distribution(profile_name, region_name="ap-northeast-2"):
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.account_broker import target_profiles
+from common.ami_cache import get_images
+from common.aws_session import get_client
+from common.ec2_inventory import scan_instances
+from common.fanout import fan_out
+from common.inventory_snapshot import InventorySnapshot
+from common.os_classifier import CLASSIFIER_KEY, OsTierStats, classify_os
+from common.report_history import ReportHistory, target_query
+
+def summarize_os_type(os_type):
+    """
+    공용 OS 분류 결과를 보고서 컬럼(Amazon Linux 2, Amazon Linux 2023, Windows, Other)으로 묶습니다.
+    
+    Args:
+        os_type (str): common.os_classifier.classify_os 결과
+    
+    Returns:
+        str: 보고서 컬럼명
+    """
+    if os_type in ("Amazon Linux 2", "Amazon Linux 2023"):
+        return os_type
+    elif os_type.startswith("Windows"):
+        return "Windows"
+    return "Other"
+
+def get_ec2_os_distribution(profile_name, region_name="ap-northeast-2", snapshot=None, stats=None):
     """
     지정된 AWS 프로필과 리전에서 실행 중인 EC2 인스턴스의 OS 분포를 조회합니다.
+    Windows, RHEL, SUSE 등은 인스턴스 필드(Platform, PlatformDetails, UsageOperation)로 바로 분류하고,
+    배포판을 알 수 없는 Linux/UNIX 인스턴스의 AMI만 조회합니다.
     
     Args:
         profile_name (str): AWS 프로필명
         region_name (str): AWS 리전명 (기본값: ap-northeast-2)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 조회)
+        stats (OsTierStats): 판별 단계별 AMI 조회 생략 집계 (None이면 집계하지 않음)
     
     Returns:
         tuple: (총 인스턴스 수, OS 분포 딕셔너리)
     """
-    # AWS 세션 생성 및 EC2 클라이언트 초기화
-    session = boto3.Session(profile_name=profile_name)
-    ec2 = session.client("ec2", region_name=region_name)
-    
-    # 실행 중인 EC2 인스턴스만 조회
-    response = ec2.describe_instances(Filters=[{"Name": "instance-state-name", "Values": ["running"]}])
-    
     # 카운터 초기화
     total_instances = 0
     os_distribution = defaultdict(int)  # OS별 인스턴스 수를 저장할 딕셔너리
-    image_ids = set()  # 고유한 AMI ID들을 저장할 집합
-    
-    # 모든 예약(Reservation)과 인스턴스를 순회하며 AMI ID 수집
-    for reservation in response["Reservations"]:
-        for instance in reservation["Instances"]:
-            total_instances += 1
-            image_ids.add(instance["ImageId"])
-    
-    # 수집된 AMI ID들에 대한 상세 정보를 배치로 조회 (API 호출 최적화)
-    image_details = ec2.describe_images(ImageIds=list(image_ids))
-    image_os_map = {}  # AMI ID와 OS 타입을 매핑할 딕셔너리
-    
-    # 각 AMI의 이름과 설명을 분석하여 OS 타입 결정
-    for image in image_details["Images"]:
-        image_id = image["ImageId"]
-        name = image.get("Name", "").lower()
-        description = image.get("Description", "").lower()
-        
-        # Amazon Linux 2 판별
-        if "amzn2-ami" in name or "amazonlinux2" in name or "amazon linux 2" in description:
-            image_os_map[image_id] = "Amazon Linux 2"
-        # Amazon Linux 2023 판별
-        elif "al2023-ami" in name or "amazon linux 2023" in description or "amazonlinux2023" in description:
-            image_os_map[image_id] = "Amazon Linux 2023"
-        # Windows 판별
-        elif "windows" in name or "windows" in description:
-            image_os_map[image_id] = "Windows"
-        # 기타 OS
+    image_counts = Counter()  # AMI 조회가 필요한 AMI ID별 인스턴스 수 (고유 AMI ID 수집 겸용)
+    stats = stats if stats is not None else OsTierStats()
+    
+    # 실행 중인 EC2 인스턴스를 페이지 단위로 스트리밍하며 인스턴스 필드로 분류하고, 나머지는 AMI ID별 인스턴스 수 집계 (단일 패스)
+    if snapshot is not None:
+        instances = snapshot.iter_instances(profile_name, region_name, ["running"])
+    else:
+        # 공유 클라이언트 풀에서 EC2 클라이언트 획득
+        ec2 = get_client("ec2", profile_name, region_name)
+        # EC2_SCAN_PARTITIONS가 설정되면 인스턴스 타입/가용 영역별로 나누어 병렬 페이지네이션
+        instances = scan_instances(ec2, [{"Name": "instance-state-name", "Values": ["running"]}],
+                                   f"{profile_name}|{region_name}")
+    for instance in instances:
+        total_instances += 1
+        os_type = stats.classify(instance)
+        if os_type is not None:
+            os_distribution[summarize_os_type(os_type)] += 1
         else:
-            image_os_map[image_id] = "Other"
+            image_counts[instance["ImageId"]] += 1
+    
+    # AMI 조회가 필요한 인스턴스가 없으면 AMI 조회 생략 (빈 ImageIds는 전체 AMI 조회가 되므로)
+    if not image_counts:
+        return total_instances, os_distribution
+    
+    # AMI 상세 정보와 OS 분류 결과를 로컬 캐시에서 조회 (캐시에 없는 AMI만 describe_images 호출)
+    stats.record_lookups(image_counts)
+    if snapshot is not None:
+        images = snapshot.get_images(profile_name, region_name, image_counts)
+    else:
+        images = get_images(ec2, image_counts, classify_os, CLASSIFIER_KEY, scope=profile_name or "")
+    image_os_map = {image_id: summarize_os_type(image["OsType"]) for image_id, image in images.items()}  # AMI ID와 OS 타입 매핑
     
-    # 각 인스턴스를 다시 순회하며 OS별로 카운트
-    for reservation in response["Reservations"]:
-        for instance in reservation["Instances"]:
-            os = image_os_map.get(instance["ImageId"], "Other")
-            os_distribution[os] += 1
+    # AMI ID별 인스턴스 수를 OS별로 합산 (인스턴스를 다시 순회하지 않음)
+    for image_id, count in image_counts.items():
+        os = image_os_map.get(image_id, "Other")
+        os_distribution[os] += count
     
     return total_instances, os_distribution
 
-if __name__ == "__main__":
-    # AWS 계정별 프로필과 별칭 매핑
-    # 주석 처리된 계정들은 필요에 따라 활성화하여 사용
-    aws_profiles = {
-        "profile01": "alias01",
-        "profile02": "alias02",
-        "profile03": "alias03"
-    }
+def print_os_distribution(profiles, regions, max_workers=8, timeout=None, snapshot=None, history="al2"):
+    """
+    여러 AWS 계정/리전의 EC2 OS 분포를 병렬로 조회하여 테이블 형태로 출력합니다.
+    결과는 입력 순서대로, 각 대상의 조회가 끝나는 즉시 출력됩니다.
+
+    Args:
+        profiles (dict): AWS 프로필명과 별칭의 매핑 딕셔너리
+        regions (list): 조회할 AWS 리전 목록
+        max_workers (int): 최대 동시 조회 수 (기본값: 8)
+        timeout (float): (계정, 리전)별 조회 제한 시간(초) (None이면 무제한)
+        snapshot (InventorySnapshot): 인벤토리 스냅샷 (지정하면 API 호출 없이 스냅샷에서 조회)
+        history (str): 실행 결과를 저장할 보고서 이력 이름 (None이면 저장하지 않음, snapshot/diff_reports.py로 비교)
+    """
+    # 조회 대상(프로필, 리전)이 같은 이력끼리 비교
+    report_history = ReportHistory(history, ["Alias", "Region", "Total EC2", "Amazon Linux 2", "Amazon Linux 2023",
+                                             "Windows", "Other"], ["Alias", "Region"],
+                                   query=target_query(profiles, regions))
     
-    # 조회할 AWS 리전 설정
-    region = "ap-northeast-2"  
+    # 인스턴스 필드 판별로 생략한 AMI 조회 수 (대상별 집계를 합산하여 마지막에 출력)
+    total_stats = OsTierStats()
     
     # 결과 테이블 헤더 출력
-    print("Alias | Total EC2 | Amazon Linux 2 | Amazon Linux 2023 | Windows | Other | AL2 used %")
+    print("Alias | Region | Total EC2 | Amazon Linux 2 | Amazon Linux 2023 | Windows | Other | AL2 used %")
     print("--------------------------------------------------------------------------------")
     
-    # 각 AWS 계정별로 EC2 OS 분포 조회 및 결과 출력
-    for profile, alias in aws_profiles.items():
-        # EC2 OS 분포 정보 조회
-        total_count, os_dist = get_ec2_os_distribution(profile, region)
+    # (계정, 리전)별로 EC2 OS 분포를 병렬 조회하고, 완료되는 순서대로(입력 순서 유지) 결과 출력
+    targets = [(profile, region, snapshot, OsTierStats()) for profile in profiles for region in regions]
+    for target_result in fan_out(get_ec2_os_distribution, targets, max_workers, timeout):
+        profile, region = target_result.target[:2]
+        alias = profiles[profile]
+        
+        # 조회 실패 시 해당 계정/리전만 오류 출력 후 다음 대상 처리
+        if target_result.error:
+            print(f"{alias} | {region} | [ERROR] {target_result.error}")
+            report_history.mark_incomplete(alias, region)
+            continue
+        
+        # EC2 OS 분포 정보
+        total_count, os_dist = target_result.result
+        total_stats.merge(target_result.target[3])
         
         # OS별 인스턴스 수 추출
         al2_count = os_dist.get("Amazon Linux 2", 0)
@@ -92,4 +137,33 @@ if __name__ == "__main__":
         al2_percentage = (al2_count / total_count * 100) if total_count > 0 else 0.0
         
         # 결과를 테이블 형태로 출력
-        print(f"{alias} | {total_count} | {al2_count} | {al2023_count} | {windows_count} | {other_count} | {al2_percentage:.2f}%")
+        print(f"{alias} | {region} | {total_count} | {al2_count} | {al2023_count} | {windows_count} | {other_count} | {al2_percentage:.2f}%")
+        report_history.add([alias, region, total_count, al2_count, al2023_count, windows_count, other_count])
+    
+    print(f"\n[INFO] {total_stats.summary()}")
+    report_history.close()
+
+if __name__ == "__main__":
+    # AWS 계정별 프로필과 별칭 매핑
+    # 주석 처리된 계정들은 필요에 따라 활성화하여 사용
+    aws_profiles = {
+        "profile01": "alias01",
+        "profile02": "alias02",
+        "profile03": "alias03"
+    }
+    # AWS_ACCOUNT_SOURCE 환경변수(organizations 또는 계정 파일)가 있으면 위 목록 대신 조회한 계정에 AssumeRole 하여 사용
+    aws_profiles = target_profiles(aws_profiles)
+    
+    # 조회할 AWS 리전 목록 설정
+    regions = ["ap-northeast-2"]
+    
+    # 병렬 처리 설정 (최대 동시 조회 수, 대상별 제한 시간(초))
+    max_workers = 8
+    target_timeout = 300
+    
+    # 인벤토리 스냅샷 사용 여부 (True면 snapshot/collect_snapshot.py로 수집한 스냅샷에서 API 호출 없이 조회)
+    use_snapshot = False
+    snapshot = InventorySnapshot() if use_snapshot else None
+    
+    # EC2 OS 분포 조회 및 출력
+    print_os_distribution(aws_profiles, regions, max_workers, target_timeout, snapshot)
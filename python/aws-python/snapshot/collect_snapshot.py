@@ -0,0 +1,66 @@
+import os
+import sys
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.account_broker import target_profiles
+from common.fanout import fan_out
+from common.inventory_snapshot import InventorySnapshot, collect_snapshot
+
+def collect_inventory(profiles, regions=None, path=None, max_workers=8, timeout=None):
+    """
+    여러 AWS 계정/리전의 인벤토리(인스턴스, AMI, EBS 볼륨, SSM)를 병렬로 한 번씩 수집하여 스냅샷에 저장합니다.
+    결과는 입력 순서대로, 각 대상의 수집이 끝나는 즉시 출력됩니다.
+
+    Args:
+        profiles (dict): AWS 프로필명과 별칭의 매핑 딕셔너리
+        regions (list): 수집할 AWS 리전 목록 (None이면 프로필 기본 리전만 수집)
+        path (str): 스냅샷 DB 경로 (None이면 INVENTORY_SNAPSHOT_PATH 환경변수 또는 기본 경로)
+        max_workers (int): 최대 동시 수집 수 (기본값: 8)
+        timeout (float): (계정, 리전)별 수집 제한 시간(초) (None이면 무제한)
+
+    Returns:
+        int: 수집에 실패한 (계정, 리전) 수
+    """
+    regions = regions or [None]
+    targets = [(profile, region, path) for profile in profiles for region in regions]
+    failed = 0
+
+    print("Alias | Region | Instances | Images | Volumes | SSM | Elapsed")
+    print("--------------------------------------------------------------")
+    for target_result in fan_out(collect_snapshot, targets, max_workers, timeout):
+        profile, region = target_result.target[:2]
+        alias = profiles[profile]
+        region_label = region or "default"
+
+        # 수집 실패 시 해당 계정/리전만 오류 출력 후 다음 대상 처리 (기존 스냅샷은 유지)
+        if target_result.error:
+            print(f"{alias} | {region_label} | [ERROR] {target_result.error}")
+            failed += 1
+            continue
+
+        counts = target_result.result
+        print(f"{alias} | {region_label} | {counts['instances']} | {counts['images']} | "
+              f"{counts['volumes']} | {counts['ssm']} | {target_result.elapsed:.1f}s")
+    return failed
+
+if __name__ == "__main__":
+    # AWS 계정별 프로필과 별칭 매핑
+    aws_profiles = {
+        "profile01": "alias01",
+        "profile02": "alias02",
+        "profile03": "alias03"
+    }
+    # AWS_ACCOUNT_SOURCE 환경변수(organizations 또는 계정 파일)가 있으면 위 목록 대신 조회한 계정에 AssumeRole 하여 사용
+    aws_profiles = target_profiles(aws_profiles)
+
+    # 수집할 AWS 리전 목록 (보고서에서 조회할 리전과 같아야 함)
+    regions = ["ap-northeast-2"]
+
+    # 병렬 처리 설정 (최대 동시 수집 수, 대상별 제한 시간(초))
+    max_workers = 8
+    target_timeout = 600
+
+    failed = collect_inventory(aws_profiles, regions, max_workers=max_workers, timeout=target_timeout)
+    print(f"\nSnapshot saved to {InventorySnapshot().path}")
+    sys.exit(1 if failed else 0)
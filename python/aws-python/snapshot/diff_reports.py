@@ -0,0 +1,89 @@
+import csv
+import os
+import sys
+import time
+from collections import Counter
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.report_history import diff_reports, find_comparable, incompatible_reason, list_history, read_history
+
+def _details(header, change, old_row, new_row, changed_columns):
+    # 변경된 행은 바뀐 컬럼만, 추가/삭제된 행은 비교 컬럼 값을 표시
+    if change == "changed":
+        return ", ".join(f"{column}: {old_row[column]} -> {new_row[column]}" for column in changed_columns)
+    row = new_row if change == "added" else old_row
+    return ", ".join(f"{column}={row.get(column)}" for column in header["diff"])
+
+def print_report_diff(report, old_path=None, new_path=None, output_file=None, directory=None):
+    """
+    보고서의 두 이력(기본값: 마지막 실행과 조회 조건이 같은 직전 실행)을 비교하여 추가/삭제/변경된 행만 출력합니다.
+    두 이력을 키 순서로 한 번씩 읽으며 비교하므로 행 수와 관계없이 메모리 사용량이 일정합니다.
+    조회 조건(대상 프로필/리전, 키워드, 태그, 상태, AMI 목록 등)이 다른 이력은 비교하지 않습니다.
+
+    Args:
+        report (str): 보고서 이름 (al2, ebs, ami-usage, ec2-list 등)
+        old_path (str): 이전 이력 파일 경로 (None이면 마지막 실행과 조회 조건이 같은 직전 실행)
+        new_path (str): 새 이력 파일 경로 (None이면 마지막 실행)
+        output_file (str): 변경 내역을 저장할 CSV 파일 경로 (None이면 저장하지 않음)
+        directory (str): 이력 디렉토리 (None이면 REPORT_HISTORY_DIR 환경변수 또는 기본 경로)
+
+    Returns:
+        Counter: 변경 종류별 행 수 (비교할 이력이 없거나 비교할 수 없는 이력이면 None)
+    """
+    if old_path is None or new_path is None:
+        old_path, new_path = find_comparable(report, directory)
+        if old_path is None:
+            print(f"[ERROR] '{report}' 보고서에 마지막 실행과 조회 조건이 같은 이전 이력이 없습니다. "
+                  f"(이력 {len(list_history(report, directory))}개)")
+            return None
+
+    old_header = read_history(old_path)[0]
+    header = read_history(new_path)[0]
+    reason = incompatible_reason(old_header, header)
+    if reason:
+        print(f"[ERROR] {reason}")
+        return None
+    print(f"이전: {old_path} ({old_header['created_at']})")
+    print(f"이후: {new_path} ({header['created_at']})")
+    if header.get("query"):
+        print(f"조회 조건: {header['query']}")
+    for scope in old_header["incomplete"] + header["incomplete"]:
+        print(f"[WARN] 조회 실패로 비교에서 제외: {' / '.join(scope)}")
+    print()
+
+    counts = Counter()
+    start = time.perf_counter()
+    file = open(output_file, mode="w", newline="", encoding="utf-8") if output_file else None
+    try:
+        writer = csv.writer(file) if file else None
+        if writer:
+            writer.writerow(["Change"] + header["key"] + ["Details"])
+        print(f"Change | {' | '.join(header['key'])} | Details")
+        print("--------------------------------------------------------------------------------")
+        for change, key, old_row, new_row, changed_columns in diff_reports(old_path, new_path):
+            counts[change] += 1
+            details = _details(header, change, old_row, new_row, changed_columns)
+            print(f"{change} | {' | '.join(key)} | {details}")
+            if writer:
+                writer.writerow([change] + list(key) + [details])
+    finally:
+        if file:
+            file.close()
+
+    print(f"\n추가 {counts['added']}건, 삭제 {counts['removed']}건, 변경 {counts['changed']}건 "
+          f"({time.perf_counter() - start:.2f}s)")
+    if output_file:
+        print(f"Output saved to {output_file}")
+    return counts
+
+if __name__ == "__main__":
+    # 비교할 보고서 (al2, ebs, ami-usage, ec2-list) 와 변경 내역 CSV 파일
+    # 인자: 보고서 이름 [이전 이력 파일 새 이력 파일]
+    report = sys.argv[1] if len(sys.argv) > 1 else "ec2-list"
+    old_path, new_path = (sys.argv[2], sys.argv[3]) if len(sys.argv) > 3 else (None, None)
+    output_file = None  # 예: "report_diff.csv"
+
+    # 변경이 있으면 종료 코드 1 (알림 연동용), 비교할 이력이 없으면 종료 코드 2
+    counts = print_report_diff(report, old_path, new_path, output_file)
+    sys.exit(2 if counts is None else 1 if sum(counts.values()) else 0)
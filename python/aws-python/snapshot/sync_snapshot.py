@@ -0,0 +1,80 @@
+import os
+import sys
+
+# 공통 모듈(python/aws-python/common) 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from common.account_broker import target_profiles
+from common.fanout import fan_out
+from common.inventory_events import load_events, sync_inventory
+from common.inventory_snapshot import InventorySnapshot
+
+def _sync_target(profile, region, events, path):
+    # 이벤트 파일의 이벤트 중 대상 리전의 이벤트만 반영 (이벤트 파일이 없으면 CloudTrail에서 조회)
+    if events is not None and region is not None:
+        events = [event for event in events if event.get("region", event.get("awsRegion", region)) == region]
+    return sync_inventory(profile, region, events, path=path)
+
+def sync_inventories(profiles, regions=None, events=None, path=None, max_workers=8, timeout=None):
+    """
+    여러 AWS 계정/리전의 스냅샷에 마지막 반영 이후의 EC2 변경 이벤트만 병렬로 반영합니다.
+    스냅샷이 없거나 오래되었거나 이벤트가 누락된 대상은 전체 재수집합니다.
+
+    Args:
+        profiles (dict): AWS 프로필명과 별칭의 매핑 딕셔너리
+        regions (list): 반영할 AWS 리전 목록 (None이면 프로필 기본 리전만 반영)
+        events (list): 반영할 이벤트 (None이면 대상별로 CloudTrail lookup_events 조회)
+        path (str): 스냅샷 DB 경로 (None이면 INVENTORY_SNAPSHOT_PATH 환경변수 또는 기본 경로)
+        max_workers (int): 최대 동시 반영 수 (기본값: 8)
+        timeout (float): (계정, 리전)별 반영 제한 시간(초) (None이면 무제한)
+
+    Returns:
+        int: 반영에 실패한 (계정, 리전) 수
+    """
+    regions = regions or [None]
+    targets = [(profile, region, events, path) for profile in profiles for region in regions]
+    failed = 0
+
+    print("Alias | Region | Mode | Events | New | Elapsed")
+    print("-----------------------------------------------")
+    for target_result in fan_out(_sync_target, targets, max_workers, timeout):
+        profile, region = target_result.target[:2]
+        alias = profiles[profile]
+        region_label = region or "default"
+
+        # 반영 실패 시 해당 계정/리전만 오류 출력 후 다음 대상 처리 (기존 스냅샷은 유지)
+        if target_result.error:
+            print(f"{alias} | {region_label} | [ERROR] {target_result.error}")
+            failed += 1
+            continue
+
+        result = target_result.result
+        if result["mode"] == "resync":
+            print(f"{alias} | {region_label} | resync ({result['reason']}) | - | - | {target_result.elapsed:.1f}s")
+        else:
+            print(f"{alias} | {region_label} | incremental | {result['applied']} | "
+                  f"{result['new_instances']} | {target_result.elapsed:.1f}s")
+    return failed
+
+if __name__ == "__main__":
+    # AWS 계정별 프로필과 별칭 매핑
+    aws_profiles = {
+        "profile01": "alias01",
+        "profile02": "alias02",
+        "profile03": "alias03"
+    }
+    # AWS_ACCOUNT_SOURCE 환경변수(organizations 또는 계정 파일)가 있으면 위 목록 대신 조회한 계정에 AssumeRole 하여 사용
+    aws_profiles = target_profiles(aws_profiles)
+
+    # 반영할 AWS 리전 목록 (collect_snapshot.py의 리전과 같아야 함)
+    regions = ["ap-northeast-2"]
+
+    # 병렬 처리 설정 (최대 동시 반영 수, 대상별 제한 시간(초))
+    max_workers = 8
+    target_timeout = 600
+
+    # 인자로 이벤트 파일(EventBridge 이벤트, CloudTrail 로그 파일 등)을 주면 CloudTrail 조회 대신 파일의 이벤트를 반영
+    events = [event for path in sys.argv[1:] for event in load_events(path)] if len(sys.argv) > 1 else None
+
+    failed = sync_inventories(aws_profiles, regions, events, max_workers=max_workers, timeout=target_timeout)
+    print(f"\nSnapshot saved to {InventorySnapshot().path}")
+    sys.exit(1 if failed else 0)